@@ -12,18 +12,21 @@ from .core import (
     BaseAgent,
     AgentMessage,
     AgentState,
+    PriorityInbox,
     SwarmReplay
 )
 
-from .agents import (
-    ReconnaissanceAgent,
-    AnalysisAgent,
-    PlannerAgent,
-    ReporterAgent
-)
 from .osint_agent import OSINTScraperAgent
 
-from .orchestrator import SwarmOrchestrator
+from .orchestrator import SwarmOrchestrator, SWARM_AGENTS_AVAILABLE
+
+if SWARM_AGENTS_AVAILABLE:
+    from .agents import (
+        ReconnaissanceAgent,
+        AnalysisAgent,
+        PlannerAgent,
+        ReporterAgent
+    )
 
 __version__ = "2.0.0"
 __author__ = "Pi bot"
@@ -32,15 +35,15 @@ __all__ = [
     "BaseAgent",
     "AgentMessage",
     "AgentState",
+    "PriorityInbox",
     "SwarmReplay",
     
     # Agents
-    "ReconnaissanceAgent",
-    "AnalysisAgent",
-    "PlannerAgent",
-    "ReporterAgent",
     "OSINTScraperAgent",  # 🕷️ الوكيل الجديد
     
     # Orchestrator
     "SwarmOrchestrator"
 ]
+
+if SWARM_AGENTS_AVAILABLE:
+    __all__ += ["ReconnaissanceAgent", "AnalysisAgent", "PlannerAgent", "ReporterAgent"]
@@ -0,0 +1,156 @@
+"""
+🧵 تنفيذ معالجات الوكلاء خارج حلقة التنسيق (Agent Executor)
+تشغيل process_message على مجمع threads أو مجمع عمليات حسب نوع عمل الوكيل
+
+الفكرة:
+- معالجات الوكلاء تحجز: فحص sockets في tools.py، طلبات Ollama عبر urllib،
+  جلب الصفحات بـ Scrapling. معالج بطيء واحد كان يوقف السرب كله
+- كل وكيل يعلن نوع عمله (workload):
+    "io"     → مجمع threads (انتظار شبكة/ملفات، الـ GIL يُحرر أثناء الانتظار)
+    "cpu"    → مجمع عمليات (تحليل ثقيل يحتاج أنوية حقيقية)
+    "inline" → في نفس thread المنسق (معالجات سريعة جداً)
+- النوع قابل للتغيير لكل وكيل من EXECUTOR_CONFIG["agent_workloads"]
+- النتيجة Future يُوجَّه ردها إلى الوكلاء الآخرين عند اكتماله، فإنتاجية
+  السرب محدودة بأبطأ مورد لا بمجموع كل زمن الانتظار
+
+ملاحظة عن "cpu":
+    الوكيل يُنسخ إلى العملية العاملة، فتُعاد حالته كاملة (__getstate__ ما عدا
+    صندوق الوارد) مع الرد وتُطبق على النسخة الأصلية، فأي خاصية يغيّرها
+    المعالج (collected_data، عدادات، ...) لا تضيع. وكيل لا يمكن نقله (pickle)
+    يعمل على مجمع الـ threads بدلاً من ذلك مع تحذير.
+"""
+
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional
+
+EXECUTOR_CONFIG = {
+    "io_workers": 16,                          # threads لمعالجات I/O
+    "cpu_workers": os.cpu_count() or 2,        # عمليات لمعالجات CPU
+    "default_workload": "io",                  # لوكيل لا يعلن workload
+    "agent_workloads": {},                     # {اسم الوكيل: "io" | "cpu" | "inline"}
+    "mp_start_method": "spawn",                # مثل فحص الشبكات الموزع في tools.py
+}
+
+WORKLOADS = ("io", "cpu", "inline")
+
+# خصائص تخص النسخة الأصلية فقط ولا تُعاد من العملية العاملة
+# (صندوق الوارد يتلقى رسائل جديدة أثناء تشغيل المعالج)
+PROCESS_LOCAL_ATTRIBUTES = ("inbox",)
+
+def _run_isolated(agent, message):
+    """
+    تشغيل المعالج في عملية عاملة وإرجاع الرد مع حالة الوكيل كاملة بعده
+    (دالة على مستوى الوحدة حتى يمكن نقلها إلى العملية)
+    """
+    response = agent.process_message(message)
+    state = agent.__getstate__()
+    for name in PROCESS_LOCAL_ATTRIBUTES:
+        state.pop(name, None)
+    return response, state
+
+class AgentExecutor:
+    """
+    مجمعات التنفيذ المشتركة لوكلاء السرب
+
+    المجمعات تُنشأ عند أول استخدام فقط، لذا سرب بلا وكلاء "cpu" لا يبدأ
+    أي عملية إضافية.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = {**EXECUTOR_CONFIG, **(config or {})}
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._unpicklable = set()
+        self._picklable = set()
+
+    def workload_for(self, agent) -> str:
+        """نوع عمل الوكيل: من الإعدادات أولاً ثم خاصية workload للوكيل"""
+        workload = self.config["agent_workloads"].get(
+            agent.name, getattr(agent, "workload", None) or self.config["default_workload"]
+        )
+        if workload not in WORKLOADS:
+            raise ValueError(f"Unknown workload for {agent.name}: {workload}")
+        if workload == "cpu" and agent.name in self._unpicklable:
+            return "io"
+        return workload
+
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(
+                max_workers=max(1, self.config["io_workers"]), thread_name_prefix="agent-io"
+            )
+        return self._threads
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        if self._processes is None:
+            context = multiprocessing.get_context(self.config["mp_start_method"])
+            self._processes = ProcessPoolExecutor(
+                max_workers=max(1, self.config["cpu_workers"]), mp_context=context
+            )
+        return self._processes
+
+    def submit(self, agent, message) -> Future:
+        """
+        تشغيل agent.process_message(message) حسب نوع عمل الوكيل
+
+        Returns:
+            Future نتيجته رد الوكيل (AgentMessage أو None)
+        """
+        # الرسالة المشتركة المجمدة تبقى في الصناديق والسجل، والمعالج يأخذ نسخة قابلة للتعديل
+        message = message.thaw()
+        workload = self.workload_for(agent)
+
+        if workload == "inline":
+            future = Future()
+            try:
+                future.set_result(agent.process_message(message))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        if workload == "cpu" and self._check_picklable(agent):
+            return self._submit_isolated(agent, message)
+
+        return self._thread_pool().submit(agent.process_message, message)
+
+    def _check_picklable(self, agent) -> bool:
+        """فحص (مرة واحدة لكل وكيل) أن الوكيل يمكن نقله إلى عملية عاملة"""
+        if agent.name in self._picklable:
+            return True
+        try:
+            pickle.dumps(agent)
+        except Exception as e:
+            print(f"⚠️ [{agent.name}] لا يمكن نقله لعملية منفصلة ({e}). سيعمل على threads.")
+            self._unpicklable.add(agent.name)
+            return False
+        self._picklable.add(agent.name)
+        return True
+
+    def _submit_isolated(self, agent, message) -> Future:
+        """تشغيل في مجمع العمليات ثم تطبيق حالة الوكيل العائدة على الأصل"""
+        inner = self._process_pool().submit(_run_isolated, agent, message)
+        outer = Future()
+
+        def _done(done: Future):
+            try:
+                response, state = done.result()
+            except BaseException as e:
+                outer.set_exception(e)
+                return
+            agent.__dict__.update(state)
+            outer.set_result(response)
+
+        inner.add_done_callback(_done)
+        return outer
+
+    def shutdown(self, wait: bool = True):
+        """إيقاف المجمعات (تُنشأ من جديد عند الاستخدام التالي)"""
+        if self._threads is not None:
+            self._threads.shutdown(wait=wait)
+            self._threads = None
+        if self._processes is not None:
+            self._processes.shutdown(wait=wait)
+            self._processes = None
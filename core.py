@@ -6,26 +6,238 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
 from dataclasses import dataclass, field
 from datetime import datetime
+from collections import deque
+import gzip
+import hashlib
+import itertools
 import json
+import lzma
+import os
+import threading
+import time
 import uuid
+import zlib
+
+# --- محتوى الرسائل المشتركة (للقراءة فقط) ---
+
+def _readonly(self, *args, **kwargs):
+    raise TypeError("shared message content is read-only; copy it with thaw_content(...)")
+
+class FrozenDict(dict):
+    """
+    قاموس للقراءة فقط لمحتوى الرسائل المشتركة بين عدة وكلاء
+
+    يبقى dict (لـ json.dumps و isinstance)، لكن أي تعديل يرفع TypeError.
+    dict(frozen) أو frozen.copy() يعطي نسخة قابلة للتعديل.
+    """
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+class FrozenList(list):
+    """قائمة للقراءة فقط (تبقى list لـ isinstance و list + ... و json.dumps)"""
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+class FrozenSet(frozenset):
+    """مجموعة set بعد التجميد (تُميَّز عن frozenset الأصلية حتى تعود set عند الفك)"""
+
+    __slots__ = ()
+
+    def __reduce__(self):
+        return (FrozenSet, (frozenset(self),))
+
+    def __repr__(self):
+        return repr(set(self))  # نفس بصمة المحتوى قبل التجميد وبعده
+
+def freeze_content(value: Any) -> Any:
+    """
+    تجميد المحتوى بعمق بنسخ للقراءة فقط من نفس الأنواع:
+    dict → FrozenDict، list → FrozenList، set → FrozenSet (المحتوى الأصلي لا يتغير)
+    """
+    if isinstance(value, (FrozenDict, FrozenList, FrozenSet)):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict({key: freeze_content(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return FrozenList(freeze_content(item) for item in value)
+    if isinstance(value, tuple):
+        return tuple(freeze_content(item) for item in value)
+    if isinstance(value, set):
+        return FrozenSet(value)
+    return value
+
+def thaw_content(value: Any) -> Any:
+    """نسخة قابلة للتعديل من محتوى مجمد بنفس أنواعه الأصلية (dict, list, set)"""
+    if isinstance(value, dict):
+        return {key: thaw_content(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [thaw_content(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(thaw_content(item) for item in value)
+    if isinstance(value, FrozenSet):
+        return set(value)
+    return value
+
+def content_digest(content: Any) -> str:
+    """بصمة المحتوى (sha256 لـ JSON مرتب) كمفتاح في جدول الرسائل"""
+    canonical = json.dumps(content, sort_keys=True, ensure_ascii=False,
+                           separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+# --- معرفات وأوقات الرسائل ---
+
+# المعرف = بادئة عشوائية لكل عملية + عداد تصاعدي: مرتب زمنياً داخل العملية
+# وفريد بين العمليات والجلسات، بدون uuid4() لكل رسالة
+_MESSAGE_COUNTER = itertools.count(1)
+_ID_PREFIX = uuid.uuid4().hex[:12]
+
+# الوقت يُسجل كـ monotonic_ns (رخيص) ويُحول لنص ISO عند القراءة فقط
+_WALL_ANCHOR_NS = time.time_ns()
+_MONO_ANCHOR_NS = time.monotonic_ns()
+
+def _reset_message_ids():
+    """بعد fork: بادئة وعداد جديدان حتى لا تتكرر معرفات الأب"""
+    global _MESSAGE_COUNTER, _ID_PREFIX
+    _MESSAGE_COUNTER = itertools.count(1)
+    _ID_PREFIX = uuid.uuid4().hex[:12]
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_message_ids)
+
+def format_monotonic_ns(ns: int) -> str:
+    """تحويل وقت monotonic_ns إلى نص ISO بتوقيت الجهاز"""
+    return datetime.fromtimestamp((_WALL_ANCHOR_NS + ns - _MONO_ANCHOR_NS) / 1e9).isoformat()
 
 # --- أنواع البيانات ---
 
-@dataclass
 class AgentMessage:
-    """رسالة للتواصل بين الوكلاء"""
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))
-    sender: str = ""
-    recipient: str = ""  # "broadcast" للإرسال للجميع
-    message_type: str = ""  # task, result, request, alert
-    content: Dict[str, Any] = field(default_factory=dict)
-    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
-    priority: str = "normal"  # low, normal, high, critical
-
-@dataclass
+    """
+    رسالة للتواصل بين الوكلاء
+    
+    نفس الحقول العامة السابقة (id, sender, recipient, message_type, content,
+    timestamp, priority)، لكن بـ __slots__ بدلاً من قاموس لكل كائن،
+    و id/timestamp يُنشآن كعدد صحيح ووقت monotonic_ns ويُحولان لنص
+    عند أول قراءة فقط.
+    """
+    
+    __slots__ = ("_id", "sender", "recipient", "message_type", "content",
+                 "_timestamp", "_created_ns", "priority")
+    
+    FIELDS = ("id", "sender", "recipient", "message_type", "content", "timestamp", "priority")
+    
+    def __init__(self, id: Optional[str] = None, sender: str = "", recipient: str = "",
+                 message_type: str = "", content: Optional[Dict[str, Any]] = None,
+                 timestamp: Optional[str] = None, priority: str = "normal"):
+        self._id = next(_MESSAGE_COUNTER) if id is None else id
+        self.sender = sender
+        self.recipient = recipient  # اسم وكيل، "broadcast"، "capability:<قدرة>" أو "topic:<موضوع>"
+        self.message_type = message_type  # task, result, request, alert
+        self.content = {} if content is None else content
+        self._timestamp = timestamp
+        self._created_ns = time.monotonic_ns() if timestamp is None else None
+        self.priority = priority  # low, normal, high, critical
+    
+    @property
+    def id(self) -> str:
+        value = self._id
+        if type(value) is int:
+            value = f"{_ID_PREFIX}-{value:08x}"
+            object.__setattr__(self, "_id", value)
+        return value
+    
+    @id.setter
+    def id(self, value: str):
+        self._id = value
+    
+    @property
+    def timestamp(self) -> str:
+        value = self._timestamp
+        if value is None:
+            value = format_monotonic_ns(self._created_ns)
+            object.__setattr__(self, "_timestamp", value)
+        return value
+    
+    @timestamp.setter
+    def timestamp(self, value: str):
+        self._timestamp = value
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """الحقول العامة كقاموس (للتسجيل و JSON)"""
+        return {name: getattr(self, name) for name in self.FIELDS}
+    
+    def freeze(self) -> "AgentMessage":
+        """
+        جعل الرسالة غير قابلة للتعديل حتى يتشارك كل المستلمين نفس الكائن
+        (تُستدعى عند broadcast)
+        """
+        if not self.frozen:
+            self.content = freeze_content(self.content)
+            self.__class__ = FrozenAgentMessage
+        return self
+    
+    def thaw(self) -> "AgentMessage":
+        """
+        نسخة قابلة للتعديل لمعالج وكيل واحد (نفس المعرف والوقت، ومحتوى
+        بأنواعه الأصلية)؛ الرسالة المجمدة المشتركة لا تتغير
+        """
+        if not self.frozen:
+            return self
+        values = dict(zip(self.FIELDS, self._values()))
+        values["content"] = thaw_content(self.content)
+        return AgentMessage(**values)
+    
+    @property
+    def frozen(self) -> bool:
+        return isinstance(self, FrozenAgentMessage)
+    
+    def _values(self):
+        return tuple(getattr(self, name) for name in self.FIELDS)
+    
+    def __eq__(self, other):
+        if not isinstance(other, AgentMessage):
+            return NotImplemented
+        return self._values() == other._values()
+    
+    __hash__ = None
+    
+    def __reduce__(self):
+        return (_restore_message, (self._values(), self.frozen))
+    
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.FIELDS)
+        return f"AgentMessage({fields})"
+
+class FrozenAgentMessage(AgentMessage):
+    """AgentMessage بعد freeze(): أي تعديل يرفع AttributeError"""
+    
+    __slots__ = ()
+    
+    def __setattr__(self, name, value):
+        raise AttributeError(f"AgentMessage is frozen; cannot set {name}")
+    
+    def __delattr__(self, name):
+        raise AttributeError(f"AgentMessage is frozen; cannot delete {name}")
+
+def _restore_message(values, frozen: bool) -> AgentMessage:
+    message = AgentMessage(*values)
+    return message.freeze() if frozen else message
+
+@dataclass(slots=True)
 class AgentState:
     """حالة الوكيل"""
     name: str
@@ -35,18 +247,109 @@ class AgentState:
     completed_tasks: int = 0
     last_active: str = field(default_factory=lambda: datetime.now().isoformat())
 
+# --- صندوق الوارد حسب الأولوية ---
+
+# من الأعلى للأدنى: critical تسبق أي عمل مؤجل
+PRIORITY_LEVELS = ("critical", "high", "normal", "low")
+PRIORITY_RANK = {level: rank for rank, level in enumerate(PRIORITY_LEVELS)}
+DEFAULT_PRIORITY = "normal"
+
+def priority_rank(priority: str) -> int:
+    """ترتيب الأولوية (0 = الأعلى)؛ القيم غير المعروفة تُعامل كـ normal"""
+    return PRIORITY_RANK.get(priority, PRIORITY_RANK[DEFAULT_PRIORITY])
+
+class PriorityInbox:
+    """
+    صندوق وارد بطابور (deque) لكل مستوى أولوية
+
+    - append و popleft بتكلفة O(1)، فتفريغ صندوق كبير خطي
+    - الرسائل الأعلى أولوية تخرج أولاً، و FIFO داخل نفس المستوى
+    - يحتفظ بواجهة القائمة المستخدمة سابقاً (append, len, bool, التكرار)
+    """
+
+    __slots__ = ("_queues", "_size")
+
+    def __init__(self, messages=()):
+        self._queues = tuple(deque() for _ in PRIORITY_LEVELS)
+        self._size = 0
+        self.extend(messages)
+
+    def append(self, message: "AgentMessage"):
+        """إضافة رسالة في طابور أولويتها"""
+        self._queues[priority_rank(message.priority)].append(message)
+        self._size += 1
+
+    def extend(self, messages):
+        for message in messages:
+            self.append(message)
+
+    def popleft(self) -> "AgentMessage":
+        """إخراج الرسالة التالية (الأعلى أولوية، الأقدم داخل المستوى)"""
+        for queue in self._queues:
+            if queue:
+                self._size -= 1
+                return queue.popleft()
+        raise IndexError("pop from an empty inbox")
+
+    def peek(self) -> Optional["AgentMessage"]:
+        """الرسالة التالية دون إخراجها"""
+        for queue in self._queues:
+            if queue:
+                return queue[0]
+        return None
+
+    def head_rank(self) -> Optional[int]:
+        """ترتيب أولوية الرسالة التالية، أو None إذا كان الصندوق فارغاً"""
+        for rank, queue in enumerate(self._queues):
+            if queue:
+                return rank
+        return None
+
+    def counts(self) -> Dict[str, int]:
+        """عدد الرسائل المنتظرة في كل مستوى"""
+        return {level: len(queue) for level, queue in zip(PRIORITY_LEVELS, self._queues)}
+
+    def clear(self):
+        for queue in self._queues:
+            queue.clear()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __iter__(self):
+        """الرسائل بترتيب الإخراج دون إخراجها"""
+        for queue in self._queues:
+            yield from queue
+
+    def __repr__(self) -> str:
+        counts = ", ".join(f"{level}={n}" for level, n in self.counts().items() if n)
+        return f"PriorityInbox({counts or 'empty'})"
+
 # --- الفئة الأساسية للوكلاء ---
 
 class BaseAgent(ABC):
     """الفئة الأساسية لجميع وكلاء السرب"""
     
+    # نوع العمل لاختيار مجمع التنفيذ: "io" (threads) أو "cpu" (عمليات) أو "inline"
+    workload: str = "io"
+    
     def __init__(self, name: str, role: str):
         self.name = name
         self.role = role
         self.state = AgentState(name=name, role=role)
-        self.inbox: List[AgentMessage] = []
+        self.inbox = PriorityInbox()
         self.memory: Dict[str, Any] = {}
     
+    def __getstate__(self):
+        """عند النقل لعملية عاملة لا يُنسخ صندوق الوارد"""
+        state = self.__dict__.copy()
+        state["inbox"] = PriorityInbox()
+        return state
+    
     @abstractmethod
     def process_message(self, message: AgentMessage) -> Optional[AgentMessage]:
         """معالجة الرسالة الواردة وإرسال رد إذا لزم الأمر"""
@@ -57,13 +360,22 @@ class BaseAgent(ABC):
         """إرجاع قائمة بالقدرات التي يمتلكها الوكيل"""
         pass
     
-    def send_message(self, recipient: str, msg_type: str, content: Dict) -> AgentMessage:
+    def get_subscriptions(self) -> Optional[List[str]]:
+        """
+        المواضيع وأنواع الرسائل التي يريد الوكيل تلقيها عبر broadcast
+        و "topic:<موضوع>". None (الافتراضي) = كل الرسائل.
+        """
+        return None
+    
+    def send_message(self, recipient: str, msg_type: str, content: Dict,
+                     priority: str = DEFAULT_PRIORITY) -> AgentMessage:
         """إنشاء رسالة وإرسالها"""
         msg = AgentMessage(
             sender=self.name,
             recipient=recipient,
             message_type=msg_type,
-            content=content
+            content=content,
+            priority=priority
         )
         return msg
     
@@ -80,51 +392,330 @@ class BaseAgent(ABC):
 
 # --- سجل العمليات (Replay System) ---
 
+REPLAY_CONFIG = {
+    "compression": None,    # None أو "gzip" أو "lzma"
+    "flush_every": 64,      # كتابة إطار على القرص كل N حدث
+    "flush_interval": 2.0,  # أو كل N ثانية (أيهما أسبق)
+}
+
+SESSION_EXTENSIONS = {None: ".jsonl", "gzip": ".jsonl.gz", "lzma": ".jsonl.xz"}
+
+class _FramedWriter:
+    """
+    كاتب ملف JSONL بإطارات مضغوطة مستقلة
+    
+    كل flush ينهي الإطار الحالي (عضو gzip أو stream xz كامل) ويكتبه،
+    فالملف قابل للقراءة حتى آخر flush لو توقفت العملية فجأة؛ gzip.open
+    و lzma.open يقرآن الإطارات المتتالية كملف واحد.
+    """
+    
+    def __init__(self, path: str, compression: Optional[str]):
+        if compression not in SESSION_EXTENSIONS:
+            raise ValueError(f"Unknown replay compression: {compression}")
+        self.compression = compression
+        self._file = open(path, "ab")
+        self._compressor = None
+    
+    def _new_compressor(self):
+        if self.compression == "gzip":
+            # wbits=31: إطار gzip كامل (header + trailer)
+            return zlib.compressobj(6, zlib.DEFLATED, 31)
+        # preset منخفض: قاموس صغير يكفي لإطار من عشرات الأحداث ويبقي الذاكرة محدودة
+        return lzma.LZMACompressor(format=lzma.FORMAT_XZ, preset=1)
+    
+    def write(self, data: bytes):
+        if self.compression is None:
+            self._file.write(data)
+            return
+        if self._compressor is None:
+            self._compressor = self._new_compressor()
+        self._file.write(self._compressor.compress(data))
+    
+    def flush(self):
+        if self._compressor is not None:
+            self._file.write(self._compressor.flush())
+            self._compressor = None
+        self._file.flush()
+    
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+def iter_session_file(filename: str):
+    """
+    قراءة أحداث ملف جلسة حدثاً بحدث (JSONL عادي أو مضغوط، أو JSON قديم)
+    
+    سطر أخير مقطوع أو إطار غير مكتمل (توقف مفاجئ أثناء الكتابة) يُتجاهل،
+    فكل ما كُتب قبل آخر flush يُقرأ.
+    """
+    if filename.endswith(".json"):
+        # الشكل القديم: قائمة JSON واحدة
+        with open(filename, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+        return
+    
+    if filename.endswith(".gz"):
+        f = gzip.open(filename, "rt", encoding="utf-8")
+    elif filename.endswith(".xz"):
+        f = lzma.open(filename, "rt", encoding="utf-8")
+    else:
+        f = open(filename, "r", encoding="utf-8")
+    
+    with f:
+        try:
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # سطر مقطوع في نهاية الملف
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+        except (EOFError, lzma.LZMAError, zlib.error, gzip.BadGzipFile):
+            return  # إطار أخير غير مكتمل
+
 class SwarmReplay:
-    """نظام حفظ وإعادة تشغيل الجلسات"""
+    """
+    نظام حفظ وإعادة تشغيل الجلسات
+    
+    الأحداث تُكتب فور حدوثها كسطور JSONL مضغوطة (اختيارياً) في
+    swarm_logs/session_<id>.jsonl[.gz|.xz] مع flush كل flush_every حدث، أو
+    بعد flush_interval ثانية من أول حدث معلق (مؤقت في الخلفية، فالجلسة
+    الخاملة لا تبقى أحداثها في الذاكرة)، وعند الإغلاق. الذاكرة ثابتة مهما
+    طالت المهمة، والجلسة تبقى على القرص حتى آخر flush لو انهارت.
+    """
     
-    def __init__(self, log_path: str = "swarm_logs/"):
+    def __init__(self, log_path: str = "swarm_logs/", compression: Optional[str] = None,
+                 flush_every: Optional[int] = None, flush_interval: Optional[float] = None):
+        """
+        Args:
+            compression: None أو "gzip" أو "lzma" (default: REPLAY_CONFIG)
+            flush_every: عدد الأحداث بين كل flush
+            flush_interval: أقصى ثوانٍ بين كل flush
+        """
         self.log_path = log_path
+        self.compression = compression if compression is not None else REPLAY_CONFIG["compression"]
+        if self.compression not in SESSION_EXTENSIONS:
+            raise ValueError(f"Unknown replay compression: {self.compression}")
+        self.flush_every = flush_every or REPLAY_CONFIG["flush_every"]
+        self.flush_interval = flush_interval if flush_interval is not None else REPLAY_CONFIG["flush_interval"]
         self.session_id: str = ""
-        self.events: List[Dict] = []
+        self.filename: Optional[str] = None
+        self.event_count = 0
+        self._stored_digests = set()  # بصمات المحتوى المكتوبة في جدول الرسائل
+        self._writer: Optional[_FramedWriter] = None
+        self._pending = 0
+        self._flush_timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+    
+    def _session_filename(self, session_id: str) -> str:
+        return os.path.join(self.log_path, f"session_{session_id[:8]}{SESSION_EXTENSIONS[self.compression]}")
     
     def start_session(self):
         """بدء جلسة جديدة"""
+        self.close()
         self.session_id = str(uuid.uuid4())
-        self.events = []
+        self.event_count = 0
+        self._stored_digests = set()
+        os.makedirs(self.log_path, exist_ok=True)
+        self.filename = self._session_filename(self.session_id)
+        self._writer = _FramedWriter(self.filename, self.compression)
         print(f"🎬 بدأ جلسة جديدة: {self.session_id}")
     
     def log_event(self, event_type: str, data: Dict):
-        """تسجيل حدث في الجلسة"""
+        """تسجيل حدث في الجلسة (يُكتب مباشرة في ملف الجلسة)"""
         event = {
             "timestamp": datetime.now().isoformat(),
             "session_id": self.session_id,
             "event_type": event_type,
             "data": data
         }
-        self.events.append(event)
+        line = json.dumps(event, ensure_ascii=False, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            if self._writer is None:
+                return  # لا جلسة نشطة: الحدث خارج أي مهمة
+            self._writer.write(line.encode("utf-8"))
+            self.event_count += 1
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self._flush_locked()
+            elif self._flush_timer is None:
+                # أول حدث معلق منذ آخر flush: يُكتب بعد flush_interval حتى لو لم يأتِ غيره
+                self._flush_timer = threading.Timer(self.flush_interval, self._timed_flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+    
+    def _cancel_timer_locked(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+    
+    def _flush_locked(self):
+        self._cancel_timer_locked()
+        self._writer.flush()
+        self._pending = 0
+    
+    def _timed_flush(self):
+        with self._lock:
+            if self._flush_timer is not threading.current_thread():
+                return  # مؤقت قديم أُلغي بعد flush آخر
+            self._flush_timer = None
+            if self._writer is not None and self._pending:
+                self._flush_locked()
+    
+    def flush(self):
+        """كتابة كل الأحداث المعلقة على القرص"""
+        with self._lock:
+            if self._writer is not None:
+                self._flush_locked()
+    
+    def log_message(self, message: AgentMessage, recipients: List[str]) -> str:
+        """
+        تسجيل رسالة مُرسلة لعدة مستلمين في حدث واحد
+        
+        المحتوى يُخزن مرة واحدة في جدول الرسائل (حدث message_stored عند
+        أول ظهور لبصمته)، وحدث message_sent يشير إليه بـ content_ref مع
+        قائمة المستلمين، فحجم السجل لا يكبر مع عدد الوكلاء.
+        
+        Returns:
+            بصمة المحتوى
+        """
+        digest = content_digest(message.content)
+        if digest not in self._stored_digests:
+            self._stored_digests.add(digest)
+            self.log_event("message_stored", {"digest": digest, "content": message.content})
+        self.log_event("message_sent", {
+            "id": message.id,
+            "from": message.sender,
+            "recipient": message.recipient,
+            "to": recipients,
+            "type": message.message_type,
+            "priority": message.priority,
+            "content_ref": digest
+        })
+        return digest
+    
+    @staticmethod
+    def resolve_messages(events):
+        """
+        أحداث الجلسة مع محتوى الرسائل مستعاداً من جدول الرسائل
+        
+        message_sent يحصل على "content" من content_ref، وأحداث
+        message_stored تُستهلك ولا تُعاد. الجلسات القديمة (محتوى مضمن
+        لكل مستلم) تمر كما هي.
+        """
+        table = {}
+        for event in events:
+            data = event.get("data", {})
+            if event["event_type"] == "message_stored":
+                table[data["digest"]] = data["content"]
+                continue
+            if event["event_type"] == "message_sent" and "content_ref" in data:
+                event = {**event, "data": {**data, "content": table.get(data["content_ref"])}}
+            yield event
+    
+    def close(self):
+        """إغلاق ملف الجلسة الحالية (آخر flush)"""
+        with self._lock:
+            self._cancel_timer_locked()
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+                self._pending = 0
     
     def save_session(self):
-        """حفظ الجلسة في ملف JSON"""
-        import os
-        os.makedirs(self.log_path, exist_ok=True)
-        filename = f"{self.log_path}session_{self.session_id[:8]}.json"
-        with open(filename, 'w') as f:
-            json.dump(self.events, f, indent=2)
-        print(f"💾 حُفظت الجلسة في: {filename}")
-        return filename
+        """إنهاء الجلسة: الأحداث مكتوبة مسبقاً، يبقى إغلاق الملف"""
+        self.close()
+        print(f"💾 حُفظت الجلسة في: {self.filename} ({self.event_count} حدث)")
+        return self.filename
+    
+    def find_session_file(self, session_id: str) -> str:
+        """ملف الجلسة بأي صيغة (JSONL عادي/مضغوط أو JSON قديم)"""
+        prefix = f"session_{session_id[:8]}"
+        for extension in (*SESSION_EXTENSIONS.values(), ".json"):
+            filename = os.path.join(self.log_path, prefix + extension)
+            if os.path.exists(filename):
+                return filename
+        raise FileNotFoundError(f"No session file for {session_id} in {self.log_path}")
     
     def load_session(self, session_id: str) -> List[Dict]:
         """تحميل جلسة سابقة"""
-        filename = f"{self.log_path}session_{session_id[:8]}.json"
-        with open(filename, 'r') as f:
-            return json.load(f)
+        return list(self.iter_session(session_id))
     
-    def export_for_sharing(self) -> Dict:
-        """تصدير الجلسة للمشاركة المجتمعية"""
-        return {
-            "session_id": self.session_id,
-            "total_events": len(self.events),
-            "events": self.events,
-            "exported_at": datetime.now().isoformat()
-        }
+    def iter_session(self, session_id: str) -> Iterator[Dict]:
+        """أحداث جلسة سابقة حدثاً بحدث (بدون تحميل الملف كاملاً)"""
+        return iter_session_file(self.find_session_file(session_id))
+    
+    def iter_events(self):
+        """أحداث الجلسة الحالية من ملفها (بعد flush)"""
+        if not self.filename:
+            return iter(())
+        self.flush()
+        return iter_session_file(self.filename)
+    
+    @property
+    def events(self) -> List[Dict]:
+        """كل أحداث الجلسة الحالية (تُقرأ من الملف؛ للجلسات الصغيرة)"""
+        return list(self.iter_events())
+    
+    def export_for_sharing(self, out: Optional[TextIO] = None):
+        """
+        تصدير الجلسة للمشاركة المجتمعية
+        
+        بدون out تُعاد الجلسة كقاموس (للجلسات الصغيرة). مع out (ملف نصي)
+        يُكتب نفس مستند JSON حدثاً بحدث من ملف الجلسة دون تحميله في الذاكرة.
+        
+        Returns:
+            القاموس، أو عدد الأحداث المكتوبة في out
+        """
+        exported_at = datetime.now().isoformat()
+        if out is None:
+            return {
+                "session_id": self.session_id,
+                "total_events": self.event_count,
+                "events": self.events,
+                "exported_at": exported_at
+            }
+        
+        out.write(f'{{"session_id": {json.dumps(self.session_id)}, '
+                  f'"total_events": {self.event_count}, "events": [')
+        count = 0
+        for event in self.iter_events():
+            out.write(",\n  " if count else "\n  ")
+            out.write(json.dumps(event, ensure_ascii=False, default=str))
+            count += 1
+        out.write(f'\n], "exported_at": {json.dumps(exported_at)}}}\n')
+        return count
+
+def normalize_events(events: Iterable[Dict]) -> Iterator[Dict]:
+    """
+    أحداث الجلسة بشكل موحد (لإعادة التشغيل والفهرسة)، حدثاً بحدث
+    
+    - المحتوى يُستعاد من جدول الرسائل (SwarmReplay.resolve_messages)
+    - message_sent لها دائماً "recipient" و "to" كقائمة
+    - الجلسات القديمة (حدث لكل مستلم بمحتوى مضمن) تُدمج في حدث واحد
+      بقائمة مستلمين، ويُفترض أنها كانت broadcast
+    """
+    pending = None  # حدث قديم قد تُضاف إليه مستلمون من الأحداث التالية
+    for event in SwarmReplay.resolve_messages(events):
+        data = event.get("data", {})
+        if event["event_type"] == "message_sent" and isinstance(data.get("to"), str):
+            if (pending is not None and pending["data"]["from"] == data["from"]
+                    and pending["data"]["type"] == data["type"]
+                    and pending["data"]["content"] == data["content"]):
+                pending["data"]["to"].append(data["to"])
+                continue
+            if pending is not None:
+                yield pending
+            pending = {**event, "data": {**data, "to": [data["to"]], "recipient": "broadcast"}}
+            continue
+        
+        if pending is not None:
+            yield pending
+            pending = None
+        if event["event_type"] == "message_sent" and "recipient" not in data:
+            event = {**event, "data": {**data, "recipient": data["to"][0] if len(data["to"]) == 1 else "broadcast"}}
+        yield event
+    
+    if pending is not None:
+        yield pending
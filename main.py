@@ -6,6 +6,7 @@
     python -m swarm_v2.main          (مفضل)
     أو
     cd swarm_v2 && python main.py    (بديل)
+    python main.py --async           (الوكلاء يعملون بالتوازي)
 
 أو:
     from swarm_v2 import SwarmOrchestrator
@@ -22,11 +23,14 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 try:
     # محاولة الاستيراد النسبي (عند التشغيل كـ module)
     from .orchestrator import SwarmOrchestrator
+    from .session_catalog import SessionCatalog, print_sessions
 except ImportError:
     # فallback للاستيراد المطلق (عند التشغيل المباشر)
     from orchestrator import SwarmOrchestrator
+    from session_catalog import SessionCatalog, print_sessions
 
-import json
+import asyncio
+from datetime import datetime, timedelta
 
 def print_banner():
     """عرض الشعار الترحيبي"""
@@ -42,8 +46,13 @@ def print_banner():
     """
     print(banner)
 
-def run_demo_mission():
-    """تشغيل مهمة تجريبية"""
+def run_demo_mission(async_mode: bool = False):
+    """
+    تشغيل مهمة تجريبية
+    
+    Args:
+        async_mode: تشغيل الوكلاء بالتوازي (start_mission_async)
+    """
     print_banner()
     
     # إنشاء المنسق
@@ -58,10 +67,11 @@ def run_demo_mission():
     
     # بدء المهمة التجريبية
     print("\n")
-    log_file = orchestrator.start_mission(
-        mission_name="فحص الشبكة المحلية",
-        target="192.168.122.0/24"
-    )
+    mission = {"mission_name": "فحص الشبكة المحلية", "target": "192.168.122.0/24"}
+    if async_mode:
+        log_file = asyncio.run(orchestrator.start_mission_async(**mission))
+    else:
+        log_file = orchestrator.start_mission(**mission)
     
     # عرض الحالة النهائية
     print("\n📊 الحالة النهائية:")
@@ -105,13 +115,18 @@ def run_interactive():
             print(f"   └إجمالي الرسائل: {status['stats']['messages_processed']}")
         
         elif choice == "3":
-            print("\n⚠️ وظيفة عرض السجلات قيد التطوير")
+            target = input("تصفية حسب الهدف (اختياري، مثال: 192.168.1.0/24): ").strip() or None
+            days = input("آخر كم يوم؟ (اختياري): ").strip()
+            since = (datetime.now() - timedelta(days=int(days))).isoformat() if days.isdigit() else None
+            with SessionCatalog(orchestrator.replay.log_path) as catalog:
+                catalog.refresh()
+                print()
+                print_sessions(catalog.query(target=target, since=since))
         
         elif choice == "4":
             session_id = input("أدخل معرف الجلسة: ").strip()
             if session_id:
-                exported = orchestrator.export_session(session_id)
-                print(json.dumps(exported, indent=2))
+                orchestrator.export_session(session_id, out=sys.stdout)
         
         elif choice == "5":
             print("\n👋 وداعاً! في أمان الله")
@@ -126,4 +141,4 @@ if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "--interactive":
         run_interactive()
     else:
-        run_demo_mission()
+        run_demo_mission(async_mode="--async" in sys.argv)
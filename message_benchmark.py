@@ -0,0 +1,147 @@
+"""
+⏱️ مقياس أداء رسائل السرب (Message Microbenchmark)
+مقارنة AgentMessage الحالية (slots، معرف وعداد ووقت كسول) بالشكل السابق
+(dataclass مع uuid4() و datetime.now().isoformat() لكل رسالة)
+
+يقيس:
+- زمن إنشاء الرسالة (ns/رسالة، أفضل تكرار)
+- الذاكرة المحجوزة لكل رسالة محتفظ بها (tracemalloc)
+- مسار مهمة كثيفة الرسائل: إنشاء → صندوق الأولوية → إخراج → قراءة الأولوية
+
+الاستخدام:
+    python message_benchmark.py                 # 100000 رسالة
+    python message_benchmark.py 500000          # عدد مختلف
+    python message_benchmark.py --json out.json # حفظ النتائج
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import gc
+import json
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict
+
+try:
+    from .core import AgentMessage, PriorityInbox
+except ImportError:
+    from core import AgentMessage, PriorityInbox
+
+BENCHMARK_CONFIG = {
+    "count": 100_000,
+    "repeats": 5,
+}
+
+@dataclass
+class LegacyAgentMessage:
+    """الشكل السابق لـ AgentMessage (للمقارنة فقط)"""
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    sender: str = ""
+    recipient: str = ""
+    message_type: str = ""
+    content: Dict[str, Any] = field(default_factory=dict)
+    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+    priority: str = "normal"
+
+def _best_ns_per_message(run, count: int, repeats: int) -> float:
+    best = None
+    for _ in range(repeats):
+        gc.collect()
+        started = time.perf_counter_ns()
+        run(count)
+        elapsed = time.perf_counter_ns() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best / count, 1)
+
+def _construct(cls):
+    def run(count: int):
+        for i in range(count):
+            cls(sender="Recon", recipient="Analyst", message_type="result", content={"n": i})
+    return run
+
+def _mission_traffic(cls):
+    def run(count: int):
+        inbox = PriorityInbox()
+        priorities = ("normal", "normal", "normal", "high", "low", "critical")
+        for i in range(count):
+            inbox.append(cls(sender="Recon", recipient="Analyst", message_type="result",
+                             content={"n": i}, priority=priorities[i % len(priorities)]))
+        while inbox:
+            inbox.popleft().priority
+    return run
+
+def _bytes_per_message(cls, count: int) -> float:
+    """الذاكرة المحجوزة لكل رسالة محتفظ بها (بدون المحتوى المشترك)"""
+    content = {}
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    messages = [cls(sender="Recon", recipient="Analyst", message_type="result", content=content)
+                for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del messages
+    return round((after - before) / count, 1)
+
+def run_message_benchmark(config: Dict = None) -> Dict:
+    """
+    قياس الشكلين على نفس الأحمال
+
+    Returns:
+        {"count", "legacy": {...}, "current": {...}, "speedup": {...}}
+    """
+    config = {**BENCHMARK_CONFIG, **(config or {})}
+    count, repeats = config["count"], config["repeats"]
+
+    report = {"count": count, "measured_at": datetime.now().isoformat()}
+    for name, cls in (("legacy", LegacyAgentMessage), ("current", AgentMessage)):
+        report[name] = {
+            "construct_ns": _best_ns_per_message(_construct(cls), count, repeats),
+            "mission_ns": _best_ns_per_message(_mission_traffic(cls), count, repeats),
+            "bytes_per_message": _bytes_per_message(cls, count),
+        }
+
+    report["speedup"] = {
+        metric: round(report["legacy"][metric] / report["current"][metric], 2)
+        for metric in ("construct_ns", "mission_ns", "bytes_per_message")
+        if report["current"][metric]
+    }
+    return report
+
+def print_report(report: Dict):
+    print(f"📨 {report['count']} رسالة لكل قياس")
+    labels = {
+        "construct_ns": "الإنشاء (ns/رسالة)",
+        "mission_ns": "مسار المهمة (ns/رسالة)",
+        "bytes_per_message": "الذاكرة (بايت/رسالة)",
+    }
+    for index, (metric, label) in enumerate(labels.items()):
+        legacy, current = report["legacy"][metric], report["current"][metric]
+        gain = report["speedup"].get(metric)
+        branch = "└─" if index == len(labels) - 1 else "├─"
+        print(f"   {branch} {label}: {legacy} → {current}" + (f" (×{gain})" if gain else ""))
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    overrides = {}
+    json_path = None
+    while args:
+        arg = args.pop(0)
+        if arg == "--json" and args:
+            json_path = args.pop(0)
+        else:
+            overrides["count"] = int(arg)
+
+    print("⏱️ Pi bot Message Benchmark\n")
+    report = run_message_benchmark(overrides)
+    print_report(report)
+
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 النتائج: {json_path}")
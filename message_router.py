@@ -0,0 +1,94 @@
+"""
+🧭 توجيه الرسائل حسب القدرات والمواضيع (Message Router)
+فهارس للوكلاء بدلاً من إرسال كل رسالة لكل وكيل
+
+العناوين المدعومة في AgentMessage.recipient:
+    "<اسم>"                → وكيل محدد بالاسم
+    "capability:<قدرة>"    → كل وكيل يعلن القدرة في get_capabilities()
+    "topic:<موضوع>"        → كل وكيل مشترك في الموضوع
+    "broadcast"            → الوكلاء المشتركون في message_type للرسالة
+                             (task, result, alert, ...)
+
+الاشتراكات تأتي من get_subscriptions() للوكيل؛ None (الافتراضي) يعني
+الاشتراك في كل شيء، فالوكلاء القدامى يستمرون في تلقي كل broadcast.
+
+الفهارس تُبنى عند تسجيل الوكلاء (نادر)، والبحث عند كل رسالة قاموس
+واحد O(1)، فتكلفة الإرسال تتناسب مع عدد المهتمين فقط.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+BROADCAST = "broadcast"
+CAPABILITY_PREFIX = "capability:"
+TOPIC_PREFIX = "topic:"
+
+class MessageRouter:
+    """فهارس الوكلاء: بالاسم، بالقدرة، وبالموضوع/نوع الرسالة"""
+
+    def __init__(self):
+        self._agents: Dict[str, object] = {}
+        self._capabilities: Dict[str, Tuple] = {}
+        self._topics: Dict[str, Tuple] = {}
+        self._wildcard: Tuple = ()
+
+    def register(self, agent):
+        """إضافة وكيل (أو استبداله بنفس الاسم) وإعادة بناء الفهارس"""
+        self._agents[agent.name] = agent
+        self._rebuild()
+
+    def unregister(self, name: str):
+        if self._agents.pop(name, None) is not None:
+            self._rebuild()
+
+    def _rebuild(self):
+        capabilities: Dict[str, List] = {}
+        topics: Dict[str, List] = {}
+        wildcard = []
+        for agent in self._agents.values():
+            for capability in agent.get_capabilities():
+                capabilities.setdefault(capability, []).append(agent)
+            subscriptions = agent.get_subscriptions()
+            if subscriptions is None:
+                wildcard.append(agent)
+            else:
+                for topic in subscriptions:
+                    topics.setdefault(topic, []).append(agent)
+
+        # كل موضوع يشمل المشتركين في كل شيء، بترتيب التسجيل
+        order = {name: index for index, name in enumerate(self._agents)}
+        self._wildcard = tuple(wildcard)
+        self._topics = {
+            topic: tuple(sorted(set(agents) | set(wildcard), key=lambda a: order[a.name]))
+            for topic, agents in topics.items()
+        }
+        self._capabilities = {key: tuple(agents) for key, agents in capabilities.items()}
+
+    def recipients(self, message, exclude: Optional[str] = None) -> List:
+        """
+        الوكلاء الذين يجب أن يتلقوا الرسالة
+
+        Args:
+            exclude: اسم وكيل يُستثنى (عادة المرسل)
+        """
+        recipient = message.recipient
+        if recipient == BROADCAST:
+            agents = self._topics.get(message.message_type, self._wildcard)
+        elif recipient.startswith(CAPABILITY_PREFIX):
+            agents = self._capabilities.get(recipient[len(CAPABILITY_PREFIX):], ())
+        elif recipient.startswith(TOPIC_PREFIX):
+            agents = self._topics.get(recipient[len(TOPIC_PREFIX):], self._wildcard)
+        else:
+            agent = self._agents.get(recipient)
+            return [agent] if agent is not None else []
+
+        if exclude is None:
+            return list(agents)
+        return [agent for agent in agents if agent.name != exclude]
+
+    def agents_with(self, capability: str) -> List:
+        """الوكلاء الذين يعلنون قدرة معينة"""
+        return list(self._capabilities.get(capability, ()))
+
+    def subscribers(self, topic: str) -> List:
+        """الوكلاء المشتركون في موضوع أو نوع رسالة"""
+        return list(self._topics.get(topic, self._wildcard))
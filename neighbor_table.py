@@ -0,0 +1,150 @@
+"""
+🧭 جدول الجيران (Neighbor Table Seeding)
+معرفة الأجهزة الحية من جدول ARP/NDP في النواة قبل إرسال أي حزمة
+
+الفكرة:
+- النواة تعرف مسبقاً كثيراً من الجيران الأحياء (/proc/net/arp و ip neigh)
+- الجيران بحالة REACHABLE/PERMANENT تُعتبر حية دون فحص
+- الجيران بحالة STALE/DELAY/PROBE تُفحص أولاً، ثم العناوين المجهولة،
+  وفي النهاية العناوين التي فشل حلّها (FAILED/INCOMPLETE)
+- عناوين الواجهات المحلية (src في مسارات kernel) حية بطبيعتها
+
+Safety:
+    ✅ قراءة فقط من النواة: بدون أي حزمة إضافية على الشبكة
+"""
+
+import ipaddress
+import os
+import shutil
+import subprocess
+from typing import Dict, Optional, Set
+
+NEIGHBOR_CONFIG = {
+    "enabled": True,
+    "use_ip_command": True,     # قراءة ip neigh / ip route (إن وُجد الأمر)
+    "proc_arp_path": "/proc/net/arp",
+    "command_timeout": 2.0,
+}
+
+# حالات NUD في النواة
+TRUSTED_STATES = {"REACHABLE", "PERMANENT", "NOARP"}      # حية دون فحص
+LIKELY_STATES = {"STALE", "DELAY", "PROBE"}               # تُفحص أولاً
+FAILED_STATES = {"FAILED", "INCOMPLETE"}                  # تُفحص أخيراً
+NUD_STATES = TRUSTED_STATES | LIKELY_STATES | FAILED_STATES | {"NONE"}
+
+ATF_COM = 0x2  # إدخال ARP مكتمل (له عنوان MAC)
+
+def _is_address(value: str) -> bool:
+    try:
+        ipaddress.ip_address(value)
+    except ValueError:
+        return False
+    return True
+
+def read_proc_arp(path: Optional[str] = None) -> Dict[str, Dict]:
+    """
+    قراءة جدول ARP من /proc/net/arp
+
+    Returns:
+        {ip: {"mac", "device", "state"}} حيث state = "STALE" للإدخال المكتمل
+        (الملف لا يحتوي حالة NUD) أو "INCOMPLETE"
+    """
+    path = path or NEIGHBOR_CONFIG["proc_arp_path"]
+    neighbors = {}
+    try:
+        with open(path, "r") as f:
+            next(f, None)  # سطر العناوين
+            for line in f:
+                fields = line.split()
+                if len(fields) < 6 or not _is_address(fields[0]):
+                    continue
+                ip, _, flags, mac, _, device = fields[:6]
+                try:
+                    complete = int(flags, 16) & ATF_COM and mac != "00:00:00:00:00:00"
+                except ValueError:
+                    continue  # سطر تالف: لا يُسقط باقي الجدول
+                neighbors[ip] = {
+                    "mac": mac if complete else None,
+                    "device": device,
+                    "state": "STALE" if complete else "INCOMPLETE"
+                }
+    except OSError:
+        pass
+    return neighbors
+
+def parse_ip_neigh(output: str) -> Dict[str, Dict]:
+    """
+    تحليل مخرجات ip neigh show
+
+    مثال سطر: "192.168.1.1 dev eth0 lladdr aa:bb:cc:dd:ee:ff REACHABLE"
+    (IPv4 و IPv6/NDP بنفس الصيغة). الحالة هي آخر حالة NUD معروفة في
+    السطر (قد تليها أعلام مثل proto)، والأسطر التي لا تبدأ بعنوان تُهمل.
+    """
+    neighbors = {}
+    for line in output.splitlines():
+        fields = line.split()
+        if not fields or not _is_address(fields[0]):
+            continue
+        state = next((f.upper() for f in reversed(fields[1:]) if f.upper() in NUD_STATES), None)
+        entry = {"mac": None, "device": None, "state": state}
+        for key, value in zip(fields[1:], fields[2:]):
+            if key == "dev":
+                entry["device"] = value
+            elif key == "lladdr":
+                entry["mac"] = value
+        neighbors[fields[0]] = entry
+    return neighbors
+
+def parse_local_addresses(route_output: str) -> Set[str]:
+    """
+    عناوين هذا الجهاز من مسارات الواجهات (... src X) وجدول local
+    (local X dev ...)
+    """
+    addresses = set()
+    for line in route_output.splitlines():
+        fields = line.split()
+        if "src" in fields and fields.index("src") + 1 < len(fields):
+            addresses.add(fields[fields.index("src") + 1])
+        if len(fields) > 1 and fields[0] == "local" and "/" not in fields[1]:
+            addresses.add(fields[1])
+    return addresses
+
+def _run_ip(*args: str) -> str:
+    if not NEIGHBOR_CONFIG["use_ip_command"] or shutil.which("ip") is None:
+        return ""
+    try:
+        return subprocess.run(
+            ["ip", *args], capture_output=True, text=True,
+            timeout=NEIGHBOR_CONFIG["command_timeout"]
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+def read_neighbor_snapshot() -> Dict[str, Set[str]]:
+    """
+    لقطة من جدول الجيران والواجهات المحلية
+
+    حالة ip neigh تتقدم على /proc/net/arp لأنها تحتوي حالة NUD الفعلية.
+
+    Returns:
+        {"trusted": set, "likely": set, "failed": set, "local": set}
+    """
+    snapshot = {"trusted": set(), "likely": set(), "failed": set(), "local": set()}
+    if not NEIGHBOR_CONFIG["enabled"]:
+        return snapshot
+
+    neighbors = read_proc_arp() if os.path.exists(NEIGHBOR_CONFIG["proc_arp_path"]) else {}
+    neighbors.update(parse_ip_neigh(_run_ip("neigh", "show")))
+
+    for ip, entry in neighbors.items():
+        if entry["state"] in TRUSTED_STATES:
+            snapshot["trusted"].add(ip)
+        elif entry["state"] in LIKELY_STATES:
+            snapshot["likely"].add(ip)
+        elif entry["state"] in FAILED_STATES:
+            snapshot["failed"].add(ip)
+
+    snapshot["local"] = parse_local_addresses(
+        _run_ip("route", "show") + _run_ip("route", "show", "table", "local")
+    )
+    return snapshot
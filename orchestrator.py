@@ -11,17 +11,37 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 try:
     from .core import BaseAgent, AgentMessage, SwarmReplay, AgentState
-    from .agents import ReconnaissanceAgent, AnalysisAgent, PlannerAgent, ReporterAgent
     from .osint_agent import OSINTScraperAgent
+    from .agent_executor import AgentExecutor
+    from .message_router import MessageRouter
 except ImportError:
     from core import BaseAgent, AgentMessage, SwarmReplay, AgentState
-    from agents import ReconnaissanceAgent, AnalysisAgent, PlannerAgent, ReporterAgent
     from osint_agent import OSINTScraperAgent
+    from agent_executor import AgentExecutor
+    from message_router import MessageRouter
 
-from typing import Dict, List, Optional
+# وكلاء السرب الأساسيون (Recon, Analysis, Planner, Reporter): agents.py الحالي
+# (v3.0) لا يوفرهم بواجهة BaseAgent، فيعمل السرب بالوكلاء المتوفرين فقط
+try:
+    try:
+        from .agents import ReconnaissanceAgent, AnalysisAgent, PlannerAgent, ReporterAgent
+    except ImportError:
+        from agents import ReconnaissanceAgent, AnalysisAgent, PlannerAgent, ReporterAgent
+    SWARM_AGENTS_AVAILABLE = True
+except ImportError:
+    print("⚠️ وكلاء السرب الأساسيون غير متوفرين في agents.py. سيعمل السرب بالوكلاء المتاحين فقط.")
+    SWARM_AGENTS_AVAILABLE = False
+
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Dict, List, Optional, TextIO
 from datetime import datetime
+import asyncio
+import inspect
 import json
 
+# نوع الرسالة التي تُنهي المهمة صراحةً في الوضع غير المتزامن
+MISSION_COMPLETE = "mission_complete"
+
 class SwarmOrchestrator:
     """
     المنسق المركزي للسرب
@@ -31,78 +51,256 @@ class SwarmOrchestrator:
     - حفظ الجلسات (Replay)
     """
     
-    def __init__(self):
+    def __init__(self, executor_config: Optional[Dict] = None,
+                 agents: Optional[List[BaseAgent]] = None):
+        """
+        Args:
+            executor_config: تجاوزات EXECUTOR_CONFIG (عدد العمال، نوع عمل كل وكيل)
+            agents: وكلاء السرب (default: register_default_agents)
+        """
         self.agents: Dict[str, BaseAgent] = {}
         self.message_queue: List[AgentMessage] = []
         self.replay = SwarmReplay()
+        self.executor = AgentExecutor(executor_config)
+        self.router = MessageRouter()
         self.running = False
         self.stats = {
             "messages_processed": 0,
             "sessions_completed": 0,
-            "alerts_triggered": 0
+            "alerts_triggered": 0,
+            "handler_errors": 0
         }
         
+        # حالة الوضع غير المتزامن (تُنشأ داخل حلقة asyncio للمهمة)
+        self._outstanding = 0  # رسائل في الصناديق + رسائل قيد المعالجة
+        self._wakeups: Dict[str, asyncio.Event] = {}
+        self._quiescent: Optional[asyncio.Event] = None
+        self._mission_done: Optional[asyncio.Event] = None
+        self._waiters: Dict[str, asyncio.Future] = {}  # message.id -> رد الوكيل
+        
         # تسجيل الوكلاء المتاحين
-        self.register_default_agents()
+        if agents is None:
+            self.register_default_agents()
+        else:
+            for agent in agents:
+                self.register_agent(agent)
     
     def register_default_agents(self):
         """تسجيل الوكلاء الافتراضيين"""
-        self.register_agent(ReconnaissanceAgent())
-        self.register_agent(AnalysisAgent())
-        self.register_agent(PlannerAgent())
-        self.register_agent(ReporterAgent())
+        if SWARM_AGENTS_AVAILABLE:
+            self.register_agent(ReconnaissanceAgent())
+            self.register_agent(AnalysisAgent())
+            self.register_agent(PlannerAgent())
+            self.register_agent(ReporterAgent())
         self.register_agent(OSINTScraperAgent())  # 🕷️ الوكيل الجديد
         print(f"✅ تم تسجيل {len(self.agents)} وكلاء في السرب")
     
     def register_agent(self, agent: BaseAgent):
         """تسجيل وكيل جديد في السرب"""
         self.agents[agent.name] = agent
+        self.router.register(agent)
         print(f"  └─ 🤖 {agent.name} ({agent.role})")
     
     def broadcast(self, message: AgentMessage, exclude: Optional[str] = None):
-        """إرسال رسالة لجميع الوكلاء"""
-        for name, agent in self.agents.items():
-            if name != exclude:
-                agent.inbox.append(message)
-                self.replay.log_event("message_sent", {
-                    "from": message.sender,
-                    "to": name,
-                    "type": message.message_type,
-                    "content": message.content
-                })
+        """
+        إرسال رسالة لكل الوكلاء المهتمين بها
+        
+        الوكلاء يُحددون من فهارس MessageRouter: المشتركون في نوع الرسالة
+        لـ "broadcast"، أو أصحاب القدرة/الموضوع لـ "capability:" و "topic:".
+        كل المستلمين يتلقون نفس الكائن بعد تجميده (freeze)، ومعالج كل
+        وكيل يأخذ نسخة قابلة للتعديل منه عند التنفيذ (AgentMessage.thaw).
+        """
+        recipients = self.router.recipients(message, exclude=exclude)
+        if not recipients:
+            return
+        
+        # نسخة واحدة مجمدة يتشاركها كل المستلمين، وحدث Replay واحد
+        message.freeze()
+        for agent in recipients:
+            self._deliver(agent, message)
+        self.replay.log_message(message, [agent.name for agent in recipients])
+    
+    def _deliver(self, agent: BaseAgent, message: AgentMessage):
+        """وضع رسالة في صندوق وكيل وإيقاظ مستهلكه في الوضع غير المتزامن"""
+        agent.inbox.append(message)
+        if self._quiescent is not None:
+            self._outstanding += 1
+            self._quiescent.clear()
+            self._wakeups[agent.name].set()
+    
+    def dispatch(self, message: AgentMessage, exclude: Optional[str] = None):
+        """
+        توجيه رسالة: لوكيل محدد بالاسم، أو عبر الفهارس (broadcast،
+        capability:<قدرة>، topic:<موضوع>)
+        """
+        if message.recipient in self.agents:
+            self._deliver(self.agents[message.recipient], message)
+            self.replay.log_message(message, [message.recipient])
+        else:
+            self.broadcast(message, exclude=exclude)
+    
+    def _route_response(self, agent_name: str, response: Optional[AgentMessage]):
+        """توجيه رد الوكيل وتسجيل التنبيهات"""
+        if not response:
+            return
+        
+        if response.message_type == MISSION_COMPLETE and self._mission_done is not None:
+            self._mission_done.set()
+        
+        self.dispatch(response, exclude=agent_name)
+        
+        # تسجيل التنبيهات
+        if response.message_type == "alert":
+            self.stats["alerts_triggered"] += 1
+            print(f"\n🚨 تنبيه أمني من {response.sender}:")
+            print(f"   المستوى: {response.content.get('level', 'UNKNOWN')}")
+            print(f"   الرسالة: {response.content.get('message', 'N/A')}")
+            print(f"   التوصية: {response.content.get('recommendation', 'N/A')}\n")
+    
+    def _ready_agents(self, busy) -> List[BaseAgent]:
+        """الوكلاء غير المشغولين ولديهم رسائل، مرتبين حسب أولوية رسالتهم التالية"""
+        ready = [
+            agent for name, agent in self.agents.items()
+            if name not in busy and agent.inbox
+        ]
+        ready.sort(key=lambda agent: agent.inbox.head_rank())  # ترتيب ثابت عند التعادل
+        return ready
     
     def process_messages(self):
-        """معالجة جميع الرسائل في صناديق ورود الوكلاء"""
+        """
+        معالجة جميع الرسائل في صناديق ورود الوكلاء
+        
+        كل وكيل يعالج رسالة واحدة في كل مرة على مجمع التنفيذ الخاص بنوع
+        عمله (AgentExecutor)، والوكلاء المختلفون يعملون بالتوازي. كلما
+        تحرر وكيل أخذ الرسالة الأعلى أولوية في صندوقه، والوكلاء ذوو الرسائل
+        الأعلى أولوية يُشغَّلون أولاً، فالتنبيهات الحرجة تسبق العمل المتراكم.
+        """
         processed = 0
+        in_flight = {}  # Future -> الوكيل
         
-        for agent_name, agent in self.agents.items():
-            while agent.inbox:
-                message = agent.inbox.pop(0)
-                response = agent.process_message(message)
+        while True:
+            for agent in self._ready_agents({a.name for a in in_flight.values()}):
+                message = agent.inbox.popleft()
+                in_flight[self.executor.submit(agent, message)] = agent
+            
+            if not in_flight:
+                break
+            
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                agent = in_flight.pop(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    self.stats["handler_errors"] += 1
+                    print(f"❌ [{agent.name}] خطأ في معالجة الرسالة: {e}")
+                    response = None
                 processed += 1
                 self.stats["messages_processed"] += 1
-                
-                # معالجة الردود
-                if response:
-                    if response.recipient == "broadcast":
-                        self.broadcast(response, exclude=agent_name)
-                    else:
-                        # إرسال لوكيل محدد
-                        if response.recipient in self.agents:
-                            self.agents[response.recipient].inbox.append(response)
-                    
-                    # تسجيل التنبيهات
-                    if response.message_type == "alert":
-                        self.stats["alerts_triggered"] += 1
-                        print(f"\n🚨 تنبيه أمني من {response.sender}:")
-                        print(f"   المستوى: {response.content.get('level', 'UNKNOWN')}")
-                        print(f"   الرسالة: {response.content.get('message', 'N/A')}")
-                        print(f"   التوصية: {response.content.get('recommendation', 'N/A')}\n")
+                self._route_response(agent.name, response)
         
         return processed
     
-    def start_mission(self, mission_name: str, target: str):
-        """بدء مهمة جديدة"""
+    # --- الوضع غير المتزامن (asyncio) ---
+    
+    async def _handle(self, agent: BaseAgent, message: AgentMessage) -> Optional[AgentMessage]:
+        """
+        تشغيل معالج الوكيل دون حجز حلقة الأحداث
+        
+        المعالجات غير المتزامنة (async def) تُنتظر مباشرة، والمتزامنة
+        تُشغَّل على مجمع التنفيذ حسب نوع عمل الوكيل (threads أو عمليات).
+        """
+        if inspect.iscoroutinefunction(agent.process_message):
+            return await agent.process_message(message.thaw())
+        return await asyncio.wrap_future(self.executor.submit(agent, message))
+    
+    async def _consume(self, agent: BaseAgent):
+        """
+        مستهلك صندوق وكيل واحد: ينتظر الرسائل ويعالجها بالترتيب
+        
+        كل وكيل يعالج رسالة واحدة في كل مرة (حالته الداخلية غير مشتركة)،
+        بينما الوكلاء المختلفون يعملون بالتوازي.
+        """
+        wakeup = self._wakeups[agent.name]
+        while True:
+            if not agent.inbox:
+                wakeup.clear()
+                await wakeup.wait()
+                continue
+            
+            message = agent.inbox.popleft()
+            try:
+                response = await self._handle(agent, message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["handler_errors"] += 1
+                print(f"❌ [{agent.name}] خطأ في معالجة الرسالة: {e}")
+                response = None
+            
+            self.stats["messages_processed"] += 1
+            self._route_response(agent.name, response)
+            waiter = self._waiters.pop(message.id, None)
+            if waiter is not None and not waiter.done():
+                waiter.set_result(response)
+            
+            # الرسالة لم تعد معلقة إلا بعد توجيه ردها
+            self._outstanding -= 1
+            if self._outstanding == 0:
+                self._quiescent.set()
+    
+    async def _wait_quiescent(self, timeout: Optional[float] = None) -> bool:
+        """
+        انتظار هدوء السرب (لا رسائل في الصناديق ولا معالجات قيد التشغيل)
+        أو إشارة MISSION_COMPLETE صريحة
+        
+        Returns:
+            False إذا انتهت المهلة قبل ذلك
+        """
+        quiescent = asyncio.ensure_future(self._quiescent.wait())
+        done = asyncio.ensure_future(self._mission_done.wait())
+        try:
+            finished, _ = await asyncio.wait(
+                {quiescent, done}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            quiescent.cancel()
+            done.cancel()
+        return bool(finished)
+    
+    def _start_consumers(self) -> List[asyncio.Task]:
+        self._wakeups = {name: asyncio.Event() for name in self.agents}
+        self._quiescent = asyncio.Event()
+        self._mission_done = asyncio.Event()
+        self._outstanding = sum(len(agent.inbox) for agent in self.agents.values())
+        if self._outstanding == 0:
+            self._quiescent.set()
+        for name, agent in self.agents.items():
+            if agent.inbox:
+                self._wakeups[name].set()
+        return [
+            asyncio.create_task(self._consume(agent), name=f"agent-{name}")
+            for name, agent in self.agents.items()
+        ]
+    
+    async def _stop_consumers(self, consumers: List[asyncio.Task]):
+        for task in consumers:
+            task.cancel()
+        await asyncio.gather(*consumers, return_exceptions=True)
+        self._quiescent = None
+        self._mission_done = None
+        self._wakeups = {}
+        self._waiters = {}
+    
+    def complete_mission(self):
+        """إنهاء المهمة الجارية صراحةً (الوضع غير المتزامن)"""
+        if self._mission_done is not None:
+            self._mission_done.set()
+    
+    # --- المهام ---
+    
+    def _begin_mission(self, mission_name: str, target: str):
+        """عرض بداية المهمة، بدء جلسة Replay وإرسال مهمة التخطيط"""
         print(f"\n{'='*60}")
         print(f"🚀 بدء المهمة: {mission_name}")
         print(f"🎯 الهدف: {target}")
@@ -130,7 +328,30 @@ class SwarmOrchestrator:
                     "timestamp": datetime.now().isoformat()
                 }
             )
-            planner.inbox.append(start_mission_msg)
+            self._deliver(planner, start_mission_msg)
+    
+    def _finish_mission(self, summary: str) -> str:
+        """
+        إحصائيات نهاية المهمة وحفظ الجلسة
+        
+        يُستدعى بعد التقرير: الجلسة تُغلق هنا، وأي حدث بعدها لا يُسجل.
+        """
+        self.stats["sessions_completed"] += 1
+        print(f"\n✅ اكتملت المهمة {summary}")
+        print(f"📊 رسائل تمت معالجتها: {self.stats['messages_processed']}")
+        print(f"🚨 تنبيهات: {self.stats['alerts_triggered']}")
+        self.replay.log_event("mission_completed", {
+            "summary": summary,
+            "messages_processed": self.stats["messages_processed"],
+            "alerts_triggered": self.stats["alerts_triggered"]
+        })
+        
+        # حفظ الجلسة
+        return self.replay.save_session()
+    
+    def start_mission(self, mission_name: str, target: str):
+        """بدء مهمة جديدة"""
+        self._begin_mission(mission_name, target)
         
         # معالجة الرسائل حتى تنتهي المهمة
         self.running = True
@@ -149,36 +370,85 @@ class SwarmOrchestrator:
             if iterations % 5 == 0:
                 print(f"  ⏳ المعالجة... (iteration {iterations})")
         
+        # إنشاء تقرير (قبل إغلاق الجلسة حتى تُسجل رسائله)
+        self.generate_mission_report(mission_name)
+        
         # إنهاء الجلسة
-        self.stats["sessions_completed"] += 1
-        print(f"\n✅ اكتملت المهمة في {iterations} تكرارات")
-        print(f"📊 رسائل تمت معالجتها: {self.stats['messages_processed']}")
-        print(f"🚨 تنبيهات: {self.stats['alerts_triggered']}")
+        return self._finish_mission(f"في {iterations} تكرارات")
+    
+    async def start_mission_async(self, mission_name: str, target: str,
+                                  timeout: Optional[float] = None):
+        """
+        بدء مهمة جديدة في الوضع غير المتزامن
         
-        # حفظ الجلسة
-        log_file = self.replay.save_session()
+        لكل وكيل مستهلك خاص ينتظر صندوقه، فالوكلاء المستقلون (مثل OSINT
+        و Recon) يتداخلون في نفس المهمة. تنتهي المهمة عند هدوء السرب
+        (لا رسائل معلقة ولا معالجات جارية) أو عند رسالة MISSION_COMPLETE
+        أو complete_mission()، وليس بعد عدد ثابت من التكرارات.
+        
+        Args:
+            timeout: أقصى مدة للمهمة بالثواني (None = بلا حد)، تشمل انتظار
+                الهدوء وانتظار التقرير معاً
         
-        # إنشاء تقرير
-        self.generate_mission_report(mission_name, log_file)
+        Returns:
+            مسار ملف الجلسة
+        """
+        loop = asyncio.get_running_loop()
+        consumers = self._start_consumers()
+        self.running = True
+        started = loop.time()
+        deadline = None if timeout is None else started + timeout
+        
+        def remaining() -> Optional[float]:
+            return None if deadline is None else max(0.0, deadline - loop.time())
+        
+        try:
+            self._begin_mission(mission_name, target)
+            if not await self._wait_quiescent(remaining()):
+                print(f"\n⚠️ انتهت مهلة المهمة ({timeout}s) قبل هدوء السرب")
+            
+            # إنشاء تقرير (المستهلكون ما زالوا يعملون): انتظار رسالة التقرير فقط
+            report_msg = self._queue_mission_report(mission_name)
+            if report_msg:
+                waiter = loop.create_future()
+                self._waiters[report_msg.id] = waiter
+                try:
+                    await asyncio.wait_for(waiter, remaining())
+                except asyncio.TimeoutError:
+                    print("⚠️ انتهت المهلة قبل اكتمال التقرير")
+            self.running = False
+            
+            # إنهاء الجلسة بعد التقرير
+            elapsed = loop.time() - started
+            log_file = self._finish_mission(f"في {elapsed:.2f} ثانية")
+        finally:
+            self.running = False
+            await self._stop_consumers(consumers)
         
         return log_file
     
-    def generate_mission_report(self, mission_name: str, log_file: str):
-        """إنشاء تقرير المهمة"""
+    def _queue_mission_report(self, mission_name: str) -> Optional[AgentMessage]:
+        """إرسال مهمة التقرير إلى Reporter (إن وُجد)"""
         reporter = self.agents.get("Reporter")
-        if reporter:
-            report_msg = AgentMessage(
-                sender="Orchestrator",
-                recipient="Reporter",
-                message_type="task",
-                content={
-                    "task_type": "generate_report",
-                    "report_id": f"RPT-{self.stats['sessions_completed']:03d}",
-                    "mission_name": mission_name,
-                    "timestamp": datetime.now().isoformat()
-                }
-            )
-            reporter.inbox.append(report_msg)
+        if not reporter:
+            return None
+        report_msg = AgentMessage(
+            sender="Orchestrator",
+            recipient="Reporter",
+            message_type="task",
+            content={
+                "task_type": "generate_report",
+                "report_id": f"RPT-{self.stats['sessions_completed'] + 1:03d}",
+                "mission_name": mission_name,
+                "timestamp": datetime.now().isoformat()
+            }
+        )
+        self._deliver(reporter, report_msg)
+        return report_msg
+    
+    def generate_mission_report(self, mission_name: str, log_file: Optional[str] = None):
+        """إنشاء تقرير المهمة (قبل _finish_mission حتى تُسجل رسائله في الجلسة)"""
+        if self._queue_mission_report(mission_name):
             # معالجة رسالة التقرير
             self.process_messages()
     
@@ -197,6 +467,6 @@ class SwarmOrchestrator:
             "running": self.running
         }
     
-    def export_session(self, session_id: str) -> Dict:
-        """تصدير الجلسة للمشاركة المجتمعية"""
-        return self.replay.export_for_sharing()
+    def export_session(self, session_id: str, out: Optional[TextIO] = None):
+        """تصدير الجلسة للمشاركة المجتمعية (مع out: كتابة متدفقة، انظر SwarmReplay.export_for_sharing)"""
+        return self.replay.export_for_sharing(out)
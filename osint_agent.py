@@ -58,6 +58,8 @@ class OSINTScraperAgent(BaseAgent):
     ❌ لا تخترق، فقط تجمع ما هو علني
     """
     
+    workload = "io"  # جلب صفحات الويب (Scrapling)
+    
     def __init__(self):
         super().__init__("OSINT", "Open Source Intelligence Specialist")
         self.collected_data: List[Dict] = []
@@ -76,6 +78,10 @@ class OSINTScraperAgent(BaseAgent):
             "web_reconnaissance"
         ]
     
+    def get_subscriptions(self) -> Optional[List[str]]:
+        # يعالج المهام فقط؛ النتائج والتنبيهات العامة لا تصله
+        return ["task"]
+    
     def process_message(self, message: AgentMessage) -> Optional[AgentMessage]:
         """معالجة رسائل السرب"""
         if message.message_type == "task":
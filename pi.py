@@ -18,11 +18,22 @@ WORKSPACE = str(Path.home() / ".openclaw/workspace/pibot")
 class PiSwarmTools:
     """Security tools that OpenClaw security agent can call"""
     
-    def scan_target(self, target: str):
-        """Network reconnaissance tool"""
-        import subprocess
-        result = subprocess.run(["nmap", "-sV", target], capture_output=True, text=True)
-        return result.stdout[:2000] if result.returncode == 0 else f"Error: {result.stderr}"
+    def scan_target(self, target: str) -> str:
+        """Network reconnaissance tool: compact nmap summary of every host that is up"""
+        from pi_core.nmap_stream import NmapError
+        try:
+            return "\n".join(self.iter_scan_target(target))
+        except NmapError as e:
+            return f"Error: {e}"
+    
+    def iter_scan_target(self, target: str):
+        """
+        Streaming form of scan_target.
+        Yields summary chunks (at most 2000 characters) as nmap finishes hosts;
+        raises NmapError while iterating if nmap is missing or fails.
+        """
+        from pi_core.nmap_stream import iter_summary_chunks, stream_nmap
+        return iter_summary_chunks(stream_nmap(target))
     
     def audit_repo(self, repo_url: str):
         """Clone and audit a repository"""
@@ -150,7 +161,7 @@ class OpenClawGateway:
         print(f"📡 Scanning: {target}...")
         scan_result = self.tools.scan_target(target)
         
-        prompt = f"Nmap scan results:\n{scan_result}\n\nAnalyze for security risks:"
+        prompt = f"Nmap scan results (structured summary):\n{scan_result}\n\nAnalyze for security risks:"
         return self.ask_ai(prompt, "You are a network security analyst.")
     
     def _cmd_task(self, description: str):
@@ -3,6 +3,7 @@ import os
 import subprocess
 from pathlib import Path
 from .provider import PiClawProvider
+from .nmap_stream import NmapError, iter_summary_chunks, stream_nmap
 
 class AgentRunner:
     def __init__(self, task):
@@ -66,8 +67,11 @@ class AgentRunner:
             return "No IP found"
         
         ip = ip_match.group(1)
-        result = subprocess.run(["nmap", "-sV", ip], capture_output=True, text=True)
         
-        output = result.stdout if result.returncode == 0 else result.stderr
-        prompt = f"Nmap scan:\n{output[:2000]}\n\nAnalyze security risks:"
+        try:
+            summary = "\n".join(iter_summary_chunks(stream_nmap(ip)))
+        except NmapError as e:
+            return f"Scan error: {e}"
+        
+        prompt = f"Nmap scan (structured summary):\n{summary}\n\nAnalyze security risks:"
         return self.ai.ask_ai(prompt, "Network security analyst")
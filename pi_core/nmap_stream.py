@@ -0,0 +1,202 @@
+"""
+Streaming nmap XML ingestion.
+
+Runs nmap with XML output on stdout (-oX -) and parses it incrementally,
+so every port and host becomes a structured record as soon as nmap emits
+it instead of waiting for the process to exit and truncating plain text.
+"""
+import subprocess
+import tempfile
+import xml.etree.ElementTree as ET
+
+NMAP_DEFAULT_ARGS = ("-sV",)
+READ_CHUNK = 64 * 1024
+STDERR_TAIL = 4 * 1024
+
+
+class NmapError(RuntimeError):
+    """nmap is missing, failed, or produced unparsable output."""
+
+
+def _port_record(host, elem):
+    state = elem.find("state")
+    service = elem.find("service")
+    service = service.attrib if service is not None else {}
+    return {
+        "type": "port",
+        "host": host,
+        "port": int(elem.get("portid")),
+        "protocol": elem.get("protocol"),
+        "state": state.get("state") if state is not None else "unknown",
+        "reason": state.get("reason") if state is not None else None,
+        "service": service.get("name"),
+        "product": service.get("product"),
+        "version": service.get("version"),
+        "extrainfo": service.get("extrainfo"),
+    }
+
+
+def _host_record(elem, ports):
+    addresses = {a.get("addrtype"): a.get("addr") for a in elem.findall("address")}
+    status = elem.find("status")
+    extraports = [
+        {"state": e.get("state"), "count": int(e.get("count", 0))}
+        for e in elem.findall("ports/extraports")
+    ]
+    return {
+        "type": "host",
+        "address": addresses.get("ipv4") or addresses.get("ipv6"),
+        "mac": addresses.get("mac"),
+        "hostnames": [h.get("name") for h in elem.findall("hostnames/hostname")],
+        "status": status.get("state") if status is not None else "unknown",
+        "ports": ports,
+        "extraports": extraports,
+    }
+
+
+def iter_nmap_xml(stream):
+    """
+    Parse nmap XML from a binary stream incrementally.
+
+    Uses XMLPullParser (the non-blocking form of iterparse) fed with
+    whatever bytes are available, so records are produced while nmap is
+    still running. Parsed host elements are cleared to keep memory flat.
+
+    Yields:
+        {"type": "port", ...} for each port of the current host,
+        {"type": "host", ...} when a host block closes,
+        {"type": "finished", ...} from <runstats>.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+    host = None
+    ports = []
+    read = getattr(stream, "read1", stream.read)
+
+    while True:
+        chunk = read(READ_CHUNK)
+        if chunk:
+            parser.feed(chunk)
+        else:
+            parser.close()
+        for event, elem in parser.read_events():
+            if event == "start":
+                if root is None:
+                    root = elem
+                elif elem.tag == "host":
+                    host, ports = None, []
+                continue
+            if elem.tag == "address" and host is None and elem.get("addrtype") in ("ipv4", "ipv6"):
+                host = elem.get("addr")
+            elif elem.tag == "port":
+                record = _port_record(host, elem)
+                ports.append(record)
+                yield record
+            elif elem.tag == "host":
+                yield _host_record(elem, ports)
+                root.clear()
+            elif elem.tag == "runstats":
+                finished = elem.find("finished")
+                hosts = elem.find("hosts")
+                yield {
+                    "type": "finished",
+                    "elapsed": float(finished.get("elapsed", 0)) if finished is not None else None,
+                    "summary": finished.get("summary") if finished is not None else None,
+                    "hosts_up": int(hosts.get("up", 0)) if hosts is not None else 0,
+                    "hosts_down": int(hosts.get("down", 0)) if hosts is not None else 0,
+                }
+        if not chunk:
+            return
+
+
+def stream_nmap(target, args=NMAP_DEFAULT_ARGS, nmap_path="nmap"):
+    """
+    Run nmap against a target and yield records as they are parsed.
+
+    Raises:
+        NmapError: nmap is not installed, exits non-zero, or emits bad XML.
+    """
+    cmd = [nmap_path, *args, "-oX", "-", target]
+    # stderr goes to an unlinked temp file rather than a pipe: nmap can write
+    # more than a pipe buffer of warnings while we are still reading stdout.
+    errors = tempfile.TemporaryFile()
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=errors)
+    except FileNotFoundError:
+        errors.close()
+        raise NmapError(f"{nmap_path} not found")
+
+    try:
+        try:
+            yield from iter_nmap_xml(proc.stdout)
+        except ET.ParseError as e:
+            proc.kill()
+            raise NmapError(f"Invalid nmap XML: {e}")
+        if proc.wait() != 0:
+            errors.seek(0, 2)
+            errors.seek(max(0, errors.tell() - STDERR_TAIL))
+            stderr = errors.read().decode(errors="ignore")
+            raise NmapError(stderr.strip() or f"nmap exited with {proc.returncode}")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        errors.close()
+
+
+def format_host(host):
+    """Compact one-host summary: open ports with service/version, other states counted."""
+    names = f" ({', '.join(host['hostnames'])})" if host["hostnames"] else ""
+    lines = [f"Host {host['address']}{names} {host['status']}"]
+    other = {}
+    for port in host["ports"]:
+        if port["state"] == "open":
+            version = " ".join(filter(None, [port["product"], port["version"], port["extrainfo"]]))
+            lines.append(f"  {port['port']}/{port['protocol']} open {port['service'] or 'unknown'}"
+                         + (f" {version}" if version else ""))
+        else:
+            other[port["state"]] = other.get(port["state"], 0) + 1
+    for extra in host["extraports"]:
+        other[extra["state"]] = other.get(extra["state"], 0) + extra["count"]
+    if other:
+        lines.append("  not shown: " + ", ".join(f"{n} {state}" for state, n in sorted(other.items())))
+    return "\n".join(lines)
+
+
+def iter_summary_chunks(records, max_chars=2000):
+    """
+    Group streamed host records into compact text chunks of at most
+    max_chars (a single host larger than that becomes its own chunk).
+    Each chunk is yielded as soon as it is full, so analysis can start
+    while nmap is still scanning. The final chunk ends with the totals line,
+    which counts towards max_chars like any host block.
+    """
+    chunk = []
+    size = 0
+    hosts_up = 0
+    open_ports = 0
+    finished = None
+    for record in records:
+        if record["type"] == "finished":
+            finished = record
+            continue
+        if record["type"] != "host" or record["status"] != "up":
+            continue
+        hosts_up += 1
+        open_ports += sum(1 for p in record["ports"] if p["state"] == "open")
+        text = format_host(record)
+        if chunk and size + len(text) + 1 > max_chars:
+            yield "\n".join(chunk)
+            chunk, size = [], 0
+        chunk.append(text)
+        size += len(text) + 1
+
+    totals = f"Hosts up: {hosts_up}, open ports: {open_ports}"
+    if finished and finished["summary"]:
+        totals += f" ({finished['summary']})"
+    if chunk and size + len(totals) > max_chars:
+        yield "\n".join(chunk)
+        chunk = []
+    chunk.append(totals)
+    yield "\n".join(chunk)
@@ -0,0 +1,56 @@
+"""
+📊 جدول شيوع المنافذ (Port Frequency Table)
+ترتيب المنافذ 1-65535 من الأكثر احتمالاً أن يكون مفتوحاً إلى الأقل
+
+الفكرة:
+- المنافذ الأكثر شيوعاً (حسب إحصاءات الفحص العامة) تُفحص أولاً
+- ثم الخدمات الحديثة الشائعة في الشبكات الداخلية (قواعد بيانات، حاويات، ...)
+- ثم باقي المنافذ: المعروفة (<1024)، ثم المسجلة، ثم المؤقتة (ephemeral)
+"""
+
+from typing import Iterable, List, Optional
+
+MAX_PORT = 65535
+
+# المنافذ الأكثر شيوعاً بترتيب تنازلي لاحتمال أن تكون مفتوحة
+TOP_PORTS = (
+    80, 23, 443, 21, 22, 25, 3389, 110, 445, 139,
+    143, 53, 135, 3306, 8080, 1723, 111, 995, 993, 5900,
+    1025, 587, 8888, 199, 1720, 465, 548, 113, 81, 6001,
+    10000, 514, 5060, 179, 1026, 2000, 8443, 8000, 32768, 554,
+    26, 1433, 49152, 2001, 515, 8008, 49154, 1027, 5666, 646,
+    5000, 5631, 631, 49153, 8081, 2049, 88, 79, 5800, 106,
+    2121, 1110, 49155, 6000, 513, 990, 5357, 427, 49156, 543,
+    544, 5101, 144, 7, 389, 8009, 3128, 444, 9999, 5009,
+    7070, 5190, 3000, 5432, 1900, 3986, 13, 1029, 9, 5051,
+    6646, 49157, 1028, 873, 1755, 2717, 4899, 9100, 119, 37,
+)
+
+# خدمات حديثة شائعة في الشبكات الداخلية
+SERVICE_PORTS = (
+    18789, 18792,  # OpenClaw
+    6379, 27017, 9200, 5601, 11211, 2375, 2376, 6443,
+    10250, 1883, 8883, 5672, 15672, 9090, 9000, 3001,
+    5984, 8086, 1521, 50000, 7001, 8161, 61616, 9092,
+    2181, 5985, 5986, 636, 3268, 88, 161, 623,
+)
+
+def frequency_ordered_ports(exclude: Optional[Iterable[int]] = None) -> List[int]:
+    """
+    كل المنافذ 1-65535 مرتبة حسب احتمال أن تكون مفتوحة
+
+    Args:
+        exclude: منافذ تُحذف من الترتيب (مثل forbidden_ports)
+
+    Returns:
+        قائمة بكل منفذ مرة واحدة فقط
+    """
+    seen = set(exclude or ())
+    ordered = []
+    for port in (*TOP_PORTS, *SERVICE_PORTS):
+        if port not in seen:
+            seen.add(port)
+            ordered.append(port)
+    # الباقي: المعروفة ثم المسجلة ثم المؤقتة (تصاعدياً داخل كل فئة)
+    ordered.extend(port for port in range(1, MAX_PORT + 1) if port not in seen)
+    return ordered
@@ -0,0 +1,271 @@
+"""
+🧮 تمثيل مضغوط لحالة المنافذ (Port State Bitmap)
+حالة كل منفذ في بتّين بدلاً من قوائم Python لكل جهاز
+
+الفكرة:
+- طبقتان من البتات (bytearray) لكل جهاز: بت لكل منفذ في كل طبقة
+- الحالة = (بت الطبقة الأولى، بت الطبقة الثانية):
+    00 لم يُفحص، 10 open، 01 closed، 11 filtered
+- 65535 منفذاً = 16KB كحد أقصى لكل جهاز (بدلاً من ~2MB كقوائم أعداد)
+- عمليات المجموعات (اتحاد، تقاطع، فرق) تتم على الطبقات كأعداد صحيحة
+- القوائم بالشكل القديم (open_ports, closed_ports, ...) تُبنى فقط عند الطلب
+"""
+
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+MAX_PORT = 65535
+PORT_STATES = ("open", "closed", "filtered")
+
+# مواقع البتات المفعلة في كل قيمة بايت (لتحويل الطبقات إلى قوائم بسرعة)
+_BYTE_BITS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)
+)
+
+def _bits_to_ports(bits: int) -> List[int]:
+    """أرقام البتات المفعلة في عدد صحيح، مرتبة تصاعدياً"""
+    ports = []
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    for index, value in enumerate(data):
+        if value:
+            base = index << 3
+            ports.extend(base + bit for bit in _BYTE_BITS[value])
+    return ports
+
+class PortSet:
+    """
+    مجموعة منافذ ممثلة كعدد صحيح (بت لكل منفذ)
+
+    تدعم | & - ^ والمقارنة و len و in والتكرار التصاعدي.
+    """
+
+    __slots__ = ("bits",)
+
+    def __init__(self, bits: int = 0):
+        self.bits = bits
+
+    @classmethod
+    def from_ports(cls, ports: Iterable[int]) -> "PortSet":
+        data = bytearray((MAX_PORT >> 3) + 1)
+        for port in ports:
+            data[port >> 3] |= 1 << (port & 7)
+        return cls(int.from_bytes(data, "little"))
+
+    def __or__(self, other: "PortSet") -> "PortSet":
+        return PortSet(self.bits | other.bits)
+
+    def __and__(self, other: "PortSet") -> "PortSet":
+        return PortSet(self.bits & other.bits)
+
+    def __sub__(self, other: "PortSet") -> "PortSet":
+        return PortSet(self.bits & ~other.bits)
+
+    def __xor__(self, other: "PortSet") -> "PortSet":
+        return PortSet(self.bits ^ other.bits)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, PortSet) and self.bits == other.bits
+
+    def __hash__(self) -> int:
+        return hash(self.bits)
+
+    def __len__(self) -> int:
+        return self.bits.bit_count()
+
+    def __bool__(self) -> bool:
+        return self.bits != 0
+
+    def __contains__(self, port: int) -> bool:
+        return port >= 0 and bool(self.bits >> port & 1)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(_bits_to_ports(self.bits))
+
+    def to_list(self) -> List[int]:
+        return _bits_to_ports(self.bits)
+
+    def __repr__(self) -> str:
+        ports = self.to_list()
+        shown = ", ".join(map(str, ports[:10])) + (", ..." if len(ports) > 10 else "")
+        return f"PortSet({len(ports)}: [{shown}])"
+
+class PortStateMap:
+    """
+    حالة منافذ جهاز واحد في طبقتين من البتات
+
+    الطبقتان تكبران حسب أعلى منفذ مسجل فقط، لذا فحص المنافذ الشائعة
+    يبقى صغيراً وفحص النطاق الكامل لا يتجاوز 16KB.
+    """
+
+    __slots__ = ("_low", "_high")
+
+    _CODES = {"open": (1, 0), "closed": (0, 1), "filtered": (1, 1)}
+
+    def __init__(self):
+        self._low = bytearray()
+        self._high = bytearray()
+
+    @classmethod
+    def from_result(cls, port_result: Mapping) -> "PortStateMap":
+        """بناء الخريطة من نتيجة بالشكل القديم (قوائم open/closed/filtered)"""
+        states = cls()
+        for state in PORT_STATES:
+            for port in port_result.get(f"{state}_ports", []):
+                states.set(port, state)
+        return states
+
+    def _grow(self, size: int):
+        missing = size - len(self._low)
+        if missing > 0:
+            self._low.extend(bytes(missing))
+            self._high.extend(bytes(missing))
+
+    def set(self, port: int, state: str):
+        """تسجيل حالة منفذ (open/closed/filtered)"""
+        if not 0 <= port <= MAX_PORT:
+            raise ValueError(f"Port out of range: {port}")
+        low, high = self._CODES[state]
+        index, mask = port >> 3, 1 << (port & 7)
+        self._grow(index + 1)
+        if low:
+            self._low[index] |= mask
+        else:
+            self._low[index] &= ~mask
+        if high:
+            self._high[index] |= mask
+        else:
+            self._high[index] &= ~mask
+
+    def get(self, port: int) -> Optional[str]:
+        """حالة منفذ أو None إذا لم يُفحص"""
+        index, shift = port >> 3, port & 7
+        if index >= len(self._low):
+            return None
+        code = (self._low[index] >> shift & 1) | (self._high[index] >> shift & 1) << 1
+        return (None, "open", "closed", "filtered")[code]
+
+    def _planes(self) -> Tuple[int, int]:
+        return int.from_bytes(self._low, "little"), int.from_bytes(self._high, "little")
+
+    def ports(self, state: str) -> PortSet:
+        """مجموعة المنافذ في حالة معينة"""
+        low, high = self._planes()
+        if state == "open":
+            return PortSet(low & ~high)
+        if state == "closed":
+            return PortSet(high & ~low)
+        if state == "filtered":
+            return PortSet(low & high)
+        raise ValueError(f"Unknown port state: {state}")
+
+    def scanned(self) -> PortSet:
+        """كل المنافذ التي سُجلت لها حالة"""
+        low, high = self._planes()
+        return PortSet(low | high)
+
+    def count(self, state: str) -> int:
+        return len(self.ports(state))
+
+    def __len__(self) -> int:
+        return len(self.scanned())
+
+    def __contains__(self, port: int) -> bool:
+        return self.get(port) is not None
+
+    def items(self) -> Iterator[Tuple[int, str]]:
+        """(port, state) لكل منفذ مفحوص، مجمعة حسب الحالة"""
+        for state in PORT_STATES:
+            for port in self.ports(state):
+                yield port, state
+
+    def merge(self, newer: "PortStateMap") -> "PortStateMap":
+        """
+        اتحاد فحصين: حالات newer تتقدم على المنافذ التي فحصها،
+        والباقي يُؤخذ من هذه الخريطة
+        """
+        low, high = self._planes()
+        new_low, new_high = newer._planes()
+        covered = new_low | new_high
+        merged = PortStateMap()
+        size = max(len(self._low), len(newer._low))
+        merged._low = bytearray(((low & ~covered) | new_low).to_bytes(size, "little"))
+        merged._high = bytearray(((high & ~covered) | new_high).to_bytes(size, "little"))
+        return merged
+
+    def diff(self, previous: "PortStateMap") -> Dict[str, PortSet]:
+        """
+        الفرق عن فحص سابق (للمنافذ التي فحصتها هذه الخريطة فقط)
+
+        Returns:
+            {"opened": PortSet, "closed": PortSet, "changed": PortSet}
+        """
+        scanned = self.scanned()
+        current_open = self.ports("open")
+        previous_open = previous.ports("open") & scanned
+        cur_low, cur_high = self._planes()
+        prev_low, prev_high = previous._planes()
+        prev_scanned = PortSet(prev_low | prev_high)
+        changed = PortSet((cur_low ^ prev_low) | (cur_high ^ prev_high)) & scanned & prev_scanned
+        return {
+            "opened": current_open - previous_open,
+            "closed": previous_open - current_open,
+            "changed": changed
+        }
+
+    @property
+    def nbytes(self) -> int:
+        """حجم الطبقتين بالبايت"""
+        return len(self._low) + len(self._high)
+
+    def __repr__(self) -> str:
+        counts = ", ".join(f"{state}={self.count(state)}" for state in PORT_STATES)
+        return f"PortStateMap({counts}, {self.nbytes}B)"
+
+class PortScanResult(Mapping):
+    """
+    نتيجة محرك فحص المنافذ فوق PortStateMap (داخل tools.py و scan_state.py)
+
+    تتصرف كقاموس بالمفاتيح القديمة (target, scan_time, open_ports,
+    closed_ports, filtered_ports, total_scanned)، لكن قوائم المنافذ
+    تُبنى من البتات عند قراءتها فقط. الدوال العامة (scan_ports، full_port_scan، ...)
+    تُرجع to_dict() فيبقى ما يصل للمستدعي قابلاً لـ json.dump.
+    مفاتيح إضافية (مثل coverage) تُمرَّر كـ extra وتُضاف بعد المفاتيح القديمة.
+    """
+
+    _LAZY_KEYS = {"open_ports": "open", "closed_ports": "closed", "filtered_ports": "filtered"}
+    _KEYS = ("target", "scan_time", "open_ports", "closed_ports", "filtered_ports", "total_scanned")
+
+    def __init__(self, target: str, states: PortStateMap,
+                 scan_time: Optional[str] = None, total_scanned: Optional[int] = None,
+                 **extra):
+        self.states = states
+        self._fields = {
+            "target": target,
+            "scan_time": scan_time or datetime.now().isoformat(),
+            "total_scanned": len(states) if total_scanned is None else total_scanned,
+            **extra
+        }
+        self._keys = self._KEYS + tuple(extra)
+
+    def __getitem__(self, key: str):
+        if key in self._LAZY_KEYS:
+            return self.states.ports(self._LAZY_KEYS[key]).to_list()
+        return self._fields[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def count(self, state: str) -> int:
+        """عدد المنافذ في حالة معينة بدون بناء القائمة"""
+        return self.states.count(state)
+
+    def to_dict(self) -> Dict:
+        """الشكل القديم القابل للتحويل إلى JSON"""
+        return {key: self[key] for key in self._keys}
+
+    def __repr__(self) -> str:
+        return f"PortScanResult({self._fields['target']}, {self.states!r})"
@@ -0,0 +1,225 @@
+"""
+🚦 محدد معدل مشترك بين العمليات (Shared Subnet Rate Limiter)
+token bucket لكل شبكة فرعية، مشترك بين كل الـ threads والعمليات على نفس الجهاز
+
+الفكرة:
+- كل فحص يحجز موعد إطلاقه من bucket الشبكة الفرعية للهدف (/24 افتراضياً)
+- الحالة رقم واحد لكل bucket (GCRA: الموعد النظري التالي TAT)، مخزن
+  في ملف صغير محمي بـ flock، فكل نقاط الدخول (main.py, pi.py,
+  pi_telegram.py, الـ orchestrator، عمليات الفحص الموزع) تتقاسم نفس الحد
+- burst يسمح بعدد من الفحوصات المتتالية قبل تطبيق الإيقاع
+
+Safety:
+    ✅ الحد يُطبَّق على مجموع كل الفحوصات المتزامنة، لا على كل فحص منفرداً
+"""
+
+import asyncio
+import ipaddress
+import math
+import os
+import stat
+import struct
+import threading
+import time
+from typing import Dict, Optional
+
+# محاولة استيراد fcntl (غير متوفر على Windows)
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    print("⚠️ fcntl غير متوفر. محدد المعدل سيعمل داخل العملية الحالية فقط.")
+    FCNTL_AVAILABLE = False
+
+# أقصى حجز مستقبلي مقبول: قيمة أكبر تعني ملف حالة قديم أو تالف أو تغيّر ساعة النظام
+MAX_BACKLOG_SECONDS = 300.0
+
+def default_rate_limit_dir() -> str:
+    """
+    مجلد الحالة الخاص بالمستخدم الحالي
+
+    $XDG_RUNTIME_DIR/pibot_rate_limits إن وُجد (tmpfs خاص بالمستخدم)،
+    وإلا ~/.cache/pibot/rate_limits. لا يُستخدم مجلد مؤقت مشترك حتى لا
+    يستطيع مستخدم آخر زرع الملفات أو روابط رمزية مكانها.
+    """
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime and os.path.isabs(runtime):
+        return os.path.join(runtime, "pibot_rate_limits")
+    return os.path.join(os.path.expanduser("~"), ".cache", "pibot", "rate_limits")
+
+def _ensure_private_dir(directory: str):
+    """إنشاء المجلد بصلاحيات 0700 والتحقق أنه مجلد حقيقي يملكه المستخدم الحالي"""
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f"{directory} is not a directory")
+    if info.st_uid != os.getuid():
+        raise PermissionError(f"{directory} is owned by uid {info.st_uid}, not {os.getuid()}")
+    if stat.S_IMODE(info.st_mode) & 0o077:
+        os.chmod(directory, 0o700)
+
+def _sane_tat(value: float, now: float) -> float:
+    """TAT مقروء من القرص: قيمة غير منتهية أو بعيدة في المستقبل تُعاد للصفر"""
+    if not math.isfinite(value) or value > now + MAX_BACKLOG_SECONDS:
+        return 0.0
+    return value
+
+_TAT = struct.Struct("<d")
+
+class _LocalTatStore:
+    """حالة الـ buckets داخل العملية فقط (عند عدم توفر fcntl أو shared=False)"""
+
+    def __init__(self):
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def update(self, key: str, reserve):
+        with self._lock:
+            value, result = reserve(self._values.get(key, 0.0))
+            self._values[key] = value
+            return result
+
+class _FileTatStore:
+    """
+    حالة الـ buckets في ملفات (8 بايت لكل bucket) محمية بـ flock
+
+    قفل flock مرتبط بالملف المفتوح، لذا يُضاف قفل thread لكل مفتاح،
+    وتُعاد فتح الملفات بعد fork حتى لا يتشارك الأب والابن نفس القفل.
+
+    المجلد خاص (0700) والملفات 0600 تُفتح بـ O_NOFOLLOW، ويُرفض أي ملف
+    ليس ملفاً عادياً يملكه المستخدم الحالي.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        _ensure_private_dir(directory)
+        self._files: Dict[str, int] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+        self._pid = os.getpid()
+
+    def _handle(self, key: str):
+        with self._guard:
+            if self._pid != os.getpid():
+                # بعد fork: واصفات الأب مشتركة معه، فتُفتح من جديد
+                self._files.clear()
+                self._locks.clear()
+                self._pid = os.getpid()
+            if key not in self._files:
+                self._files[key] = self._open(os.path.join(self.directory, f"{key}.tat"))
+                self._locks[key] = threading.Lock()
+            return self._files[key], self._locks[key]
+
+    @staticmethod
+    def _open(path: str) -> int:
+        flags = os.O_RDWR | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0) | getattr(os, "O_CLOEXEC", 0)
+        fd = os.open(path, flags, 0o600)
+        info = os.fstat(fd)
+        if not stat.S_ISREG(info.st_mode) or info.st_uid != os.getuid():
+            os.close(fd)
+            raise PermissionError(f"{path} is not a regular file owned by the current user")
+        return fd
+
+    def update(self, key: str, reserve):
+        fd, lock = self._handle(key)
+        with lock:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                data = os.pread(fd, _TAT.size, 0)
+                current = _TAT.unpack(data)[0] if len(data) == _TAT.size else 0.0
+                current = _sane_tat(current, time.time())
+                value, result = reserve(current)
+                if value != current:
+                    os.pwrite(fd, _TAT.pack(value), 0)
+                return result
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+_stores: Dict[Optional[str], object] = {}
+_stores_lock = threading.Lock()
+
+def _get_store(shared: bool, directory: Optional[str]):
+    key = (directory or default_rate_limit_dir()) if shared and FCNTL_AVAILABLE else None
+    with _stores_lock:
+        if key not in _stores:
+            if key is None:
+                _stores[key] = _LocalTatStore()
+            else:
+                try:
+                    _stores[key] = _FileTatStore(key)
+                except OSError as e:
+                    print(f"⚠️ مجلد حالة محدد المعدل غير آمن ({e}). سيعمل داخل العملية الحالية فقط.")
+                    _stores[key] = _LocalTatStore()
+        return _stores[key]
+
+class SubnetRateLimiter:
+    """
+    token bucket لكل شبكة فرعية (GCRA)
+
+    Args:
+        interval_ms: الفاصل بين الفحوصات لنفس الشبكة الفرعية (1000/interval = فحص/ثانية)
+        burst: عدد الفحوصات المسموح بها دفعة واحدة قبل تطبيق الإيقاع
+        prefix: طول بادئة الشبكة الفرعية للمفتاح (IPv4؛ IPv6 يستخدم /64)
+        bucket: اسم مجموعة الحدود (default: "scan")
+        shared: مشاركة الحالة بين العمليات عبر الملفات
+        storage_dir: مجلد ملفات الحالة (default: default_rate_limit_dir())
+    """
+
+    def __init__(self, interval_ms: float, burst: int = 1, prefix: int = 24,
+                 bucket: str = "scan", shared: bool = True, storage_dir: Optional[str] = None):
+        self.interval = max(0.0, interval_ms) / 1000.0
+        self.burst = max(1, int(burst))
+        self.prefix = prefix
+        self.bucket = bucket
+        self._store = _get_store(shared, storage_dir)
+
+    def key_for(self, ip: str) -> str:
+        """مفتاح الـ bucket: اسم المجموعة + الشبكة الفرعية للهدف"""
+        address = ipaddress.ip_address(ip)
+        prefix = self.prefix if address.version == 4 else 64
+        network = ipaddress.ip_network(f"{address}/{prefix}", strict=False)
+        return f"{self.bucket}_{network.network_address}_{prefix}".replace(":", "-")
+
+    def reserve(self, ip: str, deadline: Optional[float] = None) -> Optional[float]:
+        """
+        حجز موعد الفحص التالي
+
+        Args:
+            deadline: وقت time.monotonic() لا يُحجز بعده (اختياري)
+
+        Returns:
+            ثوانٍ الانتظار قبل الإطلاق، أو None إذا كان الموعد بعد deadline
+        """
+        if self.interval <= 0:
+            return 0.0 if deadline is None or time.monotonic() < deadline else None
+
+        remaining = None if deadline is None else deadline - time.monotonic()
+        tolerance = (self.burst - 1) * self.interval
+
+        def reserve(tat: float):
+            now = time.time()  # بعد أخذ القفل
+            tat = max(_sane_tat(tat, now), now)
+            wait = max(0.0, tat - tolerance - now)
+            if remaining is not None and wait >= remaining:
+                return tat, None
+            return tat + self.interval, wait
+
+        return self._store.update(self.key_for(ip), reserve)
+
+    async def acquire(self, ip: str, deadline: Optional[float] = None) -> bool:
+        """حجز موعد والانتظار حتى يحين (asyncio)؛ False إذا تجاوز deadline"""
+        wait = self.reserve(ip, deadline)
+        if wait is None:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+    def acquire_sync(self, ip: str, deadline: Optional[float] = None) -> bool:
+        """نسخة متزامنة من acquire"""
+        wait = self.reserve(ip, deadline)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
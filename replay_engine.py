@@ -0,0 +1,367 @@
+"""
+⏪ إعادة تشغيل المهام دون شبكة (Offline Mission Replay)
+إعادة تشغيل التحليل والتخطيط والتقارير على جلسة مسجلة في أجزاء من الثانية
+
+الفكرة:
+- الوكلاء الذين يلمسون الشبكة (Recon و OSINT افتراضياً) يُستبدلون بـ
+  RecordedAgent يرد بنفس الرسائل التي أرسلها الوكيل الحقيقي في الجلسة
+- كل رد مسجل يُربط بالرسالة التي سبقته إلى نفس الوكيل (ببصمة المحتوى)،
+  فالرد الصحيح يُعاد حتى لو تغير ترتيب المعالجة
+- باقي وكلاء المنسق تعمل فعلياً على هذه النتائج، وتُقارن مخرجاتها
+- وكيل أرسل رسائل في الجلسة وغير مسجل في المنسق (مثلاً Planner و Analysis
+  و Reporter حين لا يوفرها agents.py) يُستبدل أيضاً بـ RecordedAgent،
+  ولا تدخل مخرجاته في المقارنة
+- السرعة: فوراً (default) أو بتسريع زمن الرد المسجل (speed=10 → أسرع 10 مرات)
+- المقارنة مع الجلسة الأصلية تكشف أي تغير في مخرجات وكلاء التحليل
+
+الاستخدام:
+    python replay_engine.py db1d5dbd                 # آخر تشغيل من swarm_logs/ بجانب الوحدة
+    python replay_engine.py swarm_logs/session_x.jsonl.gz --async
+    python replay_engine.py db1d5dbd --speed 20      # مع زمن رد مسجل مسرّع
+    python replay_engine.py db1d5dbd --repeat 50     # قياس الأداء
+    python replay_engine.py db1d5dbd --json out.json
+
+Safety:
+    ✅ لا اتصال بالشبكة: نتائج الفحص و OSINT كلها من السجل
+"""
+
+import sys
+import os
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, MODULE_DIR)
+
+import asyncio
+import contextlib
+import io
+import json
+import tempfile
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+try:
+    from .core import AgentMessage, BaseAgent, SwarmReplay, content_digest, iter_session_file, normalize_events
+except ImportError:
+    from core import AgentMessage, BaseAgent, SwarmReplay, content_digest, iter_session_file, normalize_events
+
+REPLAY_ENGINE_CONFIG = {
+    "stubbed_agents": ["Recon", "OSINT"],  # وكلاء الشبكة: ردودهم تُؤخذ من السجل
+    "speed": None,                          # None = فوراً، أو معامل تسريع زمن الرد
+    "quiet": True,                          # إخفاء مخرجات الوكلاء أثناء الإعادة
+}
+
+def resolve_path(path: str) -> str:
+    """مسار نسبي يُبحث عنه في المجلد الحالي ثم بجانب الوحدة (لتشغيل الأداة من أي مجلد)"""
+    if os.path.isabs(path) or os.path.exists(path):
+        return path
+    return os.path.join(MODULE_DIR, path)
+
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+class RecordedAgent(BaseAgent):
+    """
+    بديل لوكيل شبكة يعيد ردوده المسجلة
+
+    الرد يُختار حسب بصمة الرسالة الواردة (الرسالة التي سبقت الرد في
+    الجلسة)، وإن لم توجد فأقدم رد لم يُستخدم بلا سبب معروف.
+    """
+
+    workload = "inline"  # لا عمل فعلي (إلا الانتظار المسرّع عند speed)
+
+    def __init__(self, name: str, role: str, capabilities: List[str],
+                 subscriptions: Optional[List[str]], responses: Dict[Optional[str], deque],
+                 speed: Optional[float] = None):
+        super().__init__(name, role)
+        self._capabilities = capabilities
+        self._subscriptions = subscriptions
+        self._responses = responses
+        self.speed = speed
+        self.served = 0
+        self.unanswered = 0
+
+    def get_capabilities(self) -> List[str]:
+        return self._capabilities
+
+    def get_subscriptions(self) -> Optional[List[str]]:
+        return self._subscriptions
+
+    def process_message(self, message: AgentMessage) -> Optional[AgentMessage]:
+        queue = self._responses.get(content_digest(message.content))
+        if not queue:
+            queue = self._responses.get(None)
+        if not queue:
+            self.unanswered += 1
+            return None
+
+        record = queue.popleft()
+        if self.speed and record["latency"]:
+            time.sleep(record["latency"] / self.speed)
+        self.served += 1
+        return AgentMessage(
+            sender=self.name,
+            recipient=record["recipient"],
+            message_type=record["type"],
+            content=record["content"],
+            priority=record.get("priority", "normal")
+        )
+
+    @property
+    def remaining(self) -> int:
+        return sum(len(queue) for queue in self._responses.values())
+
+def recorded_responses(events: List[Dict], agent_name: str) -> Dict[Optional[str], deque]:
+    """
+    ردود وكيل في الجلسة مفهرسة ببصمة الرسالة التي سبقتها إليه
+
+    Returns:
+        {بصمة الرسالة الواردة أو None: deque من الردود بالترتيب}
+    """
+    responses: Dict[Optional[str], deque] = {}
+    last_input = None  # (بصمة، وقت) آخر رسالة وصلت للوكيل
+    for event in events:
+        if event["event_type"] != "message_sent":
+            continue
+        data = event["data"]
+        if data["from"] == agent_name:
+            trigger, sent_at = last_input if last_input else (None, None)
+            received = _parse_time(event.get("timestamp"))
+            latency = received - sent_at if received is not None and sent_at is not None else 0.0
+            responses.setdefault(trigger, deque()).append({
+                "recipient": data["recipient"],
+                "type": data["type"],
+                "content": data["content"],
+                "priority": data.get("priority", "normal"),
+                "latency": max(0.0, latency)
+            })
+            last_input = None
+        elif agent_name in data["to"]:
+            last_input = (content_digest(data["content"]), _parse_time(event.get("timestamp")))
+    return responses
+
+def recorded_capabilities(events: Iterable[Dict], agent_name: str) -> List[str]:
+    """القدرات التي وصلت بها رسائل للوكيل في الجلسة ("capability:<قدرة>")"""
+    capabilities = []
+    for event in events:
+        data = event["data"]
+        if (event["event_type"] == "message_sent" and agent_name in data["to"]
+                and data["recipient"].startswith("capability:")):
+            capability = data["recipient"].split(":", 1)[1]
+            if capability not in capabilities:
+                capabilities.append(capability)
+    return capabilities
+
+def output_signature(events: Iterable[Dict], exclude: Iterable[str] = ()) -> Dict[str, Counter]:
+    """
+    مخرجات كل وكيل كمجموعة متعددة من (نوع الرسالة، بصمة المحتوى)
+    للمقارنة بين تشغيلين بغض النظر عن الترتيب والمعرفات والأوقات
+    """
+    excluded = set(exclude)
+    signature: Dict[str, Counter] = {}
+    for event in events:
+        if event["event_type"] != "message_sent":
+            continue
+        data = event["data"]
+        if data["from"] in excluded:
+            continue
+        signature.setdefault(data["from"], Counter())[(data["type"], content_digest(data["content"]))] += 1
+    return signature
+
+def diff_outputs(recorded: Dict[str, Counter], replayed: Dict[str, Counter]) -> Dict[str, Dict]:
+    """
+    الفرق بين مخرجات الوكلاء في الجلسة الأصلية وفي الإعادة
+
+    Returns:
+        {اسم الوكيل: {"missing": [...], "added": [...]}} للوكلاء المختلفين فقط
+    """
+    changes = {}
+    for agent in sorted(set(recorded) | set(replayed)):
+        before, after = recorded.get(agent, Counter()), replayed.get(agent, Counter())
+        missing, added = before - after, after - before
+        if missing or added:
+            changes[agent] = {
+                "missing": [{"type": t, "digest": d, "count": n} for (t, d), n in missing.items()],
+                "added": [{"type": t, "digest": d, "count": n} for (t, d), n in added.items()],
+            }
+    return changes
+
+class ReplayEngine:
+    """
+    إعادة تشغيل مهمة مسجلة على السرب مع وكلاء الشبكة من السجل
+
+    Args:
+        events: أحداث الجلسة (من SwarmReplay.iter_session أو iter_session_file)
+        stubbed_agents: الوكلاء الذين تُؤخذ ردودهم من السجل
+        speed: None = فوراً، أو معامل تسريع زمن الرد المسجل
+        orchestrator_factory: دالة تنشئ المنسق (default: SwarmOrchestrator بوكلائه
+            الافتراضيين؛ مثلاً lambda: SwarmOrchestrator(agents=[...]) لوكلاء آخرين)
+    """
+
+    def __init__(self, events: Iterable[Dict], stubbed_agents: Optional[List[str]] = None,
+                 speed: Optional[float] = None, orchestrator_factory=None,
+                 quiet: Optional[bool] = None):
+        self.events = list(normalize_events(events))
+        self.stubbed_agents = list(stubbed_agents or REPLAY_ENGINE_CONFIG["stubbed_agents"])
+        self.speed = speed if speed is not None else REPLAY_ENGINE_CONFIG["speed"]
+        self.orchestrator_factory = orchestrator_factory
+        self.quiet = REPLAY_ENGINE_CONFIG["quiet"] if quiet is None else quiet
+
+        mission = next((e["data"] for e in self.events if e["event_type"] == "mission_started"), None)
+        if mission is None:
+            raise ValueError("Session has no mission_started event")
+        self.senders = list(dict.fromkeys(
+            e["data"]["from"] for e in self.events
+            if e["event_type"] == "message_sent" and e["data"]["from"] != "Orchestrator"
+        ))
+        self.mission_name = mission.get("name", "replay")
+        self.target = mission.get("target", "")
+
+    @classmethod
+    def from_session(cls, session: str, log_path: str = "swarm_logs/", **kwargs) -> "ReplayEngine":
+        """من مسار ملف جلسة أو معرف جلسة في log_path"""
+        if os.path.exists(resolve_path(session)):
+            events = iter_session_file(resolve_path(session))
+        else:
+            events = SwarmReplay(log_path=resolve_path(log_path)).iter_session(session)
+        return cls(events, **kwargs)
+
+    def build_orchestrator(self, log_path: str):
+        """منسق جديد مع استبدال وكلاء الشبكة بـ RecordedAgent"""
+        factory = self.orchestrator_factory
+        if factory is None:
+            # استيراد مؤجل: الوحدة تعمل مع أي منسق يُمرَّر دون تحميل وكلاء السرب
+            try:
+                from .orchestrator import SwarmOrchestrator
+            except ImportError:
+                from orchestrator import SwarmOrchestrator
+            factory = SwarmOrchestrator
+        orchestrator = factory()
+        orchestrator.replay.log_path = log_path
+        # وكلاء أرسلوا في الجلسة ولا يوفرهم هذا المنسق: ردودهم من السجل أيضاً
+        missing = [name for name in self.senders
+                   if name not in orchestrator.agents and name not in self.stubbed_agents]
+        for name in self.stubbed_agents + missing:
+            real = orchestrator.agents.get(name)
+            responses = recorded_responses(self.events, name)
+            if real is None and not responses:
+                continue
+            orchestrator.register_agent(RecordedAgent(
+                name,
+                real.role if real else "Recorded",
+                real.get_capabilities() if real else recorded_capabilities(self.events, name),
+                real.get_subscriptions() if real else None,
+                responses,
+                self.speed
+            ))
+        return orchestrator
+
+    def run(self, async_mode: bool = False, log_path: Optional[str] = None) -> Dict:
+        """
+        إعادة تشغيل المهمة مرة واحدة
+
+        Args:
+            async_mode: استخدام start_mission_async
+            log_path: مجلد سجل الإعادة (default: مجلد مؤقت، لا يلمس swarm_logs/)
+
+        Returns:
+            {"duration_seconds", "messages_processed", "alerts_triggered",
+             "served", "unanswered", "unused", "recorded_agents", "changes", "log_file"}
+        """
+        log_path = log_path or tempfile.mkdtemp(prefix="pibot_replay_")
+        output = io.StringIO() if self.quiet else None
+        with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+            orchestrator = self.build_orchestrator(log_path)
+            started = time.perf_counter()
+            if async_mode:
+                log_file = asyncio.run(orchestrator.start_mission_async(self.mission_name, self.target))
+            else:
+                log_file = orchestrator.start_mission(self.mission_name, self.target)
+            duration = time.perf_counter() - started
+            orchestrator.executor.shutdown()
+
+        stubs = [a for a in orchestrator.agents.values() if isinstance(a, RecordedAgent)]
+        recorded_agents = sorted(set(self.stubbed_agents) | {a.name for a in stubs})
+        replayed = list(normalize_events(iter_session_file(log_file)))
+        return {
+            "duration_seconds": round(duration, 4),
+            "messages_processed": orchestrator.stats["messages_processed"],
+            "alerts_triggered": orchestrator.stats["alerts_triggered"],
+            "served": sum(a.served for a in stubs),
+            "unanswered": sum(a.unanswered for a in stubs),
+            "unused": sum(a.remaining for a in stubs),
+            "recorded_agents": [name for name in recorded_agents if name in orchestrator.agents],
+            "changes": diff_outputs(
+                output_signature(self.events, exclude=recorded_agents),
+                output_signature(replayed, exclude=recorded_agents)
+            ),
+            "log_file": log_file
+        }
+
+    def benchmark(self, repeats: int = 10, async_mode: bool = False) -> Dict:
+        """تشغيل المهمة عدة مرات وقياس الزمن (ms)"""
+        durations = []
+        with tempfile.TemporaryDirectory(prefix="pibot_replay_") as log_path:
+            for _ in range(max(1, repeats)):
+                durations.append(self.run(async_mode, log_path)["duration_seconds"] * 1000)
+        durations.sort()
+        return {
+            "repeats": len(durations),
+            "min_ms": round(durations[0], 2),
+            "median_ms": round(durations[len(durations) // 2], 2),
+            "max_ms": round(durations[-1], 2),
+        }
+
+def print_replay(result: Dict):
+    print(f"⏪ إعادة التشغيل: {result['duration_seconds'] * 1000:.1f}ms")
+    print(f"   ├─ رسائل: {result['messages_processed']} | تنبيهات: {result['alerts_triggered']}")
+    print(f"   ├─ ردود مسجلة: {result['served']} مستخدمة، {result['unanswered']} بلا رد مسجل، {result['unused']} غير مستخدمة")
+    print(f"   ├─ وكلاء من السجل: {', '.join(result['recorded_agents']) or '-'}")
+    if result["changes"]:
+        print("   └─ 🚨 تغيرت مخرجات:")
+        for agent, change in result["changes"].items():
+            print(f"      ├─ {agent}: {len(change['missing'])} ناقصة، {len(change['added'])} جديدة")
+    else:
+        print("   └─ ✅ مخرجات وكلاء التحليل مطابقة للجلسة الأصلية")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    session = None
+    async_mode = False
+    speed = None
+    repeats = 0
+    json_path = None
+    while args:
+        arg = args.pop(0)
+        if arg == "--async":
+            async_mode = True
+        elif arg == "--speed" and args:
+            speed = float(args.pop(0))
+        elif arg == "--repeat" and args:
+            repeats = int(args.pop(0))
+        elif arg == "--json" and args:
+            json_path = args.pop(0)
+        else:
+            session = arg
+
+    if not session:
+        print("الاستخدام: python replay_engine.py <session_id|file> [--async] [--speed N] [--repeat N] [--json path]")
+        sys.exit(2)
+
+    engine = ReplayEngine.from_session(session, speed=speed)
+    result = engine.run(async_mode)
+    print_replay(result)
+    if repeats:
+        result["benchmark"] = engine.benchmark(repeats, async_mode)
+        bench = result["benchmark"]
+        print(f"\n⏱️ {bench['repeats']} تشغيل: min {bench['min_ms']}ms / median {bench['median_ms']}ms / max {bench['max_ms']}ms")
+
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 النتائج: {json_path}")
+
+    sys.exit(1 if result["changes"] else 0)
@@ -0,0 +1,260 @@
+"""
+📈 محرك تقييم المخاطر الجماعي (Fleet Risk Engine)
+تقييم آلاف الأجهزة دفعة واحدة بعمليات NumPy متجهة
+
+الفكرة:
+- مصفوفة منطقية (أجهزة × منافذ) تمثل المنافذ المفتوحة
+- الدرجات والمستويات والتوصيات والملخص تُحسب لكل الأسطول في عمليات متجهة
+- النتائج مطابقة تماماً لـ tools.assess_risk لكل جهاز
+
+الاستخدام:
+    from risk_engine import FleetRiskEngine, build_open_matrix
+
+    ips, ports, matrix = build_open_matrix(report["targets"])
+    engine = FleetRiskEngine(ports)
+    result = engine.score(matrix)
+    summary = engine.summarize(result)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from .tools import HIGH_RISK_PORTS, MEDIUM_RISK_PORTS, RISK_RECOMMENDATIONS, score_risk
+except ImportError:
+    from tools import HIGH_RISK_PORTS, MEDIUM_RISK_PORTS, RISK_RECOMMENDATIONS, score_risk
+
+from typing import Dict, List, Tuple
+
+# محاولة استيراد NumPy
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    print("⚠️ NumPy غير مثبت. سيعمل محرك المخاطر في وضع Fallback (أبطأ).")
+    print("   لتثبيت: pip install numpy")
+    NUMPY_AVAILABLE = False
+
+RISK_LEVELS = ["LOW", "MEDIUM", "HIGH"]  # رموز المستويات: 0, 1, 2
+
+def build_open_matrix(targets: List[Dict], ports: List[int] = None) -> Tuple[List[str], List[int], object]:
+    """
+    بناء مصفوفة المنافذ المفتوحة من نتائج full_network_scan
+
+    Args:
+        targets: قائمة الأجهزة (report["targets"])
+        ports: ترتيب الأعمدة (default: كل المنافذ المفتوحة المرصودة مرتبة)
+
+    Returns:
+        (ips, ports, matrix) حيث matrix مصفوفة bool بحجم (أجهزة × منافذ)
+    """
+    ips = [host["ip"] for host in targets]
+    if ports is None:
+        ports = sorted({port for host in targets for port in host.get("open_ports", [])})
+    column = {port: i for i, port in enumerate(ports)}
+
+    if not NUMPY_AVAILABLE:
+        matrix = [[False] * len(ports) for _ in targets]
+        for row, host in enumerate(targets):
+            for port in host.get("open_ports", []):
+                if port in column:
+                    matrix[row][column[port]] = True
+        return ips, list(ports), matrix
+
+    rows, cols = [], []
+    for row, host in enumerate(targets):
+        for port in host.get("open_ports", []):
+            if port in column:
+                rows.append(row)
+                cols.append(column[port])
+    matrix = np.zeros((len(targets), len(ports)), dtype=bool)
+    matrix[rows, cols] = True
+    return ips, list(ports), matrix
+
+class FleetRiskEngine:
+    """
+    تقييم مخاطر الأسطول بالكامل في عمليات متجهة
+
+    الأقنعة (masks) الخاصة بالمنافذ عالية/متوسطة الخطورة والتوصيات
+    تُحسب مرة واحدة لكل ترتيب أعمدة.
+    """
+
+    def __init__(self, ports: List[int]):
+        self.ports = list(ports)
+        high_set = set(HIGH_RISK_PORTS)
+        medium_set = set(MEDIUM_RISK_PORTS)
+        self.recommendations = [text for _, text in RISK_RECOMMENDATIONS]
+
+        if NUMPY_AVAILABLE:
+            port_array = np.array(self.ports, dtype=np.int64)
+            self.high_mask = np.isin(port_array, list(high_set))
+            self.medium_mask = np.isin(port_array, list(medium_set))
+            self.recommendation_masks = np.column_stack([
+                np.isin(port_array, [p for p in rec_ports if p in high_set])
+                for rec_ports, _ in RISK_RECOMMENDATIONS
+            ]) if RISK_RECOMMENDATIONS else np.zeros((len(self.ports), 0), dtype=bool)
+
+    def score(self, open_matrix) -> Dict:
+        """
+        حساب المخاطر لكل الأجهزة
+
+        Args:
+            open_matrix: مصفوفة bool (أجهزة × منافذ) بنفس ترتيب self.ports
+
+        Returns:
+            {"risk_score", "risk_level" (0/1/2), "high_count", "medium_count",
+             "low_count", "recommendation_flags" (أجهزة × توصيات), "open_matrix"}
+        """
+        if not NUMPY_AVAILABLE:
+            return self._score_fallback(open_matrix)
+
+        m = np.asarray(open_matrix, dtype=bool)
+        high = m[:, self.high_mask].sum(axis=1)
+        medium = m[:, self.medium_mask].sum(axis=1)
+        low = m.sum(axis=1) - high - medium
+
+        has_high = high > 0
+        has_medium = medium > 0
+        scores = np.where(has_high, 80 + 5 * high,
+                          np.where(has_medium, 40 + 10 * medium, 5 * low))
+        np.minimum(scores, 100, out=scores)
+        levels = np.where(has_high, 2, np.where(has_medium, 1, 0))
+
+        # التوصية تظهر إذا كان أي من منافذها مفتوحاً (المنافذ عالية الخطورة فقط)
+        flags = (m.astype(np.uint8) @ self.recommendation_masks.astype(np.uint8)) > 0
+
+        return {
+            "risk_score": scores,
+            "risk_level": levels,
+            "high_count": high,
+            "medium_count": medium,
+            "low_count": low,
+            "recommendation_flags": flags,
+            "open_matrix": m
+        }
+
+    def _score_fallback(self, open_matrix) -> Dict:
+        """نفس نتائج score بحلقات Python عادية (بدون NumPy)"""
+        result = {key: [] for key in ("risk_score", "risk_level", "high_count",
+                                      "medium_count", "low_count", "recommendation_flags")}
+        for row in open_matrix:
+            open_ports = [port for port, is_open in zip(self.ports, row) if is_open]
+            report = score_risk(open_ports, "")
+            result["risk_score"].append(report["risk_score"])
+            result["risk_level"].append(RISK_LEVELS.index(report["overall_risk"]))
+            result["high_count"].append(len(report["high_risk_ports"]))
+            result["medium_count"].append(len(report["medium_risk_ports"]))
+            result["low_count"].append(len(report["low_risk_ports"]))
+            result["recommendation_flags"].append(
+                [text in report["recommendations"] for text in self.recommendations]
+            )
+        result["open_matrix"] = open_matrix
+        return result
+
+    def summarize(self, result: Dict) -> Dict:
+        """
+        ملخص الأسطول (بنفس مفاتيح summary في full_network_scan + إحصاءات إضافية)
+        """
+        if NUMPY_AVAILABLE:
+            levels = np.asarray(result["risk_level"])
+            counts = np.bincount(levels, minlength=3) if levels.size else np.zeros(3, dtype=int)
+            matrix = np.asarray(result["open_matrix"], dtype=bool)
+            exposure = matrix.sum(axis=0) if matrix.size else np.zeros(len(self.ports), dtype=int)
+            flags = np.asarray(result["recommendation_flags"], dtype=bool)
+            rec_counts = flags.sum(axis=0) if flags.size else np.zeros(len(self.recommendations), dtype=int)
+            scores = np.asarray(result["risk_score"])
+            return {
+                "total_active": int(levels.size),
+                "high_risk_hosts": int(counts[2]),
+                "medium_risk_hosts": int(counts[1]),
+                "low_risk_hosts": int(counts[0]),
+                "hosts_with_open_ports": int(matrix.any(axis=1).sum()) if matrix.size else 0,
+                "mean_risk_score": float(scores.mean()) if scores.size else 0.0,
+                "port_exposure": {port: int(n) for port, n in zip(self.ports, exposure) if n},
+                "recommendation_counts": {text: int(n) for text, n in zip(self.recommendations, rec_counts) if n}
+            }
+
+        levels = result["risk_level"]
+        matrix = result["open_matrix"]
+        scores = result["risk_score"]
+        exposure = [sum(row[i] for row in matrix) for i in range(len(self.ports))]
+        rec_counts = [sum(flags[i] for flags in result["recommendation_flags"])
+                      for i in range(len(self.recommendations))]
+        return {
+            "total_active": len(levels),
+            "high_risk_hosts": levels.count(2),
+            "medium_risk_hosts": levels.count(1),
+            "low_risk_hosts": levels.count(0),
+            "hosts_with_open_ports": sum(1 for row in matrix if any(row)),
+            "mean_risk_score": sum(scores) / len(scores) if scores else 0.0,
+            "port_exposure": {port: n for port, n in zip(self.ports, exposure) if n},
+            "recommendation_counts": {text: n for text, n in zip(self.recommendations, rec_counts) if n}
+        }
+
+    def host_report(self, result: Dict, row: int, target_ip: str) -> Dict:
+        """تقرير جهاز واحد بنفس شكل assess_risk (يُبنى عند الحاجة فقط)"""
+        high_set = set(HIGH_RISK_PORTS)
+        medium_set = set(MEDIUM_RISK_PORTS)
+        open_ports = [port for port, is_open in zip(self.ports, result["open_matrix"][row]) if is_open]
+        return {
+            "target": target_ip,
+            "overall_risk": RISK_LEVELS[int(result["risk_level"][row])],
+            "risk_score": int(result["risk_score"][row]),
+            "high_risk_ports": [p for p in open_ports if p in high_set],
+            "medium_risk_ports": [p for p in open_ports if p in medium_set],
+            "low_risk_ports": [p for p in open_ports if p not in high_set and p not in medium_set],
+            "recommendations": [text for text, flag in zip(self.recommendations, result["recommendation_flags"][row]) if flag]
+        }
+
+def assess_fleet_risk(targets: List[Dict]) -> Dict:
+    """
+    تقييم مخاطر كل الأجهزة في تقرير full_network_scan دفعة واحدة
+
+    Returns:
+        {"summary": ..., "hosts": {ip: risk_report}}
+    """
+    ips, ports, matrix = build_open_matrix(targets)
+    engine = FleetRiskEngine(ports)
+    result = engine.score(matrix)
+    return {
+        "summary": engine.summarize(result),
+        "hosts": {ip: engine.host_report(result, row, ip) for row, ip in enumerate(ips)}
+    }
+
+# --- اختبار ---
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    print("📈 اختبار محرك المخاطر الجماعي\n")
+
+    ports = [21, 22, 23, 25, 53, 80, 110, 111, 135, 139, 143,
+             443, 445, 993, 995, 1723, 3306, 3389, 5900, 8080, 18789, 18792]
+    hosts = 50_000
+    random.seed(7)
+    targets = [
+        {"ip": f"10.{i // 65536}.{(i // 256) % 256}.{i % 256}",
+         "open_ports": [p for p in ports if random.random() < 0.08]}
+        for i in range(hosts)
+    ]
+    ips, ports, matrix = build_open_matrix(targets, ports)
+    engine = FleetRiskEngine(ports)
+
+    start = time.perf_counter()
+    result = engine.score(matrix)
+    summary = engine.summarize(result)
+    elapsed = time.perf_counter() - start
+    print(f"⏱️ {hosts} جهاز في {elapsed * 1000:.1f} مللي ثانية (NumPy: {NUMPY_AVAILABLE})")
+
+    start = time.perf_counter()
+    reference = [score_risk(host["open_ports"], host["ip"]) for host in targets]
+    print(f"⏱️ assess_risk لكل جهاز: {(time.perf_counter() - start) * 1000:.1f} مللي ثانية")
+
+    mismatches = sum(
+        1 for row, ref in enumerate(reference)
+        if engine.host_report(result, row, ref["target"]) != ref
+    )
+    print(f"✅ تطابق النتائج: {hosts - mismatches}/{hosts}")
+    print(f"📊 {summary['high_risk_hosts']} HIGH / {summary['medium_risk_hosts']} MEDIUM / {summary['low_risk_hosts']} LOW")
@@ -0,0 +1,403 @@
+"""
+⏱️ محاكي أهداف الفحص ومقياس الأداء (Scan Benchmark Suite)
+قياس أداء محركات الفحص بدون شبكة حقيقية
+
+الفكرة:
+- المحاكي يفتح منافذ على عناوين 127.x.y.z (ضمن النطاق المصرح به 127.0.0.0/8)
+- منافذ "مفتوحة" بـ banners حقيقية الشكل، ومنافذ "محجوبة" تنتهي مهلتها
+- كل محرك فحص يُقاس على نفس الأهداف: أجهزة/ثانية، فحوصات/ثانية،
+  زمن الفحص p50/p99، وأقصى استهلاك للذاكرة (peak RSS)
+- النتائج تُحفظ JSON وتُقارن بنتيجة سابقة لكشف التراجع في الأداء
+
+الاستخدام:
+    python scan_benchmark.py                    # الإعدادات الافتراضية
+    python scan_benchmark.py 127.77.0.0/24      # نطاق محاكاة مختلف
+    python scan_benchmark.py --json out.json    # حفظ النتائج
+    python scan_benchmark.py --baseline old.json  # مقارنة بنتيجة سابقة
+
+ملاحظات المحاكاة:
+    - على loopback كل عنوان بدون مستمع يرد بـ RST، لذا كل عناوين النطاق
+      تُكتشف كأجهزة نشطة؛ المحاكي يفتح منافذه على كل عناوين النطاق
+    - المصافحة (handshake) تتم في النواة، فـ accept_delay يؤخر الـ banner
+      ورد الخدمة فقط (يؤثر على كشف البصمة لا على فحص المنافذ)
+    - المنفذ "المحجوب" مستمع بطابور قبول ممتلئ: النواة تتجاهل SYN الجديد
+      فتنتهي مهلة الاتصال كما في جدار ناري يُسقط الحزم
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import contextlib
+import io
+import ipaddress
+import json
+import socket
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+try:
+    from . import tools
+except ImportError:
+    import tools
+
+try:
+    import resource
+except ImportError:  # غير متوفر على Windows
+    resource = None
+
+BENCHMARK_CONFIG = {
+    "network": "127.77.0.0/26",        # نطاق المحاكاة (كل العناوين القابلة للاستخدام)
+    "open_ports": [22, 80, 443, 3389],
+    "filtered_ports": [8080],
+    "accept_delay": 0.0,               # تأخير الـ banner/الرد (ثوانٍ)
+    "rate_limit_ms": 0,                # إيقاع الفحص أثناء القياس
+    "max_concurrent_scans": 100,
+    "shard_workers": 2,
+    "full_range_host": True,           # قياس full_port_scan على جهاز واحد
+    "regression_tolerance": 0.2,       # تراجع مسموح قبل التنبيه (20%)
+}
+
+# ردود الخدمات المحاكاة (المنافذ الأخرى ترد على طلب HTTP)
+SIMULATED_BANNERS = {
+    21: b"220 (vsFTPd 3.0.5)\r\n",
+    22: b"SSH-2.0-OpenSSH_9.6p1 Ubuntu-3ubuntu13\r\n",
+    25: b"220 mail.local ESMTP Postfix\r\n",
+    3389: b"",  # RDP لا يرسل banner
+}
+SIMULATED_HTTP_RESPONSE = b"HTTP/1.0 200 OK\r\nServer: nginx/1.24.0\r\nContent-Length: 0\r\n\r\n"
+
+class ScanTargetSimulator:
+    """
+    مجموعة أهداف وهمية على عناوين loopback
+
+    الخوادم تعمل في حلقة asyncio داخل thread منفصل، فيمكن فحصها من
+    نفس العملية. يُستخدم كـ context manager:
+
+        with ScanTargetSimulator("127.77.0.0/28", open_ports=[22, 80]) as sim:
+            tools.full_network_scan(sim.network)
+    """
+
+    def __init__(self, network: str, open_ports: List[int],
+                 filtered_ports: Optional[List[int]] = None, accept_delay: float = 0.0):
+        self.network = network
+        self.hosts = [str(ip) for ip in ipaddress.ip_network(network, strict=False).hosts()]
+        self.open_ports = list(open_ports)
+        self.filtered_ports = list(filtered_ports or [])
+        self.accept_delay = accept_delay
+        self.connections_served = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._servers = []
+        self._blocked_sockets: List[socket.socket] = []
+
+    async def _handle(self, port: int, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections_served += 1
+        try:
+            if self.accept_delay:
+                await asyncio.sleep(self.accept_delay)
+            banner = SIMULATED_BANNERS.get(port)
+            if banner is None:
+                # خدمة صامتة: تنتظر الطلب ثم ترد كخادم HTTP
+                request = await asyncio.wait_for(reader.read(1024), 2.0)
+                if request:
+                    writer.write(SIMULATED_HTTP_RESPONSE)
+            elif banner:
+                writer.write(banner)
+            await writer.drain()
+        except (asyncio.TimeoutError, OSError):
+            pass
+        finally:
+            writer.close()
+
+    async def _start_servers(self):
+        for ip in self.hosts:
+            for port in self.open_ports:
+                server = await asyncio.start_server(
+                    lambda r, w, port=port: self._handle(port, r, w),
+                    host=ip, port=port, backlog=1024, reuse_address=True
+                )
+                self._servers.append(server)
+
+    def _block_port(self, ip: str, port: int):
+        """مستمع لا يقبل أبداً، وطابور قبوله مملوء باتصال واحد"""
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind((ip, port))
+        listener.listen(0)
+        filler = socket.create_connection((ip, port), timeout=1.0)
+        self._blocked_sockets.extend([listener, filler])
+
+    def start(self) -> "ScanTargetSimulator":
+        """تشغيل كل الخوادم والانتظار حتى تصبح جاهزة"""
+        ready = threading.Event()
+        errors = []
+
+        def runner():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self._start_servers())
+            except Exception as e:
+                errors.append(e)
+            finally:
+                ready.set()
+            if not errors:
+                self._loop.run_forever()
+            for server in self._servers:
+                server.close()
+            self._loop.close()
+
+        self._thread = threading.Thread(target=runner, daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            self.stop()
+            raise errors[0]
+
+        for ip in self.hosts:
+            for port in self.filtered_ports:
+                self._block_port(ip, port)
+        return self
+
+    def stop(self):
+        """إيقاف الخوادم وإغلاق كل المقابس"""
+        for sock in self._blocked_sockets:
+            sock.close()
+        self._blocked_sockets.clear()
+        if self._loop is not None and self._thread is not None and self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+
+    def __enter__(self) -> "ScanTargetSimulator":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+# --- القياس ---
+
+def _percentile(samples: List[float], percent: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def _reset_peak_rss():
+    """تصفير قمة RSS للعملية الحالية (Linux فقط، وإلا تبقى القمة منذ البداية)"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+def _peak_rss_mb() -> Optional[float]:
+    """أقصى RSS منذ آخر تصفير (VmHWM) أو منذ بدء العملية"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is not None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return None
+
+class ProbeRecorder:
+    """
+    قياس زمن كل فحص TCP عبر تغليف tools._probe_tcp مؤقتاً
+
+    (يعمل داخل العملية الحالية فقط؛ الفحص الموزع يعد محاولاته في كل shard ولا يُقاس زمنها)
+    """
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self._original = None
+
+    def __enter__(self) -> "ProbeRecorder":
+        self._original = original = tools._probe_tcp
+        latencies = self.latencies
+
+        async def timed_probe(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - started)
+
+        tools._probe_tcp = timed_probe
+        return self
+
+    def __exit__(self, *exc):
+        tools._probe_tcp = self._original
+
+def sharded_outcome(network: str, workers: int) -> Dict:
+    """
+    الفحص الموزع: عدد محاولات الاتصال يأتي من كل shard (العمليات الفرعية
+    لا يراها ProbeRecorder، فلا يوجد p50/p99)
+    """
+    for event in tools.iter_sharded_network_scan(network, workers=workers):
+        if event["event"] == "completed":
+            return {"hosts_found": len(event["report"]["targets"]), "probes": event["probes"]}
+    return {"hosts_found": 0, "probes": None}
+
+def measure(name: str, run: Callable[[], Dict], hosts: int) -> Dict:
+    """
+    تشغيل محرك واحد وقياسه
+
+    Args:
+        name: اسم القياس
+        run: دالة تشغّل الفحص وتعيد {"hosts_found": int, "probes": int اختياري}
+        hosts: عدد الأجهزة المتوقعة (لحساب أجهزة/ثانية)
+
+    Returns:
+        قاموس بالمقاييس
+    """
+    tools.RTT_TABLE.reset()
+    _reset_peak_rss()
+    with ProbeRecorder() as recorder, contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        outcome = run()
+        duration = time.perf_counter() - started
+        tools.flush_audit_log()
+
+    probes = outcome.get("probes", len(recorder.latencies))
+    p50 = _percentile(recorder.latencies, 50)
+    p99 = _percentile(recorder.latencies, 99)
+    return {
+        "name": name,
+        "duration_seconds": round(duration, 3),
+        "hosts": hosts,
+        "hosts_found": outcome.get("hosts_found"),
+        "hosts_per_sec": round(hosts / duration, 1) if duration else None,
+        "probes": probes,
+        "probes_per_sec": round(probes / duration, 1) if duration and probes else None,
+        "p50_ms": round(p50 * 1000, 3) if p50 is not None else None,
+        "p99_ms": round(p99 * 1000, 3) if p99 is not None else None,
+        "peak_rss_mb": round(_peak_rss_mb() or 0, 1),
+    }
+
+def run_benchmark_suite(config: Optional[Dict] = None) -> Dict:
+    """
+    تشغيل كل القياسات على محاكي واحد
+
+    Returns:
+        {"config", "machine", "started_at", "results": [...]}
+    """
+    config = {**BENCHMARK_CONFIG, **(config or {})}
+    network = config["network"]
+    saved = {key: tools.SAFETY_CONFIG[key] for key in ("rate_limit_ms", "max_concurrent_scans")}
+    tools.SAFETY_CONFIG["rate_limit_ms"] = config["rate_limit_ms"]
+    tools.SAFETY_CONFIG["max_concurrent_scans"] = config["max_concurrent_scans"]
+
+    results = []
+    try:
+        with ScanTargetSimulator(network, config["open_ports"], config["filtered_ports"],
+                                 config["accept_delay"]) as sim:
+            hosts = len(sim.hosts)
+            scan_ports = sorted(set(tools.DEFAULT_SCAN_PORTS) | set(config["open_ports"]) | set(config["filtered_ports"]))
+            print(f"🎯 المحاكي جاهز: {hosts} جهاز على {network} "
+                  f"(مفتوحة: {config['open_ports']}، محجوبة: {config['filtered_ports']})\n")
+
+            benchmarks = [
+                ("discover_hosts", lambda: {"hosts_found": len(tools.discover_hosts(network))}),
+                ("scan_ports (per host)", lambda: {
+                    "hosts_found": sum(1 for ip in sim.hosts if tools.scan_ports(ip, scan_ports)["open_ports"])
+                }),
+                ("full_network_scan", lambda: {
+                    "hosts_found": tools.full_network_scan(network)["summary"]["total_active"]
+                }),
+                ("sharded_network_scan", lambda: sharded_outcome(network, config["shard_workers"])),
+            ]
+            if config["full_range_host"]:
+                benchmarks.append(("full_port_scan (1 host)", lambda: {
+                    "hosts_found": 1 if tools.full_port_scan(sim.hosts[0])["open_ports"] else 0
+                }))
+
+            for name, run in benchmarks:
+                expected = 1 if name.startswith("full_port_scan") else hosts
+                result = measure(name, run, expected)
+                results.append(result)
+                print_result(result)
+    finally:
+        tools.SAFETY_CONFIG.update(saved)
+
+    return {
+        "config": config,
+        "machine": {"platform": sys.platform, "cpus": os.cpu_count(), "python": sys.version.split()[0]},
+        "started_at": datetime.now().isoformat(),
+        "results": results
+    }
+
+def print_result(result: Dict):
+    latency = (f"p50 {result['p50_ms']}ms / p99 {result['p99_ms']}ms"
+               if result["p50_ms"] is not None else "p50/p99: غير متاح")
+    print(f"⏱️ {result['name']}")
+    print(f"   ├─ المدة: {result['duration_seconds']}s ({result['hosts_found']}/{result['hosts']} جهاز)")
+    print(f"   ├─ أجهزة/ثانية: {result['hosts_per_sec']}")
+    print(f"   ├─ فحوصات/ثانية: {result['probes_per_sec']} ({result['probes']} فحص)")
+    print(f"   ├─ {latency}")
+    print(f"   └─ peak RSS: {result['peak_rss_mb']} MB")
+
+def compare_results(baseline: Dict, current: Dict, tolerance: Optional[float] = None) -> List[Dict]:
+    """
+    مقارنة نتيجتين لكشف التراجع في الإنتاجية
+
+    Returns:
+        قائمة التراجعات: {"name", "metric", "baseline", "current", "change"}
+    """
+    tolerance = BENCHMARK_CONFIG["regression_tolerance"] if tolerance is None else tolerance
+    previous = {result["name"]: result for result in baseline.get("results", [])}
+    regressions = []
+    for result in current["results"]:
+        old = previous.get(result["name"])
+        if not old:
+            continue
+        for metric in ("hosts_per_sec", "probes_per_sec"):
+            before, after = old.get(metric), result.get(metric)
+            if before and after is not None and after < before * (1 - tolerance):
+                regressions.append({
+                    "name": result["name"], "metric": metric,
+                    "baseline": before, "current": after,
+                    "change": round((after - before) / before, 3)
+                })
+    return regressions
+
+# --- نقطة التشغيل المباشر ---
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    overrides = {}
+    json_path = None
+    baseline_path = None
+    while args:
+        arg = args.pop(0)
+        if arg == "--json" and args:
+            json_path = args.pop(0)
+        elif arg == "--baseline" and args:
+            baseline_path = args.pop(0)
+        else:
+            overrides["network"] = arg
+
+    print("⏱️ Pi bot Scan Benchmark\n")
+    report = run_benchmark_suite(overrides)
+
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 النتائج: {json_path}")
+
+    if baseline_path:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            regressions = compare_results(json.load(f), report)
+        if regressions:
+            print("\n🚨 تراجع في الأداء:")
+            for item in regressions:
+                print(f"   ├─ {item['name']} {item['metric']}: {item['baseline']} → {item['current']} ({item['change']:+.0%})")
+            sys.exit(1)
+        print("\n✅ لا تراجع مقارنة بالنتيجة السابقة")
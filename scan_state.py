@@ -0,0 +1,175 @@
+"""
+🗂️ ذاكرة حالة الفحص (Scan State Cache)
+حفظ حالة كل جهاز وكل منفذ بين عمليات الفحص لدعم الفحص التفاضلي (Delta)
+
+الفكرة:
+- كل منفذ يُسجَّل مع وقت آخر فحص وحالته (open/closed/filtered)
+- الفحص التفاضلي يعيد فحص: المدخلات المنتهية الصلاحية (TTL)،
+  الأجهزة الجديدة، والمنافذ التي تغيّرت حالتها مؤخراً (flapping)
+- النتيجة تُقارن بالفحص السابق لإنتاج diff
+"""
+
+import sys
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from .port_state import PortScanResult, PortStateMap
+except ImportError:
+    from port_state import PortScanResult, PortStateMap
+
+class ScanStateStore:
+    """
+    مخزن دائم لحالة الأجهزة والمنافذ (ملف JSON)
+
+    البنية:
+        hosts[ip] = {
+            "last_seen": epoch, "detected_via": str,
+            "ports": {port: {"state": str, "checked_at": epoch,
+                             "changes": int, "flapping": bool,
+                             "fingerprint": dict (اختياري)}}
+        }
+    """
+
+    def __init__(self, storage_path: str = "scan_state.json",
+                 host_ttl: float = 3600, port_ttl: float = 4 * 3600):
+        self.storage_path = storage_path
+        self.host_ttl = host_ttl
+        self.port_ttl = port_ttl
+        self.hosts: Dict[str, Dict] = {}
+        self.load_state()
+
+    # --- الأجهزة ---
+
+    def fresh_hosts(self, now: Optional[float] = None) -> Set[str]:
+        """الأجهزة التي شوهدت نشطة خلال host_ttl (لا تحتاج إعادة اكتشاف)"""
+        now = now or time.time()
+        return {ip for ip, host in self.hosts.items() if now - host["last_seen"] < self.host_ttl}
+
+    def record_host(self, ip: str, detected_via: str):
+        """تسجيل جهاز نشط"""
+        host = self.hosts.setdefault(ip, {"ports": {}})
+        host["last_seen"] = time.time()
+        if detected_via != "cache":
+            host["detected_via"] = detected_via
+
+    def forget_host(self, ip: str):
+        """حذف جهاز لم يعد يستجيب"""
+        self.hosts.pop(ip, None)
+
+    # --- المنافذ ---
+
+    def ports_to_probe(self, ip: str, ports: List[int], now: Optional[float] = None) -> List[int]:
+        """
+        المنافذ التي يجب إعادة فحصها لجهاز معين
+
+        جهاز جديد: كل المنافذ. جهاز معروف: المنافذ غير المسجلة،
+        المنتهية الصلاحية، أو التي تغيّرت حالتها في آخر فحص.
+        """
+        host = self.hosts.get(ip)
+        if not host or not host["ports"]:
+            return list(ports)
+
+        now = now or time.time()
+        known = host["ports"]
+        return [
+            port for port in ports
+            if str(port) not in known
+            or known[str(port)]["flapping"]
+            or now - known[str(port)]["checked_at"] >= self.port_ttl
+        ]
+
+    def record_ports(self, ip: str, port_result: PortScanResult, fingerprints: Optional[Dict[int, Dict]] = None):
+        """تسجيل نتيجة scan_ports (open/closed/filtered) وبصمات الخدمات لجهاز"""
+        host = self.hosts.setdefault(ip, {"last_seen": time.time(), "ports": {}})
+        now = time.time()
+        for port, state in port_result.states.items():
+            entry = host["ports"].get(str(port))
+            if entry is None:
+                host["ports"][str(port)] = {
+                    "state": state, "checked_at": now, "changes": 0, "flapping": False
+                }
+                continue
+            changed = entry["state"] != state
+            entry["flapping"] = changed
+            if changed:
+                entry["changes"] += 1
+                entry["state"] = state
+                entry.pop("fingerprint", None)
+            entry["checked_at"] = now
+        for port, fingerprint in (fingerprints or {}).items():
+            if fingerprint.get("service") and str(port) in host["ports"]:
+                host["ports"][str(port)]["fingerprint"] = fingerprint
+
+    def fingerprints(self, ip: str) -> Dict[int, Dict]:
+        """بصمات الخدمات المخزنة لجهاز {port: fingerprint}"""
+        known = self.hosts.get(ip, {}).get("ports", {})
+        return {int(port): entry["fingerprint"] for port, entry in known.items() if "fingerprint" in entry}
+
+    def port_result(self, ip: str, ports: List[int]) -> PortScanResult:
+        """إعادة بناء نتيجة بشكل scan_ports من الحالة المخزنة"""
+        known = self.hosts.get(ip, {}).get("ports", {})
+        states = PortStateMap()
+        for port in ports:
+            states.set(port, known.get(str(port), {}).get("state", "filtered"))
+        return PortScanResult(ip, states, total_scanned=len(ports))
+
+    def open_ports_snapshot(self, ips: Optional[Set[str]] = None) -> Dict[str, Set[int]]:
+        """المنافذ المفتوحة لكل جهاز (للمقارنة مع الفحص التالي)"""
+        return {
+            ip: {int(port) for port, entry in host["ports"].items() if entry["state"] == "open"}
+            for ip, host in self.hosts.items()
+            if ips is None or ip in ips
+        }
+
+    # --- المقارنة ---
+
+    @staticmethod
+    def diff(previous: Dict[str, Set[int]], current: Dict[str, Set[int]]) -> Dict:
+        """
+        الفرق بين لقطتين من open_ports_snapshot
+
+        Returns:
+            new_hosts, gone_hosts, opened_ports, closed_ports
+        """
+        opened = {}
+        closed = {}
+        for ip in previous.keys() & current.keys():
+            added = current[ip] - previous[ip]
+            removed = previous[ip] - current[ip]
+            if added:
+                opened[ip] = sorted(added)
+            if removed:
+                closed[ip] = sorted(removed)
+        return {
+            "new_hosts": sorted(current.keys() - previous.keys()),
+            "gone_hosts": sorted(previous.keys() - current.keys()),
+            "opened_ports": opened,
+            "closed_ports": closed
+        }
+
+    # --- التخزين ---
+
+    def save_state(self):
+        """حفظ الحالة (كتابة ذرية عبر ملف مؤقت)"""
+        data = {
+            "hosts": self.hosts,
+            "updated_at": datetime.now().isoformat()
+        }
+        tmp_path = f"{self.storage_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.storage_path)
+
+    def load_state(self):
+        if os.path.exists(self.storage_path):
+            try:
+                with open(self.storage_path, "r", encoding="utf-8") as f:
+                    self.hosts = json.load(f).get("hosts", {})
+            except Exception as e:
+                print(f"⚠️ Error loading scan state: {e}")
@@ -0,0 +1,148 @@
+"""
+🔎 بصمة الخدمات (Service Fingerprinting)
+قراءة الـ banners وإرسال طلبات خفيفة لمعرفة الخدمة وإصدارها
+
+الفكرة:
+- كثير من الخدمات تعرّف بنفسها فور الاتصال (SSH, FTP, SMTP, ...)
+- الخدمات الصامتة تُرسل لها طلب HTTP خفيف (HEAD) وتُحلل الاستجابة
+- كل التواقيع مُجمّعة في تعبير نمطي واحد: مرور واحد لكل banner
+
+Safety:
+    ✅ طلبات قراءة فقط (لا مصادقة، لا استغلال)
+"""
+
+import asyncio
+import re
+from typing import Dict, List, Optional, Tuple
+
+FINGERPRINT_CONFIG = {
+    "enabled": True,
+    "banner_timeout": 0.8,   # انتظار banner تلقائي (ثوانٍ)
+    "probe_timeout": 1.0,    # انتظار الرد على الطلب الخفيف (ثوانٍ)
+    "max_banner_bytes": 2048,
+    "send_probes": True,     # إرسال HEAD للخدمات الصامتة
+}
+
+# منافذ يُعرف أنها لا ترسل banner: يُرسل الطلب فوراً بدون انتظار
+PROBE_FIRST_PORTS = {80, 443, 8000, 8008, 8080, 8443, 8888, 9000, 18789, 18792}
+
+HTTP_PROBE = b"HEAD / HTTP/1.0\r\n\r\n"
+
+# (الخدمة، النمط) — المجموعتان product و version اختياريتان في كل نمط
+SIGNATURES: List[Tuple[str, str]] = [
+    ("SSH", r"^SSH-[\d.]+-(?P<product>[A-Za-z]+)[_-]?(?P<version>[\w.]*)"),
+    ("FTP", r"^220[ -][^\r\n]*?(?P<product>vsFTPd|ProFTPD|FileZilla Server|Pure-FTPd)[ /(]*(?P<version>[\d.]*)"),
+    ("FTP", r"^220[ -][^\r\n]*FTP"),
+    ("SMTP", r"^220[ -][^\r\n]*?E?SMTP[ ]*(?P<product>Postfix|Exim|Sendmail)?[ /]*(?P<version>[\d.]*)"),
+    ("POP3", r"^\+OK(?:[^\r\n]*?(?P<product>Dovecot|Cyrus|Courier))?"),
+    ("IMAP", r"^\* OK(?:[^\r\n]*?(?P<product>Dovecot|Cyrus|Courier))?"),
+    ("VNC", r"^RFB (?P<version>\d{3}\.\d{3})"),
+    ("MySQL", r"^.{4}\x0a(?P<version>\d+\.\d+\.\d+[\w.-]*)\x00"),
+    ("Telnet", r"^\xff[\xfb-\xfe]"),
+    ("Redis", r"^-(?:ERR|NOAUTH|DENIED)[^\r\n]*"),
+    ("HTTP", r"^HTTP/1\.[01] \d{3}(?:.*?\r?\n[Ss]erver:[ ]*(?P<product>[^\r\n/ ]+)(?:/(?P<version>[^\r\n ]+))?)?"),
+    ("TLS/SSL", r"^\x15\x03[\x00-\x04]"),
+]
+
+class SignatureMatcher:
+    """
+    مطابقة banner مع كل التواقيع في مرور واحد
+
+    التواقيع تُدمج في تعبير نمطي واحد بمجموعات مسماة فريدة
+    (s0, s0_product, s0_version, ...)، والمجموعة sN المطابقة تحدد التوقيع.
+    """
+
+    def __init__(self, signatures: List[Tuple[str, str]] = None):
+        signatures = signatures or SIGNATURES
+        self.services: Dict[str, str] = {}
+        parts = []
+        for i, (service, pattern) in enumerate(signatures):
+            key = f"s{i}"
+            pattern = (pattern.replace("(?P<product>", f"(?P<{key}_product>")
+                              .replace("(?P<version>", f"(?P<{key}_version>"))
+            parts.append(f"(?P<{key}>{pattern.lstrip('^')})")
+            self.services[key] = service
+        self.pattern = re.compile("^(?:" + "|".join(parts) + ")", re.DOTALL)
+
+    def match(self, banner: str) -> Optional[Dict]:
+        """
+        Returns:
+            {"service", "product", "version"} أو None
+        """
+        m = self.pattern.match(banner)
+        if not m:
+            return None
+        key = next(k for k in self.services if m.group(k) is not None)
+        groups = m.groupdict()
+        return {
+            "service": self.services[key],
+            "product": groups.get(f"{key}_product") or None,
+            "version": groups.get(f"{key}_version") or None,
+        }
+
+DEFAULT_MATCHER = SignatureMatcher()
+
+async def _read(reader: asyncio.StreamReader, timeout: float) -> bytes:
+    try:
+        return await asyncio.wait_for(reader.read(FINGERPRINT_CONFIG["max_banner_bytes"]), timeout)
+    except (asyncio.TimeoutError, OSError):
+        return b""
+
+async def grab_fingerprint(ip: str, port: int, connection=None,
+                           connect_timeout: float = 1.0,
+                           matcher: SignatureMatcher = DEFAULT_MATCHER,
+                           pacer=None) -> Dict:
+    """
+    بصمة منفذ مفتوح واحد
+
+    Args:
+        ip: عنوان الهدف
+        port: المنفذ المفتوح
+        connection: (reader, writer) من فحص المنافذ لإعادة استخدامه (اختياري)
+        connect_timeout: مهلة فتح اتصال جديد إذا لم يُمرَّر connection
+        pacer: محدد إيقاع (tools.ProbePacer) يُنتظر قبل فتح اتصال جديد (اختياري)
+
+    Returns:
+        {"port", "service", "product", "version", "banner", "method"}
+        حيث method: "banner" أو "probe" أو None (لم يتم التعرف)
+    """
+    fingerprint = {"port": port, "service": None, "product": None,
+                   "version": None, "banner": "", "method": None}
+
+    if connection is None:
+        if pacer is not None and not await pacer.wait(ip):
+            return fingerprint
+        try:
+            connection = await asyncio.wait_for(asyncio.open_connection(ip, port), connect_timeout)
+        except (asyncio.TimeoutError, OSError):
+            return fingerprint
+    reader, writer = connection
+
+    try:
+        data = b""
+        method = "banner"
+        if port not in PROBE_FIRST_PORTS:
+            data = await _read(reader, FINGERPRINT_CONFIG["banner_timeout"])
+        if not data and FINGERPRINT_CONFIG["send_probes"]:
+            method = "probe"
+            writer.write(HTTP_PROBE)
+            try:
+                await writer.drain()
+            except OSError:
+                return fingerprint
+            data = await _read(reader, FINGERPRINT_CONFIG["probe_timeout"])
+
+        banner = data.decode("latin-1")
+        fingerprint["banner"] = banner[:128].strip()
+        match = matcher.match(banner) if banner else None
+        if match:
+            fingerprint.update(match)
+            fingerprint["method"] = method
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+    return fingerprint
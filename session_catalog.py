@@ -0,0 +1,336 @@
+"""
+🗂️ فهرس جلسات السرب (Session Catalog)
+فهرس SQLite لملفات swarm_logs/session_* للبحث السريع بدون فتح كل ملف
+
+الفكرة:
+- كل ملف جلسة يُقرأ مرة واحدة (حدثاً بحدث) ويُلخص في صف: اسم المهمة،
+  الهدف، وقت البداية والنهاية، عدد الأحداث والرسائل والتنبيهات،
+  وإحصائيات لكل وكيل
+- التحديث تزايدي: الملفات التي لم يتغير حجمها ووقت تعديلها لا تُقرأ،
+  والملفات المحذوفة تُزال من الفهرس
+- الهدف يُخزن كنطاق IPv4 رقمي، فالبحث عن شبكة فرعية يجد كل مهمة
+  يتقاطع هدفها معها (جهاز، /24، /16 ...) عبر فهرس
+
+الاستخدام:
+    python session_catalog.py                          # آخر الجلسات
+    python session_catalog.py --target 192.168.1.0/24 --days 30
+    python session_catalog.py --mission "فحص" --min-alerts 1
+    python session_catalog.py --since 2026-09-01 --until 2026-10-01 --agent Analyst
+    python session_catalog.py --session db1d5dbd       # إحصائيات الوكلاء لجلسة
+    python session_catalog.py --json                   # مخرجات JSON
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ipaddress
+import json
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from .core import SESSION_EXTENSIONS, iter_session_file, normalize_events
+except ImportError:
+    from core import SESSION_EXTENSIONS, iter_session_file, normalize_events
+
+CATALOG_CONFIG = {
+    "log_path": "swarm_logs/",
+    "db_name": "catalog.sqlite3",   # داخل log_path
+    "default_limit": 20,
+}
+
+SESSION_FILE_SUFFIXES = tuple(SESSION_EXTENSIONS.values()) + (".json",)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    file          TEXT PRIMARY KEY,
+    session_id    TEXT,
+    mtime_ns      INTEGER NOT NULL,
+    size          INTEGER NOT NULL,
+    mission_name  TEXT,
+    target        TEXT,
+    target_start  INTEGER,
+    target_end    INTEGER,
+    started_at    TEXT,
+    ended_at      TEXT,
+    event_count   INTEGER NOT NULL DEFAULT 0,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    alert_count   INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_started ON sessions (started_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_target ON sessions (target_start, target_end);
+CREATE INDEX IF NOT EXISTS idx_sessions_id ON sessions (session_id);
+
+CREATE TABLE IF NOT EXISTS agent_stats (
+    file              TEXT NOT NULL REFERENCES sessions (file) ON DELETE CASCADE,
+    agent             TEXT NOT NULL,
+    messages_sent     INTEGER NOT NULL DEFAULT 0,
+    messages_received INTEGER NOT NULL DEFAULT 0,
+    alerts_sent       INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (file, agent)
+);
+CREATE INDEX IF NOT EXISTS idx_agent_stats_agent ON agent_stats (agent);
+"""
+
+def target_range(target: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """نطاق IPv4 الرقمي لهدف (عنوان أو CIDR)، أو (None, None) لغير ذلك"""
+    try:
+        network = ipaddress.ip_network((target or "").strip(), strict=False)
+    except ValueError:
+        return None, None
+    if network.version != 4:
+        return None, None
+    return int(network.network_address), int(network.broadcast_address)
+
+def summarize_session(filename: str) -> Dict:
+    """
+    تلخيص ملف جلسة بقراءة واحدة متدفقة
+
+    Returns:
+        {"session_id", "mission_name", "target", "started_at", "ended_at",
+         "event_count", "message_count", "alert_count", "agents": {...}}
+    """
+    summary = {
+        "session_id": None, "mission_name": None, "target": None,
+        "started_at": None, "ended_at": None,
+        "event_count": 0, "message_count": 0, "alert_count": 0,
+        "agents": {}
+    }
+    agents = summary["agents"]
+
+    def agent(name):
+        if name not in agents:
+            agents[name] = {"messages_sent": 0, "messages_received": 0, "alerts_sent": 0}
+        return agents[name]
+
+    # الأحداث تُعد كما في الملف، والرسائل بعد دمج نسخ المستلمين القديمة
+    def counted(events):
+        for event in events:
+            summary["event_count"] += 1
+            yield event
+
+    for event in normalize_events(counted(iter_session_file(filename))):
+        timestamp = event.get("timestamp")
+        if timestamp:
+            summary["started_at"] = summary["started_at"] or timestamp
+            summary["ended_at"] = timestamp
+        summary["session_id"] = summary["session_id"] or event.get("session_id")
+
+        data = event.get("data", {})
+        if event["event_type"] == "mission_started":
+            summary["mission_name"] = data.get("name")
+            summary["target"] = data.get("target")
+        elif event["event_type"] == "message_sent":
+            summary["message_count"] += 1
+            sender = agent(data.get("from", "?"))
+            sender["messages_sent"] += 1
+            if data.get("type") == "alert":
+                summary["alert_count"] += 1
+                sender["alerts_sent"] += 1
+            for name in data.get("to", []):
+                agent(name)["messages_received"] += 1
+
+    if summary["session_id"] is None:
+        summary["session_id"] = os.path.basename(filename).split("_", 1)[-1].split(".", 1)[0]
+    return summary
+
+class SessionCatalog:
+    """
+    فهرس SQLite للجلسات مع تحديث تزايدي واستعلامات مفلترة
+
+    Args:
+        log_path: مجلد ملفات الجلسات
+        db_path: ملف قاعدة البيانات (default: <log_path>/catalog.sqlite3)
+    """
+
+    def __init__(self, log_path: Optional[str] = None, db_path: Optional[str] = None):
+        self.log_path = log_path or CATALOG_CONFIG["log_path"]
+        os.makedirs(self.log_path, exist_ok=True)
+        self.db_path = db_path or os.path.join(self.log_path, CATALOG_CONFIG["db_name"])
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _session_files(self) -> Dict[str, os.stat_result]:
+        files = {}
+        with os.scandir(self.log_path) as entries:
+            for entry in entries:
+                if (entry.is_file() and entry.name.startswith("session_")
+                        and entry.name.endswith(SESSION_FILE_SUFFIXES)):
+                    files[entry.name] = entry.stat()
+        return files
+
+    def refresh(self) -> Dict[str, int]:
+        """
+        تحديث الفهرس من مجلد الجلسات
+
+        Returns:
+            {"added", "updated", "removed", "unchanged"}
+        """
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        known = {
+            row["file"]: (row["mtime_ns"], row["size"])
+            for row in self.conn.execute("SELECT file, mtime_ns, size FROM sessions")
+        }
+        files = self._session_files()
+
+        with self.conn:
+            for name in known.keys() - files.keys():
+                self.conn.execute("DELETE FROM sessions WHERE file = ?", (name,))
+                counts["removed"] += 1
+
+            for name, stat in files.items():
+                if known.get(name) == (stat.st_mtime_ns, stat.st_size):
+                    counts["unchanged"] += 1
+                    continue
+                try:
+                    summary = summarize_session(os.path.join(self.log_path, name))
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ تعذر فهرسة {name}: {e}")
+                    continue
+                self._store(name, stat, summary)
+                counts["updated" if name in known else "added"] += 1
+        return counts
+
+    def _store(self, name: str, stat: os.stat_result, summary: Dict):
+        start, end = target_range(summary["target"])
+        self.conn.execute("DELETE FROM sessions WHERE file = ?", (name,))
+        self.conn.execute(
+            """INSERT INTO sessions (file, session_id, mtime_ns, size, mission_name, target,
+                   target_start, target_end, started_at, ended_at,
+                   event_count, message_count, alert_count)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (name, summary["session_id"], stat.st_mtime_ns, stat.st_size,
+             summary["mission_name"], summary["target"], start, end,
+             summary["started_at"], summary["ended_at"],
+             summary["event_count"], summary["message_count"], summary["alert_count"])
+        )
+        self.conn.executemany(
+            """INSERT INTO agent_stats (file, agent, messages_sent, messages_received, alerts_sent)
+               VALUES (?, ?, ?, ?, ?)""",
+            [(name, agent, s["messages_sent"], s["messages_received"], s["alerts_sent"])
+             for agent, s in summary["agents"].items()]
+        )
+
+    def query(self, target: Optional[str] = None, since: Optional[str] = None,
+              until: Optional[str] = None, mission: Optional[str] = None,
+              min_alerts: Optional[int] = None, agent: Optional[str] = None,
+              limit: Optional[int] = None) -> List[Dict]:
+        """
+        البحث في الجلسات (الأحدث أولاً)
+
+        Args:
+            target: عنوان أو شبكة IPv4 (كل جلسة يتقاطع هدفها معها)، أو نص يطابق الهدف حرفياً
+            since / until: تاريخ أو وقت ISO (بداية الجلسة)
+            mission: جزء من اسم المهمة
+            min_alerts: أقل عدد تنبيهات
+            agent: جلسات أرسل فيها هذا الوكيل رسائل
+            limit: أقصى عدد نتائج
+        """
+        clauses, params = [], []
+        if target:
+            start, end = target_range(target)
+            if start is not None:
+                clauses.append("target_start <= ? AND target_end >= ?")
+                params += [end, start]
+            else:
+                clauses.append("target = ?")
+                params.append(target)
+        if since:
+            clauses.append("started_at >= ?")
+            params.append(since)
+        if until:
+            clauses.append("started_at < ?")
+            params.append(until)
+        if mission:
+            clauses.append("mission_name LIKE ?")
+            params.append(f"%{mission}%")
+        if min_alerts is not None:
+            clauses.append("alert_count >= ?")
+            params.append(min_alerts)
+        if agent:
+            clauses.append("file IN (SELECT file FROM agent_stats WHERE agent = ? AND messages_sent > 0)")
+            params.append(agent)
+
+        sql = "SELECT * FROM sessions"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY started_at DESC LIMIT ?"
+        params.append(limit or CATALOG_CONFIG["default_limit"])
+        return [self._row(row) for row in self.conn.execute(sql, params)]
+
+    @staticmethod
+    def _row(row: sqlite3.Row) -> Dict:
+        session = dict(row)
+        for key in ("target_start", "target_end", "mtime_ns", "size"):
+            session.pop(key)
+        return session
+
+    def agent_stats(self, session_id: str) -> List[Dict]:
+        """إحصائيات الوكلاء لجلسة (المعرف الكامل أو أول 8 أحرف)"""
+        rows = self.conn.execute(
+            """SELECT a.agent, a.messages_sent, a.messages_received, a.alerts_sent
+               FROM agent_stats a JOIN sessions s ON s.file = a.file
+               WHERE s.session_id LIKE ? ORDER BY a.messages_sent DESC, a.agent""",
+            (f"{session_id}%",)
+        )
+        return [dict(row) for row in rows]
+
+def print_sessions(sessions: List[Dict]):
+    if not sessions:
+        print("📭 لا توجد جلسات مطابقة")
+        return
+    print(f"🗂️ {len(sessions)} جلسة:")
+    for index, session in enumerate(sessions):
+        branch = "└─" if index == len(sessions) - 1 else "├─"
+        started = (session["started_at"] or "")[:19].replace("T", " ")
+        print(f"   {branch} [{session['session_id'][:8]}] {started} | {session['mission_name']} → {session['target']}"
+              f" | {session['message_count']} رسالة، {session['alert_count']} تنبيه")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    filters = {}
+    log_path = None
+    session_id = None
+    as_json = False
+    while args:
+        arg = args.pop(0)
+        if arg == "--json":
+            as_json = True
+        elif arg == "--days" and args:
+            filters["since"] = (datetime.now() - timedelta(days=float(args.pop(0)))).isoformat()
+        elif arg in ("--target", "--since", "--until", "--mission", "--agent") and args:
+            filters[arg[2:]] = args.pop(0)
+        elif arg == "--min-alerts" and args:
+            filters["min_alerts"] = int(args.pop(0))
+        elif arg == "--limit" and args:
+            filters["limit"] = int(args.pop(0))
+        elif arg == "--session" and args:
+            session_id = args.pop(0)
+        elif arg == "--log-path" and args:
+            log_path = args.pop(0)
+
+    with SessionCatalog(log_path) as catalog:
+        counts = catalog.refresh()
+        result = catalog.agent_stats(session_id) if session_id else catalog.query(**filters)
+        if as_json:
+            print(json.dumps(result, indent=2, ensure_ascii=False))
+        elif session_id:
+            print(f"🤖 وكلاء الجلسة {session_id}:")
+            for row in result:
+                print(f"   ├─ {row['agent']}: أرسل {row['messages_sent']}، استقبل {row['messages_received']}، تنبيهات {row['alerts_sent']}")
+        else:
+            print(f"🔄 الفهرس: {counts['added']} جديدة، {counts['updated']} محدثة، {counts['removed']} محذوفة\n")
+            print_sessions(result)
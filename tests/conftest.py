@@ -0,0 +1,49 @@
+"""
+Shared test setup: the repo is a flat set of scripts, so tests import the
+modules from the repository root the same way the scripts import each other.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pytest
+
+
+@pytest.fixture
+def scan_lab(monkeypatch):
+    """Unpaced, unlogged scanning of loopback targets, with a fresh RTT table."""
+    import rate_limiter
+    import tools
+
+    monkeypatch.setitem(tools.SAFETY_CONFIG, "rate_limit_ms", 0)
+    monkeypatch.setitem(tools.SAFETY_CONFIG, "rate_limit_shared", False)
+    monkeypatch.setitem(tools.SAFETY_CONFIG, "log_all_scans", False)
+    monkeypatch.setitem(tools.SAFETY_CONFIG, "require_authorization", True)
+    monkeypatch.setitem(tools.SAFETY_CONFIG, "authorized_ranges", ["127.0.0.0/8"])
+    tools._rate_limiters.clear()
+    rate_limiter._stores.clear()
+    tools.RTT_TABLE.reset()
+    yield tools
+    tools.RTT_TABLE.reset()
+    tools._rate_limiters.clear()
+    rate_limiter._stores.clear()
+
+
+@pytest.fixture
+def simulator(scan_lab):
+    """Start ScanTargetSimulator instances on loopback; all are stopped afterwards."""
+    from scan_benchmark import ScanTargetSimulator
+
+    started = []
+
+    def start(network, open_ports=(22, 80), **options):
+        sim = ScanTargetSimulator(network, list(open_ports), **options).start()
+        started.append(sim)
+        return sim
+
+    yield start
+    for sim in started:
+        sim.stop()
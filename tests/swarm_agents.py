@@ -0,0 +1,122 @@
+"""
+A small swarm built on core.BaseAgent for orchestrator, executor and replay
+tests: Planner -> Recon -> Analyst -> Reporter, no network access.
+"""
+
+import os
+import time
+
+from core import AgentMessage, BaseAgent
+
+
+class _TestAgent(BaseAgent):
+    capabilities = []
+
+    def get_capabilities(self):
+        return list(self.capabilities)
+
+
+class Planner(_TestAgent):
+    capabilities = ["planning"]
+
+    def __init__(self):
+        super().__init__("Planner", "planner")
+
+    def process_message(self, message):
+        if message.content.get("task_type") == "start_mission":
+            return AgentMessage(sender=self.name, recipient="capability:scanning", message_type="task",
+                                content={"task_type": "scan", "target": message.content["target"]})
+        return None
+
+
+class Recon(_TestAgent):
+    capabilities = ["scanning"]
+
+    def __init__(self, open_ports=(22, 80)):
+        super().__init__("Recon", "recon")
+        self.open_ports = list(open_ports)
+
+    def get_subscriptions(self):
+        return ["task"]
+
+    def process_message(self, message):
+        if message.content.get("task_type") == "scan":
+            return AgentMessage(sender=self.name, recipient="broadcast", message_type="result",
+                                content={"target": message.content["target"], "open_ports": self.open_ports})
+        return None
+
+
+class Analyst(_TestAgent):
+    capabilities = ["analysis"]
+
+    def __init__(self):
+        super().__init__("Analyst", "analyst")
+
+    def get_subscriptions(self):
+        return ["result"]
+
+    def process_message(self, message):
+        ports = message.content.get("open_ports")
+        if ports is None:
+            return None
+        if 22 in ports:
+            return AgentMessage(sender=self.name, recipient="broadcast", message_type="alert",
+                                content={"level": "HIGH", "message": "SSH open"}, priority="critical")
+        return None
+
+
+class Reporter(_TestAgent):
+    capabilities = ["reporting"]
+
+    def __init__(self):
+        super().__init__("Reporter", "reporter")
+        self.alerts = 0
+
+    def get_subscriptions(self):
+        return ["alert", "task"]
+
+    def process_message(self, message):
+        if message.message_type == "alert":
+            self.alerts += 1
+            return None
+        if message.content.get("task_type") == "generate_report":
+            return AgentMessage(sender=self.name, recipient="broadcast", message_type="report",
+                                content={"report_id": message.content["report_id"], "alerts": self.alerts})
+        return None
+
+
+class Sleeper(_TestAgent):
+    """Blocks in its handler, like a socket scan or an Ollama request."""
+
+    def __init__(self, name, delay):
+        super().__init__(name, "sleeper")
+        self.delay = delay
+
+    def get_subscriptions(self):
+        return ["task"]
+
+    def process_message(self, message):
+        time.sleep(self.delay)
+        return None
+
+
+class Counter(_TestAgent):
+    """cpu-workload agent whose state lives outside state/memory."""
+
+    workload = "cpu"
+
+    def __init__(self):
+        super().__init__("Counter", "counter")
+        self.seen = []
+        self.pids = set()
+
+    def process_message(self, message):
+        self.pids.add(os.getpid())
+        self.seen.append(message.content["n"])
+        self.memory["last"] = message.content["n"]
+        self.state.completed_tasks += 1
+        return None
+
+
+def swarm():
+    return [Planner(), Recon(), Analyst(), Reporter()]
@@ -0,0 +1,86 @@
+import os
+import threading
+
+import pytest
+
+from agent_executor import AgentExecutor
+from core import AgentMessage
+from swarm_agents import Counter, Planner
+from swarm_agents import _TestAgent
+
+
+def _msg(n=0):
+    return AgentMessage(sender="x", recipient="Counter", message_type="task", content={"n": n})
+
+
+@pytest.fixture
+def executor():
+    executor = AgentExecutor({"cpu_workers": 1, "io_workers": 2})
+    yield executor
+    executor.shutdown()
+
+
+def test_workload_comes_from_config_then_agent(executor):
+    assert executor.workload_for(Planner()) == "io"
+    assert executor.workload_for(Counter()) == "cpu"
+    executor.config["agent_workloads"] = {"Planner": "inline"}
+    assert executor.workload_for(Planner()) == "inline"
+    executor.config["agent_workloads"] = {"Planner": "gpu"}
+    with pytest.raises(ValueError):
+        executor.workload_for(Planner())
+
+
+class ThreadRecorder(_TestAgent):
+    def __init__(self, workload):
+        super().__init__("Recorder", "recorder")
+        self.workload = workload
+        self.thread = None
+
+    def process_message(self, message):
+        self.thread = threading.current_thread().name
+        if message.content.get("fail"):
+            raise RuntimeError("handler failed")
+        return message
+
+
+def test_inline_runs_on_the_caller_thread(executor):
+    agent = ThreadRecorder("inline")
+    message = _msg()
+    assert executor.submit(agent, message).result() is message
+    assert agent.thread == threading.current_thread().name
+
+
+def test_io_runs_on_the_thread_pool_and_surfaces_errors(executor):
+    agent = ThreadRecorder("io")
+    executor.submit(agent, _msg()).result(timeout=5)
+    assert agent.thread.startswith("agent-io")
+    failing = AgentMessage(sender="x", recipient="Recorder", message_type="task", content={"fail": True})
+    with pytest.raises(RuntimeError):
+        executor.submit(agent, failing).result(timeout=5)
+
+
+class Unpicklable(ThreadRecorder):
+    def __init__(self):
+        super().__init__("cpu")
+        self.lock = threading.Lock()
+
+
+def test_unpicklable_cpu_agent_falls_back_to_threads(executor, capsys):
+    agent = Unpicklable()
+    executor.submit(agent, _msg()).result(timeout=5)
+    assert agent.thread.startswith("agent-io")
+    assert executor.workload_for(agent) == "io"
+    assert "threads" in capsys.readouterr().out
+
+
+def test_process_isolation_carries_the_full_state_back(executor):
+    agent = Counter()
+    for n in range(3):
+        agent.inbox.append(_msg(100 + n))  # arrives while the handler runs elsewhere
+        executor.submit(agent, _msg(n)).result(timeout=60)
+
+    assert agent.seen == [0, 1, 2]
+    assert agent.pids and os.getpid() not in agent.pids
+    assert agent.memory == {"last": 2}
+    assert agent.state.completed_tasks == 3
+    assert [m.content["n"] for m in agent.inbox] == [100, 101, 102]
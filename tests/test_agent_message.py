@@ -0,0 +1,76 @@
+import pickle
+from datetime import datetime
+
+import pytest
+
+from core import AgentMessage, FrozenDict
+
+
+def make(**overrides):
+    fields = dict(sender="A", recipient="B", message_type="task", content={"target": "127.0.0.1"})
+    fields.update(overrides)
+    return AgentMessage(**fields)
+
+
+def test_lazy_ids_are_unique_and_ordered_by_creation():
+    messages = [make() for _ in range(50)]
+    ids = [message.id for message in reversed(messages)][::-1]
+    assert len(set(ids)) == len(ids)
+    assert ids == sorted(ids)
+    assert len({message_id.rsplit("-", 1)[0] for message_id in ids}) == 1
+    assert messages[0].id is messages[0].id
+
+
+def test_explicit_id_and_timestamp_are_kept():
+    message = make(id="fixed", timestamp="2024-01-01T00:00:00")
+    assert message.id == "fixed"
+    assert message.timestamp == "2024-01-01T00:00:00"
+    message.id = "other"
+    assert message.id == "other"
+
+
+def test_lazy_timestamp_is_creation_time():
+    before = datetime.now()
+    message = make()
+    after = datetime.now()
+    stamp = datetime.fromisoformat(message.timestamp)
+    assert abs((stamp - before).total_seconds()) < 1
+    assert abs((after - stamp).total_seconds()) < 1
+    assert message.timestamp == message.timestamp
+
+
+def test_to_dict_and_equality():
+    message = make(priority="high")
+    data = message.to_dict()
+    assert set(data) == set(AgentMessage.FIELDS)
+    assert data["priority"] == "high" and data["id"] == message.id
+    assert AgentMessage(**data) == message
+    assert AgentMessage(**{**data, "content": {}}) != message
+    with pytest.raises(TypeError):
+        hash(message)
+    with pytest.raises(AttributeError):
+        message.extra = 1
+
+
+@pytest.mark.parametrize("frozen", [False, True])
+def test_pickle_round_trip_keeps_fields_and_frozen_state(frozen):
+    message = make()
+    if frozen:
+        message.freeze()
+    restored = pickle.loads(pickle.dumps(message))
+    assert restored == message
+    assert restored.frozen is frozen
+    assert restored.id == message.id and restored.timestamp == message.timestamp
+
+
+def test_frozen_message_rejects_changes():
+    message = make().freeze()
+    assert message.frozen and isinstance(message.content, FrozenDict)
+    assert message.freeze() is message
+    with pytest.raises(AttributeError):
+        message.content = {}
+    with pytest.raises(AttributeError):
+        del message.sender
+    with pytest.raises(TypeError):
+        message.content["target"] = "10.0.0.1"
+    assert message.id and message.timestamp
@@ -0,0 +1,117 @@
+import json
+import threading
+import time
+
+import pytest
+
+from tools import ScanAuditLogger
+
+
+def entry(i, day=1):
+    return {"timestamp": f"2024-01-{day:02d}T10:00:00", "action": "SCAN", "target": f"host-{i}", "details": {}}
+
+
+def lines(path):
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return predicate()
+
+
+@pytest.fixture
+def make_logger(tmp_path):
+    created = []
+
+    def make(**options):
+        logger = ScanAuditLogger(log_dir=str(tmp_path), echo=False, **options)
+        created.append(logger)
+        return logger
+
+    yield make
+    for logger in created:
+        logger.close()
+
+
+def test_full_batch_is_written_without_waiting_for_the_interval(make_logger, tmp_path):
+    logger = make_logger(flush_size=3, flush_interval=60)
+    log_file = tmp_path / "scan_log_2024-01-01.jsonl"
+    logger.log(entry(1))
+    logger.log(entry(2))
+    time.sleep(0.2)
+    assert lines(log_file) == []
+
+    logger.log(entry(3))
+    assert wait_for(lambda: len(lines(log_file)) == 3)
+    assert [e["target"] for e in lines(log_file)] == ["host-1", "host-2", "host-3"]
+
+
+def test_partial_batch_is_written_after_one_interval(make_logger, tmp_path):
+    interval = 0.3
+    logger = make_logger(flush_size=1000, flush_interval=interval)
+    log_file = tmp_path / "scan_log_2024-01-01.jsonl"
+    logger.log(entry(1), sync=True)  # the writer is now idle with an empty queue
+
+    started = time.monotonic()
+    logger.log(entry(2))
+    assert wait_for(lambda: len(lines(log_file)) == 2)
+    elapsed = time.monotonic() - started
+    assert interval * 0.5 <= elapsed < interval * 1.6
+
+
+def test_sync_entry_is_on_disk_when_log_returns(make_logger, tmp_path):
+    logger = make_logger(flush_size=1000, flush_interval=60)
+    logger.log(entry(1))
+    logger.log(entry(2), sync=True)
+    assert len(lines(tmp_path / "scan_log_2024-01-01.jsonl")) == 2
+
+
+def test_fsync_always_writes_every_entry_before_returning(make_logger, tmp_path):
+    logger = make_logger(flush_size=1000, flush_interval=60, fsync="always")
+    for i in range(3):
+        logger.log(entry(i))
+        assert len(lines(tmp_path / "scan_log_2024-01-01.jsonl")) == i + 1
+
+
+def test_entries_rotate_into_daily_files(make_logger, tmp_path):
+    logger = make_logger(flush_size=1000, flush_interval=60)
+    for i, day in enumerate([1, 1, 2, 1, 3]):
+        logger.log(entry(i, day))
+    logger.flush()
+    assert [e["target"] for e in lines(tmp_path / "scan_log_2024-01-01.jsonl")] == ["host-0", "host-1", "host-3"]
+    assert [e["target"] for e in lines(tmp_path / "scan_log_2024-01-02.jsonl")] == ["host-2"]
+    assert [e["target"] for e in lines(tmp_path / "scan_log_2024-01-03.jsonl")] == ["host-4"]
+
+
+def test_close_drains_every_queued_entry(make_logger, tmp_path):
+    logger = make_logger(flush_size=7, flush_interval=60)
+
+    def writer(offset):
+        for i in range(250):
+            logger.log(entry(offset + i))
+
+    threads = [threading.Thread(target=writer, args=(n * 1000,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    logger.close()
+
+    written = lines(tmp_path / "scan_log_2024-01-01.jsonl")
+    assert len(written) == 1000
+    assert len({e["target"] for e in written}) == 1000
+
+    logger.log(entry(9999))  # after close: written directly
+    assert len(lines(tmp_path / "scan_log_2024-01-01.jsonl")) == 1001
+
+
+def test_unknown_fsync_policy_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ScanAuditLogger(log_dir=str(tmp_path), fsync="sometimes")
@@ -0,0 +1,93 @@
+import ipaddress
+import random
+
+import pytest
+
+import tools
+from tools import AuthorizationIndex, is_authorized_target
+
+DEFAULT_RANGES = ["192.168.0.0/16", "10.0.0.0/8", "172.16.0.0/12", "127.0.0.0/8"]
+
+
+@pytest.fixture
+def ranges(monkeypatch):
+    """Authorization on, default private ranges, no exclusions, no audit log."""
+    monkeypatch.setitem(tools.SAFETY_CONFIG, "require_authorization", True)
+    monkeypatch.setitem(tools.SAFETY_CONFIG, "authorized_ranges", list(DEFAULT_RANGES))
+    monkeypatch.setitem(tools.SAFETY_CONFIG, "excluded_ranges", [])
+    monkeypatch.setitem(tools.SAFETY_CONFIG, "log_all_scans", False)
+    return tools.SAFETY_CONFIG
+
+
+@pytest.mark.parametrize("target", [
+    "10.0.0.1", "10.255.255.255", "172.16.0.1", "172.31.255.255",
+    "192.168.1.0/24", "172.16.0.0/12", "10.0.0.0/8", " 127.0.0.1 ",
+])
+def test_private_targets_are_authorized(ranges, target):
+    assert is_authorized_target(target)
+
+
+@pytest.mark.parametrize("target", [
+    "172.32.0.1",        # just outside 172.16.0.0/12 (old prefix matching accepted it)
+    "172.15.255.255",
+    "11.0.0.1",
+    "10.0.0.0/7",        # supernet that only partly overlaps 10.0.0.0/8
+    "172.16.0.0/11",
+    "192.168.0.0/15",
+    "0.0.0.0/0",
+    "8.8.8.8",
+])
+def test_outside_or_partial_targets_are_rejected(ranges, target):
+    assert not is_authorized_target(target)
+
+
+@pytest.mark.parametrize("target", ["::1", "fe80::1", "fd00::/8", "::ffff:10.0.0.1"])
+def test_ipv6_is_rejected(ranges, target):
+    assert not is_authorized_target(target)
+
+
+@pytest.mark.parametrize("target", ["", "garbage", "10.0.0.0/33", "999.1.1.1", "10.0.0.1/abc", None, "10.0.0"])
+def test_garbage_is_rejected(ranges, target):
+    assert not is_authorized_target(target)
+
+
+def test_authorization_can_be_disabled(ranges):
+    ranges["require_authorization"] = False
+    assert is_authorized_target("8.8.8.8")
+
+
+def test_excluded_ranges_are_carved_out(ranges):
+    ranges["excluded_ranges"] = ["10.0.5.0/24"]
+    assert is_authorized_target("10.0.4.255")
+    assert not is_authorized_target("10.0.5.7")
+    assert not is_authorized_target("10.0.0.0/16")
+    assert is_authorized_target("10.0.6.0/23")
+
+
+def test_safety_check_blocks_unauthorized_scan(ranges):
+    with pytest.raises(PermissionError):
+        tools.scan_ports("172.32.0.1", [80])
+
+
+def test_adjacent_ranges_merge():
+    index = AuthorizationIndex(["10.0.0.0/25", "10.0.0.128/25"])
+    assert index.intervals == [(int(ipaddress.ip_address("10.0.0.0")), int(ipaddress.ip_address("10.0.0.255")))]
+    assert index.contains_network(ipaddress.ip_network("10.0.0.0/24"))
+
+
+def test_filter_addresses_matches_brute_force_sorted_and_unsorted():
+    index = AuthorizationIndex([f"10.{i}.0.0/24" for i in range(0, 256, 2)], ["10.4.0.128/25"])
+    rng = random.Random(7)
+    addresses = [int(ipaddress.ip_address(f"10.{rng.randrange(256)}.0.{rng.randrange(256)}"))
+                 for _ in range(5000)]
+    expected = [a for a in addresses if any(lo <= a <= hi for lo, hi in index.intervals)]
+
+    assert list(index.filter_addresses(addresses)) == expected
+    assert list(index.filter_addresses(sorted(addresses))) == sorted(expected)
+    assert list(index.filter_addresses(sorted(addresses, reverse=True))) == sorted(expected, reverse=True)
+
+
+def test_authorized_subranges_cover_the_intersection():
+    index = AuthorizationIndex(["10.0.0.0/24", "10.0.2.0/24"], ["10.0.2.128/25"])
+    assert index.authorized_subranges("10.0.0.0/22") == ["10.0.0.0/24", "10.0.2.0/25"]
+    assert index.authorized_subranges("11.0.0.0/24") == []
@@ -0,0 +1,125 @@
+import json
+import pickle
+
+import pytest
+
+from core import (AgentMessage, FrozenDict, FrozenList, SwarmReplay, content_digest, freeze_content,
+                  normalize_events, thaw_content)
+from orchestrator import SwarmOrchestrator
+from swarm_agents import _TestAgent
+
+
+class Inbox(_TestAgent):
+    def __init__(self, name):
+        super().__init__(name, "inbox")
+
+    def process_message(self, message):
+        return None
+
+
+def test_frozen_content_keeps_types_but_rejects_mutation():
+    original = {"ports": [22, 80], "meta": {"tags": {"a"}}, "pair": (1, [2])}
+    content = freeze_content(original)
+    assert isinstance(content, FrozenDict)
+    assert isinstance(content["ports"], list) and content["ports"] == [22, 80]
+    assert content["ports"] + [443] == [22, 80, 443]
+    assert content["meta"]["tags"] == {"a"}
+    assert isinstance(content["pair"], tuple) and isinstance(content["pair"][1], list)
+    for mutate in (lambda: content.__setitem__("x", 1), lambda: content.update(x=1),
+                   lambda: content["meta"].pop("tags"), lambda: content.clear(),
+                   lambda: content["ports"].append(443), lambda: content["ports"].sort(),
+                   lambda: content["ports"].__setitem__(0, 1), lambda: content["pair"][1].extend([3])):
+        with pytest.raises(TypeError):
+            mutate()
+    assert json.loads(json.dumps({"ports": content["ports"], "pair": content["pair"]})) == {"ports": [22, 80], "pair": [1, [2]]}
+    assert type(pickle.loads(pickle.dumps(content))["ports"]) is FrozenList
+    assert original == {"ports": [22, 80], "meta": {"tags": {"a"}}, "pair": (1, [2])}
+    assert type(original["ports"]) is list and type(original["meta"]["tags"]) is set
+
+
+def test_thaw_restores_mutable_types():
+    frozen = freeze_content({"ports": [22, 80], "meta": {"tags": {"a"}, "seen": frozenset({1})}})
+    thawed = thaw_content(frozen)
+    assert thawed == frozen
+    assert type(thawed) is dict and type(thawed["ports"]) is list
+    assert type(thawed["meta"]["tags"]) is set and type(thawed["meta"]["seen"]) is frozenset
+    thawed["ports"].append(443)
+    assert frozen["ports"] == [22, 80]
+
+
+def test_digest_ignores_key_order_and_freezing():
+    assert content_digest({"a": 1, "b": [1, 2]}) == content_digest({"b": [1, 2], "a": 1})
+    assert content_digest({"a": [1, 2]}) == content_digest(freeze_content({"a": [1, 2]}))
+    assert content_digest({"a": 1}) != content_digest({"a": 2})
+
+
+class Appender(_TestAgent):
+    def __init__(self, name):
+        super().__init__(name, "appender")
+        self.seen = []
+
+    def process_message(self, message):
+        ports = message.content["open_ports"]
+        self.seen.append((type(message.content), type(ports), list(ports)))
+        ports.append(443)
+        return None
+
+
+def test_broadcast_handlers_get_mutable_list_content(tmp_path):
+    agents = [Appender(f"A{i}") for i in range(4)]
+    orchestrator = SwarmOrchestrator(agents=agents)
+    orchestrator.replay.log_path = str(tmp_path) + "/"
+
+    content = {"open_ports": [22]}
+    orchestrator.broadcast(AgentMessage(sender="A0", recipient="broadcast", message_type="result",
+                                        content=content), exclude="A0")
+    shared = agents[1].inbox.peek()
+    orchestrator.process_messages()
+    orchestrator.executor.shutdown()
+
+    assert orchestrator.stats["handler_errors"] == 0
+    for agent in agents[1:]:
+        assert agent.seen == [(dict, list, [22])]
+    assert shared.content["open_ports"] == [22]
+    assert content == {"open_ports": [22]}
+
+
+def test_broadcast_shares_one_frozen_copy_and_logs_once(tmp_path):
+    agents = [Inbox(f"A{i}") for i in range(5)]
+    orchestrator = SwarmOrchestrator(agents=agents)
+    orchestrator.replay.log_path = str(tmp_path) + "/"
+    orchestrator.replay.start_session()
+
+    content = {"open_ports": [22]}
+    for _ in range(3):
+        orchestrator.broadcast(AgentMessage(sender="A0", recipient="broadcast", message_type="result",
+                                            content=content), exclude="A0")
+    log_file = orchestrator.replay.save_session()
+    orchestrator.executor.shutdown()
+
+    first = agents[1].inbox.peek()
+    assert first.frozen
+    assert all(agent.inbox.peek() is first for agent in agents[1:])
+    assert len(agents[0].inbox) == 0
+
+    raw = [json.loads(line) for line in open(log_file)]
+    stored = [e for e in raw if e["event_type"] == "message_stored"]
+    sent = [e for e in raw if e["event_type"] == "message_sent"]
+    assert len(stored) == 1 and len(sent) == 3
+    assert sent[0]["data"]["to"] == ["A1", "A2", "A3", "A4"]
+    assert "content" not in sent[0]["data"]
+
+    resolved = [e for e in SwarmReplay.resolve_messages(raw) if e["event_type"] == "message_sent"]
+    assert [e["data"]["content"] for e in resolved] == [content] * 3
+
+
+def test_legacy_per_recipient_events_are_merged():
+    legacy = [
+        {"event_type": "message_sent", "data": {"from": "R", "to": "A", "type": "result", "content": {"x": 1}}},
+        {"event_type": "message_sent", "data": {"from": "R", "to": "B", "type": "result", "content": {"x": 1}}},
+        {"event_type": "message_sent", "data": {"from": "R", "to": "A", "type": "result", "content": {"x": 2}}},
+        {"event_type": "mission_completed", "data": {}},
+    ]
+    events = list(normalize_events(legacy))
+    assert [e["data"].get("to") for e in events] == [["A", "B"], ["A"], None]
+    assert events[0]["data"]["recipient"] == "broadcast"
@@ -0,0 +1,66 @@
+from core import AgentMessage
+from message_router import MessageRouter
+from swarm_agents import _TestAgent
+
+
+class Agent(_TestAgent):
+    def __init__(self, name, capabilities=(), subscriptions=None):
+        super().__init__(name, "test")
+        self.capabilities = list(capabilities)
+        self.subscriptions = subscriptions
+
+    def get_subscriptions(self):
+        return self.subscriptions
+
+    def process_message(self, message):
+        return None
+
+
+def _msg(recipient, message_type="task"):
+    return AgentMessage(sender="x", recipient=recipient, message_type=message_type, content={})
+
+
+def _names(agents):
+    return [agent.name for agent in agents]
+
+
+def _router():
+    router = MessageRouter()
+    router.register(Agent("Legacy"))                                     # subscribes to everything
+    router.register(Agent("Recon", ["scanning"], ["task"]))
+    router.register(Agent("Analyst", ["analysis", "scanning"], ["result"]))
+    router.register(Agent("Reporter", ["reporting"], ["alert", "result"]))
+    return router
+
+
+def test_broadcast_goes_to_subscribers_and_wildcards_in_registration_order():
+    router = _router()
+    assert _names(router.recipients(_msg("broadcast", "result"))) == ["Legacy", "Analyst", "Reporter"]
+    assert _names(router.recipients(_msg("broadcast", "task"))) == ["Legacy", "Recon"]
+    assert _names(router.recipients(_msg("broadcast", "unheard-of"))) == ["Legacy"]
+
+
+def test_capability_and_topic_addresses():
+    router = _router()
+    assert _names(router.recipients(_msg("capability:scanning"))) == ["Recon", "Analyst"]
+    assert router.recipients(_msg("capability:flying")) == []
+    assert _names(router.recipients(_msg("topic:alert"))) == ["Legacy", "Reporter"]
+    assert _names(router.agents_with("reporting")) == ["Reporter"]
+    assert _names(router.subscribers("result")) == ["Legacy", "Analyst", "Reporter"]
+
+
+def test_direct_address_and_exclude():
+    router = _router()
+    assert _names(router.recipients(_msg("Recon"))) == ["Recon"]
+    assert router.recipients(_msg("Nobody")) == []
+    assert _names(router.recipients(_msg("broadcast", "result"), exclude="Analyst")) == ["Legacy", "Reporter"]
+
+
+def test_register_replaces_and_unregister_rebuilds():
+    router = _router()
+    router.register(Agent("Recon", ["scanning"], ["result"]))
+    assert _names(router.recipients(_msg("broadcast", "task"))) == ["Legacy"]
+    router.unregister("Legacy")
+    router.unregister("Ghost")
+    assert _names(router.recipients(_msg("broadcast", "result"))) == ["Recon", "Analyst", "Reporter"]
+    assert router.recipients(_msg("broadcast", "unheard-of")) == []
@@ -0,0 +1,104 @@
+import pytest
+
+import neighbor_table
+from neighbor_table import parse_ip_neigh, parse_local_addresses, read_neighbor_snapshot, read_proc_arp
+
+PROC_ARP = """\
+IP address       HW type     Flags       HW address            Mask     Device
+192.168.1.1      0x1         0x2         aa:bb:cc:dd:ee:01     *        eth0
+192.168.1.20     0x1         0x0         00:00:00:00:00:00     *        eth0
+192.168.1.30     0x1         0x2         00:00:00:00:00:00     *        eth0
+192.168.1.40     0x1         0xZZ        aa:bb:cc:dd:ee:04     *        eth0
+not-an-ip        0x1         0x2         aa:bb:cc:dd:ee:05     *        eth0
+192.168.1.50     0x1
+10.0.0.7         0x1         0x6         aa:bb:cc:dd:ee:07     *        wlan0
+"""
+
+IP_NEIGH = """\
+192.168.1.1 dev eth0 lladdr aa:bb:cc:dd:ee:01 REACHABLE
+192.168.1.2 dev eth0 lladdr aa:bb:cc:dd:ee:02 STALE
+192.168.1.3 dev eth0 lladdr aa:bb:cc:dd:ee:03 delay
+192.168.1.4 dev eth0  FAILED
+192.168.1.5 dev eth0  INCOMPLETE
+192.168.1.6 dev eth0 lladdr aa:bb:cc:dd:ee:06 PERMANENT proto static
+fe80::1 dev eth0 lladdr aa:bb:cc:dd:ee:01 router REACHABLE
+2001:db8::5 dev eth0 lladdr aa:bb:cc:dd:ee:05 STALE
+2001:db8::6 dev eth0  FAILED
+
+garbage line without address
+dev eth0 lladdr aa:bb:cc:dd:ee:09 REACHABLE
+192.168.1.9 dev eth0 lladdr aa:bb:cc:dd:ee:09
+"""
+
+ROUTES = """\
+default via 192.168.1.1 dev eth0 proto dhcp src 192.168.1.100 metric 100
+192.168.1.0/24 dev eth0 proto kernel scope link src 192.168.1.100
+local 127.0.0.0/8 dev lo table local proto kernel scope host src 127.0.0.1
+local 192.168.1.100 dev eth0 table local proto kernel scope host src 192.168.1.100
+broadcast 192.168.1.255 dev eth0 table local proto kernel scope link src 192.168.1.100
+10.8.0.0/24 dev tun0 src
+"""
+
+
+def test_proc_arp_entries_and_malformed_lines(tmp_path):
+    path = tmp_path / "arp"
+    path.write_text(PROC_ARP)
+    neighbors = read_proc_arp(str(path))
+    assert neighbors == {
+        "192.168.1.1": {"mac": "aa:bb:cc:dd:ee:01", "device": "eth0", "state": "STALE"},
+        "192.168.1.20": {"mac": None, "device": "eth0", "state": "INCOMPLETE"},
+        "192.168.1.30": {"mac": None, "device": "eth0", "state": "INCOMPLETE"},
+        "10.0.0.7": {"mac": "aa:bb:cc:dd:ee:07", "device": "wlan0", "state": "STALE"},
+    }
+
+
+def test_proc_arp_missing_file(tmp_path):
+    assert read_proc_arp(str(tmp_path / "missing")) == {}
+
+
+def test_ip_neigh_states_and_ipv6():
+    neighbors = parse_ip_neigh(IP_NEIGH)
+    states = {ip: entry["state"] for ip, entry in neighbors.items()}
+    assert states == {
+        "192.168.1.1": "REACHABLE",
+        "192.168.1.2": "STALE",
+        "192.168.1.3": "DELAY",
+        "192.168.1.4": "FAILED",
+        "192.168.1.5": "INCOMPLETE",
+        "192.168.1.6": "PERMANENT",
+        "fe80::1": "REACHABLE",
+        "2001:db8::5": "STALE",
+        "2001:db8::6": "FAILED",
+        "192.168.1.9": None,
+    }
+    assert neighbors["fe80::1"] == {"mac": "aa:bb:cc:dd:ee:01", "device": "eth0", "state": "REACHABLE"}
+    assert neighbors["192.168.1.4"]["mac"] is None
+    assert parse_ip_neigh("") == {}
+
+
+def test_local_addresses_from_routes():
+    assert parse_local_addresses(ROUTES) == {"192.168.1.100", "127.0.0.1"}
+    assert parse_local_addresses("") == set()
+
+
+@pytest.fixture
+def kernel(monkeypatch, tmp_path):
+    path = tmp_path / "arp"
+    path.write_text(PROC_ARP)
+    monkeypatch.setitem(neighbor_table.NEIGHBOR_CONFIG, "enabled", True)
+    monkeypatch.setitem(neighbor_table.NEIGHBOR_CONFIG, "proc_arp_path", str(path))
+    outputs = {("neigh", "show"): IP_NEIGH, ("route", "show"): ROUTES, ("route", "show", "table", "local"): ""}
+    monkeypatch.setattr(neighbor_table, "_run_ip", lambda *args: outputs.get(args, ""))
+
+
+def test_snapshot_prefers_ip_neigh_states(kernel):
+    snapshot = read_neighbor_snapshot()
+    assert snapshot["trusted"] == {"192.168.1.1", "192.168.1.6", "fe80::1"}
+    assert snapshot["likely"] == {"192.168.1.2", "192.168.1.3", "2001:db8::5", "10.0.0.7"}
+    assert snapshot["failed"] == {"192.168.1.4", "192.168.1.5", "2001:db8::6", "192.168.1.20", "192.168.1.30"}
+    assert snapshot["local"] == {"192.168.1.100", "127.0.0.1"}
+
+
+def test_snapshot_disabled(kernel, monkeypatch):
+    monkeypatch.setitem(neighbor_table.NEIGHBOR_CONFIG, "enabled", False)
+    assert read_neighbor_snapshot() == {"trusted": set(), "likely": set(), "failed": set(), "local": set()}
@@ -0,0 +1,99 @@
+import asyncio
+import time
+from collections import Counter
+
+import pytest
+
+import tools
+from tools import ScanSummary
+
+
+def test_host_events_stream_before_the_scan_finishes(simulator, monkeypatch):
+    monkeypatch.setitem(tools.SAFETY_CONFIG, "max_concurrent_host_scans", 1)
+    sim = simulator("127.84.0.0/29", open_ports=[22], accept_delay=0.15)
+
+    started = time.monotonic()
+    arrivals = []
+    for event in tools.iter_network_scan(sim.network, ports=[22]):
+        arrivals.append((event["event"], time.monotonic() - started))
+
+    assert [kind for kind, _ in arrivals] == ["host"] * len(sim.hosts) + ["completed"]
+    first_host, completed = arrivals[0][1], arrivals[-1][1]
+    assert first_host < completed / 2
+
+
+def test_summary_counts_match_the_streamed_hosts(simulator):
+    sim = simulator("127.85.0.0/30", open_ports=[22, 80])
+    events = list(tools.iter_network_scan("127.85.0.0/29", ports=[22, 80, 443]))
+    hosts, completed = [e for e in events if e["event"] == "host"], events[-1]
+    assert completed["event"] == "completed" and len(hosts) == 6
+
+    risks = Counter()
+    for seen, event in enumerate(hosts, start=1):
+        risks[event["host"]["risk_assessment"]["overall_risk"]] += 1
+        assert event["summary"] == {
+            "total_active": seen,
+            "high_risk_hosts": risks["HIGH"],
+            "medium_risk_hosts": risks["MEDIUM"],
+            "low_risk_hosts": risks["LOW"],
+        }
+
+    report = completed["report"]
+    assert report["summary"] == hosts[-1]["summary"]
+    assert report["total_hosts_scanned"] == 6
+    assert report["hosts_with_open_ports"] == len(sim.hosts)
+    assert [host["ip"] for host in report["targets"]] == [f"127.85.0.{i}" for i in range(1, 7)]
+    assert {host["ip"] for host in report["targets"] if host["open_ports"]} == set(sim.hosts)
+
+
+def test_scan_summary_sorts_targets_and_reports_an_empty_scan():
+    assert ScanSummary("10.0.0.0/30").to_report()["targets"] == []
+
+    summary = ScanSummary("10.0.0.0/24")
+    for ip, ports, risk in (("10.0.0.10", [22], "HIGH"), ("10.0.0.9", [], "LOW"), ("10.0.0.2", [80], "UNKNOWN")):
+        summary.add({"ip": ip, "open_ports": ports, "risk_assessment": {"overall_risk": risk}})
+    report = summary.to_report()
+    assert [host["ip"] for host in report["targets"]] == ["10.0.0.2", "10.0.0.9", "10.0.0.10"]
+    assert report["hosts_with_open_ports"] == 2
+    assert report["summary"] == {"total_active": 3, "high_risk_hosts": 1,
+                                 "medium_risk_hosts": 0, "low_risk_hosts": 1}
+
+
+def test_scan_ports_async_classifies_ports_and_probes_concurrently(simulator):
+    sim = simulator("127.86.0.0/32", open_ports=[22, 80], filtered_ports=[7001, 7002, 7003, 7004])
+    ports = [22, 80, 7001, 7002, 7003, 7004, 8081]
+
+    started = time.monotonic()
+    result = asyncio.run(tools.scan_ports_async(sim.hosts[0], ports, timeout=0.3))
+    elapsed = time.monotonic() - started
+
+    assert result["target"] == sim.hosts[0]
+    assert sorted(result["open_ports"]) == [22, 80]
+    assert sorted(result["filtered_ports"]) == [7001, 7002, 7003, 7004]
+    assert result["closed_ports"] == [8081]
+    assert result["total_scanned"] == len(ports)
+    assert elapsed < 4 * 0.3  # the four filtered timeouts overlap
+    assert tools.scan_ports(sim.hosts[0], ports, timeout=0.3)["open_ports"] == result["open_ports"]
+
+
+@pytest.mark.parametrize("network, expected", [
+    ("127.87.0.0/29", [f"127.87.0.{i}" for i in range(1, 7)]),
+    ("127.87.0.8/30", ["127.87.0.9", "127.87.0.10"]),
+    ("127.87.0.20/31", ["127.87.0.20", "127.87.0.21"]),
+    ("127.87.0.33", ["127.87.0.33"]),
+    ("127.87.0.33/32", ["127.87.0.33"]),
+    ("127.87.0.5/29", [f"127.87.0.{i}" for i in range(1, 7)]),
+])
+def test_discover_hosts_expands_any_prefix(scan_lab, network, expected):
+    assert tools.expand_network_range(network) == expected
+    hosts = tools.discover_hosts(network, timeout=0.3)
+    assert [host["ip"] for host in hosts] == expected
+    assert all(host["status"] == "active" for host in hosts)
+
+
+def test_discover_hosts_spans_several_slash_24s(scan_lab):
+    assert len(tools.expand_network_range("127.88.0.0/22")) == 1022
+    hosts = asyncio.run(tools.discover_hosts_async("127.88.0.0/23", timeout=0.3))
+    assert len(hosts) == 510
+    assert hosts[0]["ip"] == "127.88.0.1" and hosts[-1]["ip"] == "127.88.1.254"
+    assert "127.88.0.255" in {host["ip"] for host in hosts}
@@ -0,0 +1,136 @@
+import io
+import os
+import stat
+import sys
+
+import pytest
+
+from pi_core.nmap_stream import NmapError, format_host, iter_nmap_xml, iter_summary_chunks, stream_nmap
+
+NMAP_XML = b"""<?xml version="1.0"?>
+<nmaprun>
+<host><status state="up"/><address addr="10.0.0.1" addrtype="ipv4"/><address addr="AA:BB" addrtype="mac"/>
+<hostnames><hostname name="gw.lan"/></hostnames>
+<ports><extraports state="closed" count="997"/>
+<port protocol="tcp" portid="22"><state state="open" reason="syn-ack"/><service name="ssh" product="OpenSSH" version="9.6"/></port>
+<port protocol="tcp" portid="80"><state state="filtered" reason="no-response"/></port>
+</ports></host>
+<host><status state="down"/><address addr="10.0.0.2" addrtype="ipv4"/></host>
+<runstats><finished elapsed="3.5" summary="Nmap done"/><hosts up="1" down="1"/></runstats>
+</nmaprun>
+"""
+
+
+class Trickle(io.BytesIO):
+    """Hands out a few bytes per read, like a pipe from a running nmap."""
+
+    def read1(self, size=-1):
+        return super().read(7)
+
+
+def test_records_stream_in_document_order():
+    records = list(iter_nmap_xml(Trickle(NMAP_XML)))
+    assert [r["type"] for r in records] == ["port", "port", "host", "host", "finished"]
+    ssh = records[0]
+    assert (ssh["host"], ssh["port"], ssh["state"], ssh["product"]) == ("10.0.0.1", 22, "open", "OpenSSH")
+    host = records[2]
+    assert host["mac"] == "AA:BB" and host["hostnames"] == ["gw.lan"]
+    assert host["extraports"] == [{"state": "closed", "count": 997}]
+    assert records[-1] == {"type": "finished", "elapsed": 3.5, "summary": "Nmap done",
+                           "hosts_up": 1, "hosts_down": 1}
+
+
+def test_format_host_summarises_other_states():
+    host = [r for r in iter_nmap_xml(io.BytesIO(NMAP_XML)) if r["type"] == "host"][0]
+    assert format_host(host) == (
+        "Host 10.0.0.1 (gw.lan) up\n"
+        "  22/tcp open ssh OpenSSH 9.6\n"
+        "  not shown: 997 closed, 1 filtered"
+    )
+
+
+def _host(n):
+    return {"type": "host", "status": "up", "address": f"10.0.0.{n}", "hostnames": [],
+            "ports": [], "extraports": []}
+
+
+@pytest.mark.parametrize("max_chars", [20, 40, 60, 200])
+def test_chunks_including_totals_respect_max_chars(max_chars):
+    records = [_host(n) for n in range(1, 6)] + [{"type": "finished", "summary": "done"}]
+    chunks = list(iter_summary_chunks(records, max_chars=max_chars))
+    # a single line longer than max_chars (host or totals) becomes its own chunk
+    longest_line = len("Hosts up: 5, open ports: 0 (done)")
+    assert all(len(chunk) <= max(max_chars, longest_line) for chunk in chunks)
+    assert chunks[-1].endswith("Hosts up: 5, open ports: 0 (done)")
+    assert sum(chunk.count("Host 10.0.0.") for chunk in chunks) == 5
+
+
+def test_down_hosts_and_ports_are_not_chunked():
+    chunks = list(iter_summary_chunks(iter_nmap_xml(io.BytesIO(NMAP_XML))))
+    assert chunks == [format_host([r for r in iter_nmap_xml(io.BytesIO(NMAP_XML)) if r["type"] == "host"][0])
+                      + "\nHosts up: 1, open ports: 1 (Nmap done)"]
+
+
+def _fake_nmap(tmp_path, body):
+    script = tmp_path / "nmap"
+    script.write_text(f"#!{sys.executable}\nimport sys\n{body}\n")
+    script.chmod(script.stat().st_mode | stat.S_IXUSR)
+    return str(script)
+
+
+@pytest.mark.skipif(os.name != "posix", reason="uses an executable script as nmap")
+def test_large_stderr_does_not_deadlock(tmp_path):
+    nmap = _fake_nmap(tmp_path, (
+        "sys.stderr.write('w' * 400000 + 'last warning')\n"
+        f"sys.stdout.buffer.write({NMAP_XML!r})\n"
+        "sys.exit(2)"
+    ))
+    records = []
+    with pytest.raises(NmapError) as error:
+        for record in stream_nmap("10.0.0.1", nmap_path=nmap):
+            records.append(record["type"])
+    assert records[-1] == "finished"
+    assert str(error.value).endswith("last warning")
+    assert len(str(error.value)) <= 4096
+
+
+@pytest.mark.skipif(os.name != "posix", reason="uses an executable script as nmap")
+def test_invalid_xml_raises(tmp_path):
+    nmap = _fake_nmap(tmp_path, "sys.stdout.write('<nmaprun><host></nmaprun>')")
+    with pytest.raises(NmapError, match="Invalid nmap XML"):
+        list(stream_nmap("10.0.0.1", nmap_path=nmap))
+
+
+def test_missing_nmap_raises(tmp_path):
+    with pytest.raises(NmapError, match="not found"):
+        list(stream_nmap("10.0.0.1", nmap_path=str(tmp_path / "no-nmap")))
+
+
+def test_scan_target_returns_text_and_iter_scan_target_streams(monkeypatch):
+    import pi
+    from pi_core import nmap_stream
+
+    monkeypatch.setattr(nmap_stream, "stream_nmap", lambda target: iter_nmap_xml(io.BytesIO(NMAP_XML)))
+    tools = pi.PiSwarmTools()
+    chunks = list(tools.iter_scan_target("10.0.0.0/30"))
+    text = tools.scan_target("10.0.0.0/30")
+    assert isinstance(text, str) and text == "\n".join(chunks)
+    assert "22/tcp open ssh OpenSSH 9.6" in text
+
+    prompts = []
+    gateway = pi.OpenClawGateway()
+    monkeypatch.setattr(gateway, "ask_ai", lambda prompt, context="": prompts.append(prompt) or "ok")
+    assert gateway._cmd_scan("10.0.0.0/30") == "ok"
+    assert len(prompts) == 1 and text in prompts[0]
+
+
+def test_scan_target_reports_nmap_errors_as_text(monkeypatch):
+    import pi
+    from pi_core import nmap_stream
+
+    def failing(target):
+        raise NmapError("nmap not found")
+        yield
+
+    monkeypatch.setattr(nmap_stream, "stream_nmap", failing)
+    assert pi.PiSwarmTools().scan_target("10.0.0.1") == "Error: nmap not found"
@@ -0,0 +1,135 @@
+import asyncio
+import time
+
+import pytest
+
+from core import AgentMessage, iter_session_file
+from orchestrator import MISSION_COMPLETE, SwarmOrchestrator
+from swarm_agents import Sleeper, swarm
+from swarm_agents import _TestAgent
+
+
+@pytest.fixture
+def make_orchestrator(tmp_path):
+    created = []
+
+    def make(agents, **kwargs):
+        orchestrator = SwarmOrchestrator(agents=agents, **kwargs)
+        orchestrator.replay.log_path = str(tmp_path) + "/"
+        created.append(orchestrator)
+        return orchestrator
+
+    yield make
+    for orchestrator in created:
+        orchestrator.executor.shutdown()
+
+
+def _senders(log_file):
+    return [e["data"]["from"] for e in iter_session_file(log_file) if e["event_type"] == "message_sent"]
+
+
+@pytest.mark.parametrize("async_mode", [False, True], ids=["sync", "async"])
+def test_mission_runs_the_whole_chain(make_orchestrator, async_mode):
+    orchestrator = make_orchestrator(swarm())
+    if async_mode:
+        log_file = asyncio.run(orchestrator.start_mission_async("m", "10.0.0.1", timeout=5))
+    else:
+        log_file = orchestrator.start_mission("m", "10.0.0.1")
+
+    assert _senders(log_file) == ["Planner", "Recon", "Analyst", "Reporter"]
+    assert orchestrator.stats["alerts_triggered"] == 1
+    assert orchestrator.agents["Reporter"].alerts == 1
+
+
+def test_async_mission_overlaps_slow_handlers(make_orchestrator):
+    orchestrator = make_orchestrator([Sleeper("A", 0.3), Sleeper("B", 0.3), Sleeper("C", 0.3)])
+
+    async def run():
+        consumers = orchestrator._start_consumers()
+        try:
+            orchestrator.broadcast(AgentMessage(sender="Orchestrator", recipient="broadcast",
+                                                message_type="task", content={}))
+            started = time.monotonic()
+            assert await orchestrator._wait_quiescent(5)
+            return time.monotonic() - started
+        finally:
+            await orchestrator._stop_consumers(consumers)
+
+    elapsed = asyncio.run(run())
+    assert elapsed < 0.6  # three 0.3 s handlers ran side by side
+    assert orchestrator.stats["messages_processed"] == 3
+
+
+class PingPong(_TestAgent):
+    """Would keep the swarm busy forever without an explicit completion."""
+
+    def __init__(self, name, peer, stop_after=None):
+        super().__init__(name, "pingpong")
+        self.peer = peer
+        self.stop_after = stop_after
+        self.count = 0
+
+    def process_message(self, message):
+        self.count += 1
+        if self.stop_after and self.count >= self.stop_after:
+            return AgentMessage(sender=self.name, recipient="broadcast", message_type=MISSION_COMPLETE, content={})
+        return AgentMessage(sender=self.name, recipient=self.peer, message_type="task", content={"n": self.count})
+
+
+def test_mission_complete_message_ends_a_busy_mission(make_orchestrator):
+    ping, pong = PingPong("Ping", "Pong", stop_after=5), PingPong("Pong", "Ping")
+    orchestrator = make_orchestrator([ping, pong])
+
+    async def run():
+        consumers = orchestrator._start_consumers()
+        try:
+            orchestrator.dispatch(AgentMessage(sender="x", recipient="Ping", message_type="task", content={}))
+            return await orchestrator._wait_quiescent(5)
+        finally:
+            await orchestrator._stop_consumers(consumers)
+
+    started = time.monotonic()
+    assert asyncio.run(run())
+    assert time.monotonic() - started < 2
+    assert ping.count == 5
+
+
+def test_timeout_is_reported_when_the_swarm_never_settles(make_orchestrator, capsys):
+    orchestrator = make_orchestrator([PingPong("Ping", "Pong"), PingPong("Pong", "Ping")])
+
+    async def run():
+        consumers = orchestrator._start_consumers()
+        try:
+            orchestrator.dispatch(AgentMessage(sender="x", recipient="Ping", message_type="task", content={}))
+            return await orchestrator._wait_quiescent(0.2)
+        finally:
+            await orchestrator._stop_consumers(consumers)
+
+    assert asyncio.run(run()) is False
+
+
+class Broken(_TestAgent):
+    def __init__(self):
+        super().__init__("Broken", "broken")
+
+    def process_message(self, message):
+        raise RuntimeError("boom")
+
+
+def test_handler_errors_do_not_stop_the_mission(make_orchestrator):
+    orchestrator = make_orchestrator(swarm() + [Broken()])
+    log_file = asyncio.run(orchestrator.start_mission_async("m", "10.0.0.1", timeout=5))
+    assert orchestrator.stats["handler_errors"] >= 1
+    assert "Reporter" in _senders(log_file)
+
+
+def test_timeout_bounds_the_whole_mission_including_the_report(make_orchestrator, capsys):
+    ping, pong = PingPong("Ping", "Pong"), PingPong("Pong", "Ping")
+    orchestrator = make_orchestrator([ping, pong, Sleeper("Reporter", 1.0)])
+    orchestrator._deliver(ping, AgentMessage(sender="x", recipient="Ping", message_type="task", content={}))
+
+    started = time.monotonic()
+    asyncio.run(orchestrator.start_mission_async("m", "10.0.0.1", timeout=0.4))
+    assert time.monotonic() - started < 0.7
+    out = capsys.readouterr().out
+    assert "انتهت مهلة المهمة" in out and "قبل اكتمال التقرير" in out
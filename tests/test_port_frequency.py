@@ -0,0 +1,34 @@
+from port_frequency import MAX_PORT, SERVICE_PORTS, TOP_PORTS, frequency_ordered_ports
+
+
+def test_top_ports_come_first_then_services_without_repeats():
+    ordered = frequency_ordered_ports()
+    assert ordered[:len(TOP_PORTS)] == list(TOP_PORTS)
+    services = [port for port in dict.fromkeys(SERVICE_PORTS) if port not in TOP_PORTS]
+    assert 88 in TOP_PORTS and 88 in SERVICE_PORTS and 88 not in services
+    head = len(TOP_PORTS) + len(services)
+    assert ordered[len(TOP_PORTS):head] == services
+
+
+def test_every_port_appears_exactly_once():
+    ordered = frequency_ordered_ports()
+    assert len(ordered) == MAX_PORT
+    assert sorted(ordered) == list(range(1, MAX_PORT + 1))
+
+
+def test_tail_is_the_rest_of_the_range_in_ascending_order():
+    ordered = frequency_ordered_ports()
+    head = set(TOP_PORTS) | set(SERVICE_PORTS)
+    tail = ordered[len(head):]
+    assert tail == [port for port in range(1, MAX_PORT + 1) if port not in head]
+    assert tail[0] == 1 and tail[-1] == MAX_PORT
+    first_registered = next(i for i, port in enumerate(tail) if port >= 1024)
+    assert all(port < 1024 for port in tail[:first_registered])
+
+
+def test_excluded_ports_are_dropped_from_head_and_tail():
+    ordered = frequency_ordered_ports(exclude=[80, 6379, 4444, 70000])
+    assert len(ordered) == MAX_PORT - 3
+    assert not {80, 6379, 4444} & set(ordered)
+    assert ordered[0] == 23
+    assert ordered == [port for port in frequency_ordered_ports() if port not in (80, 6379, 4444)]
@@ -0,0 +1,116 @@
+import json
+import random
+
+import pytest
+
+from port_state import MAX_PORT, PortScanResult, PortSet, PortStateMap
+
+
+def test_portset_set_operations_match_python_sets():
+    rng = random.Random(11)
+    a = {rng.randrange(MAX_PORT + 1) for _ in range(500)} | {0, MAX_PORT}
+    b = {rng.randrange(MAX_PORT + 1) for _ in range(500)} | {MAX_PORT}
+    pa, pb = PortSet.from_ports(a), PortSet.from_ports(b)
+
+    assert (pa | pb).to_list() == sorted(a | b)
+    assert (pa & pb).to_list() == sorted(a & b)
+    assert (pa - pb).to_list() == sorted(a - b)
+    assert (pa ^ pb).to_list() == sorted(a ^ b)
+    assert len(pa) == len(a)
+    assert list(pa) == sorted(a)
+    assert MAX_PORT in pa and 0 in pa and -1 not in pa
+
+
+def test_portset_equality_and_truthiness():
+    assert PortSet.from_ports([22, 80]) == PortSet.from_ports([80, 22, 22])
+    assert PortSet.from_ports([22]) != PortSet.from_ports([23])
+    assert len({PortSet.from_ports([1]), PortSet.from_ports([1])}) == 1
+    assert not PortSet() and PortSet.from_ports([1])
+
+
+def test_state_map_set_get_and_overwrite():
+    states = PortStateMap()
+    assert states.get(22) is None and 22 not in states
+    states.set(22, "open")
+    states.set(23, "closed")
+    states.set(MAX_PORT, "filtered")
+    assert (states.get(22), states.get(23), states.get(MAX_PORT)) == ("open", "closed", "filtered")
+
+    states.set(22, "closed")
+    assert states.get(22) == "closed"
+    assert states.ports("closed").to_list() == [22, 23]
+    assert states.count("open") == 0 and len(states) == 3
+
+
+def test_state_map_rejects_bad_input():
+    states = PortStateMap()
+    with pytest.raises(ValueError):
+        states.set(MAX_PORT + 1, "open")
+    with pytest.raises(ValueError):
+        states.set(-1, "open")
+    with pytest.raises(KeyError):
+        states.set(80, "half-open")
+    with pytest.raises(ValueError):
+        states.ports("half-open")
+
+
+def test_full_range_stays_within_16kb():
+    states = PortStateMap()
+    for port in range(1, MAX_PORT + 1):
+        states.set(port, "closed")
+    assert states.nbytes == 2 * ((MAX_PORT >> 3) + 1)
+    assert states.count("closed") == MAX_PORT
+
+
+def test_merge_prefers_newer_states():
+    older = PortStateMap.from_result({"open_ports": [22, 80], "closed_ports": [443], "filtered_ports": [8080]})
+    newer = PortStateMap.from_result({"closed_ports": [22], "open_ports": [443, 9000]})
+    merged = older.merge(newer)
+    assert dict(merged.items()) == {22: "closed", 80: "open", 443: "open", 8080: "filtered", 9000: "open"}
+
+
+def test_diff_only_covers_ports_in_both_scans():
+    previous = PortStateMap.from_result({"open_ports": [22, 80], "closed_ports": [443]})
+    current = PortStateMap.from_result({"open_ports": [80, 443], "closed_ports": [22], "filtered_ports": [25]})
+    diff = current.diff(previous)
+    assert diff["opened"].to_list() == [443]
+    assert diff["closed"].to_list() == [22]
+    assert diff["changed"].to_list() == [22, 443]  # 25 was never scanned before
+
+
+def test_scan_result_reads_like_the_old_dict():
+    states = PortStateMap.from_result({"open_ports": [80, 22], "closed_ports": [23], "filtered_ports": [25]})
+    result = PortScanResult("10.0.0.1", states, scan_time="2026-01-01T00:00:00", coverage={"percent": 100})
+
+    assert list(result) == ["target", "scan_time", "open_ports", "closed_ports",
+                            "filtered_ports", "total_scanned", "coverage"]
+    assert result["open_ports"] == [22, 80]
+    assert result["total_scanned"] == 4
+    assert result.count("filtered") == 1
+    assert result.get("missing") is None
+
+
+def test_to_dict_round_trip_through_json():
+    original = {"open_ports": [22, 443], "closed_ports": [23, 80], "filtered_ports": [8080]}
+    result = PortScanResult("10.0.0.1", PortStateMap.from_result(original), total_scanned=5)
+
+    data = json.loads(json.dumps(result.to_dict()))
+    assert data["target"] == "10.0.0.1" and data["total_scanned"] == 5
+    for key, ports in original.items():
+        assert data[key] == ports
+
+    rebuilt = PortStateMap.from_result(data)
+    assert dict(rebuilt.items()) == dict(result.states.items())
+
+
+def test_public_scan_functions_return_json_ready_dicts(monkeypatch):
+    import tools
+
+    async def fake_engine(target_ip, ports=None, timeout=0.5, connections=None):
+        return PortScanResult(target_ip, PortStateMap.from_result({"open_ports": [22]}))
+
+    monkeypatch.setattr(tools, "_scan_ports_engine", fake_engine)
+    monkeypatch.setitem(tools.SAFETY_CONFIG, "log_all_scans", False)
+    result = tools.scan_ports("127.0.0.1", [22])
+    assert type(result) is dict
+    assert json.loads(json.dumps(result))["open_ports"] == [22]
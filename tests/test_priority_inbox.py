@@ -0,0 +1,73 @@
+import pickle
+
+import pytest
+
+from core import AgentMessage, BaseAgent, PriorityInbox, priority_rank
+
+
+def _msg(n, priority="normal"):
+    return AgentMessage(sender="a", recipient="b", message_type="task", content={"n": n}, priority=priority)
+
+
+def _drain(inbox):
+    out = []
+    while inbox:
+        out.append(inbox.popleft().content["n"])
+    return out
+
+
+def test_higher_priority_first_fifo_within_level():
+    inbox = PriorityInbox()
+    for n, priority in enumerate(["low", "normal", "critical", "high", "normal", "critical", "low"]):
+        inbox.append(_msg(n, priority))
+    assert _drain(inbox) == [2, 5, 3, 1, 4, 0, 6]
+
+
+def test_unknown_priority_is_treated_as_normal():
+    inbox = PriorityInbox([_msg(0, "normal"), _msg(1, "urgent!!"), _msg(2, None), _msg(3, "high")])
+    assert priority_rank("urgent!!") == priority_rank("normal")
+    assert inbox.counts() == {"critical": 0, "high": 1, "normal": 3, "low": 0}
+    assert _drain(inbox) == [3, 0, 1, 2]
+
+
+def test_peek_head_rank_and_len():
+    inbox = PriorityInbox()
+    assert inbox.peek() is None and inbox.head_rank() is None
+    assert len(inbox) == 0 and not inbox
+    inbox.append(_msg(0, "low"))
+    inbox.append(_msg(1, "high"))
+    assert inbox.peek().content["n"] == 1
+    assert inbox.head_rank() == priority_rank("high")
+    assert len(inbox) == 2 and inbox
+
+
+def test_iteration_does_not_consume():
+    inbox = PriorityInbox([_msg(0, "low"), _msg(1, "critical")])
+    assert [m.content["n"] for m in inbox] == [1, 0]
+    assert len(inbox) == 2
+
+
+def test_empty_pop_and_clear():
+    inbox = PriorityInbox([_msg(0)])
+    inbox.clear()
+    assert len(inbox) == 0
+    with pytest.raises(IndexError):
+        inbox.popleft()
+
+
+class _Agent(BaseAgent):
+    def process_message(self, message):
+        return None
+
+    def get_capabilities(self):
+        return []
+
+
+def test_send_message_carries_priority_and_agents_pickle_without_inbox():
+    agent = _Agent("A", "role")
+    message = agent.send_message("B", "alert", {"x": 1}, priority="critical")
+    assert message.priority == "critical"
+
+    agent.inbox.append(_msg(0))
+    copy = pickle.loads(pickle.dumps(agent))
+    assert len(copy.inbox) == 0 and len(agent.inbox) == 1
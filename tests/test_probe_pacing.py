@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+import rate_limiter
+import tools
+
+
+@pytest.fixture
+def paced(monkeypatch):
+    """In-process limiter at 20 ms per /24, with reservations recorded."""
+    rate_limiter._stores.clear()
+    tools._rate_limiters.clear()
+    monkeypatch.setitem(tools.SAFETY_CONFIG, "rate_limit_ms", 20)
+    monkeypatch.setitem(tools.SAFETY_CONFIG, "rate_limit_burst", 1)
+    monkeypatch.setitem(tools.SAFETY_CONFIG, "rate_limit_shared", False)
+    monkeypatch.setitem(tools.SAFETY_CONFIG, "log_all_scans", False)
+    monkeypatch.setitem(tools.SAFETY_CONFIG, "require_authorization", True)
+    monkeypatch.setitem(tools.SAFETY_CONFIG, "authorized_ranges", ["127.0.0.0/8", "10.0.0.0/8"])
+
+    reservations = []
+    reserve = rate_limiter.SubnetRateLimiter.reserve
+
+    def recording(self, ip, deadline=None):
+        reservations.append((self.bucket, ip))
+        return reserve(self, ip, deadline)
+
+    monkeypatch.setattr(rate_limiter.SubnetRateLimiter, "reserve", recording)
+    yield reservations
+    tools._rate_limiters.clear()
+    rate_limiter._stores.clear()
+
+
+def _fake_probe(monkeypatch, answers):
+    connects = []
+
+    async def probe(ip, port, timeout, connections=None, adaptive=True):
+        connects.append(port)
+        return answers.get(port, "filtered")
+
+    monkeypatch.setattr(tools, "_probe_tcp", probe)
+    return connects
+
+
+def test_dead_host_takes_one_scan_token_per_connect(paced, monkeypatch):
+    connects = _fake_probe(monkeypatch, {})
+    detected = asyncio.run(tools._probe_host_alive("10.0.0.9", [80, 443, 22], 0.1))
+    assert detected is None
+    assert connects == [80, 443, 22]
+    assert paced == [("scan", "10.0.0.9")] * 3
+
+
+def test_live_host_stops_connecting_after_the_first_answer(paced, monkeypatch):
+    connects = _fake_probe(monkeypatch, {80: "open"})
+    detected = asyncio.run(tools._probe_host_alive("10.0.0.9", [80, 443, 22, 445, 3389], 0.1))
+    assert detected == "port_80"
+    assert connects == [80]
+    assert len(paced) <= 2  # at most one slot reserved while the answer arrived
+
+
+def test_refused_port_proves_the_host_alive(paced, monkeypatch):
+    _fake_probe(monkeypatch, {80: "closed"})
+    assert asyncio.run(tools._probe_host_alive("10.0.0.9", [80, 443], 0.1)) == "port_80_refused"
+
+
+def test_fingerprint_reconnects_are_paced(paced, monkeypatch):
+    seen = []
+
+    async def grab(ip, port, connection=None, connect_timeout=1.0, pacer=None):
+        seen.append(pacer)
+        await pacer.wait(ip)
+        return {"port": port, "service": None}
+
+    monkeypatch.setattr(tools, "grab_fingerprint", grab)
+    asyncio.run(tools._fingerprint_engine("10.0.0.9", [22, 80]))
+    assert all(isinstance(p, tools.ProbePacer) for p in seen)
+    assert paced == [("scan", "10.0.0.9")] * 2
+
+
+def test_full_scan_stops_cleanly_when_the_budget_runs_out(paced, monkeypatch):
+    _fake_probe(monkeypatch, {1001: "open"})
+    monkeypatch.setitem(tools.SAFETY_CONFIG, "rate_limit_ms", 50)
+    events = list(tools.iter_full_port_scan("127.0.0.1", time_budget=0.2,
+                                            ports=list(range(1000, 1100))))
+    completed = events[-1]
+    assert completed["event"] == "completed"
+    coverage = completed["result"]["coverage"]
+    assert coverage["budget_exhausted"] is True
+    assert 0 < coverage["scanned"] < 100
+    assert completed["result"]["open_ports"] == [1001]
+    assert {"event": "open", "port": 1001, "risk": "LOW"} in events
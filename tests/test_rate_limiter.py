@@ -0,0 +1,126 @@
+import asyncio
+import os
+import stat
+import struct
+import time
+
+import pytest
+
+import rate_limiter
+from rate_limiter import MAX_BACKLOG_SECONDS, SubnetRateLimiter
+
+
+@pytest.fixture(autouse=True)
+def fresh_stores():
+    rate_limiter._stores.clear()
+    yield
+    rate_limiter._stores.clear()
+
+
+def _limiter(tmp_path, interval_ms=100, **kwargs):
+    return SubnetRateLimiter(interval_ms, storage_dir=str(tmp_path / "limits"), **kwargs)
+
+
+def test_gcra_spaces_reservations_by_interval(tmp_path):
+    limiter = _limiter(tmp_path, 100)
+    waits = [limiter.reserve("10.0.0.1") for _ in range(4)]
+    assert waits[0] == 0.0
+    for expected, wait in zip((0.1, 0.2, 0.3), waits[1:]):
+        assert wait == pytest.approx(expected, abs=0.02)
+
+
+def test_burst_allows_back_to_back_probes(tmp_path):
+    limiter = _limiter(tmp_path, 100, burst=3)
+    waits = [limiter.reserve("10.0.0.1") for _ in range(4)]
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert waits[3] == pytest.approx(0.1, abs=0.02)
+
+
+def test_buckets_are_per_subnet(tmp_path):
+    limiter = _limiter(tmp_path, 100, prefix=24)
+    assert limiter.reserve("10.0.0.1") == 0.0
+    assert limiter.reserve("10.0.0.200") > 0      # same /24
+    assert limiter.reserve("10.0.1.1") == 0.0     # next /24
+    assert limiter.key_for("fd00::1") == limiter.key_for("fd00::ffff")  # IPv6 uses /64
+
+
+def test_deadline_refuses_without_consuming(tmp_path):
+    limiter = _limiter(tmp_path, 200)
+    assert limiter.reserve("10.0.0.1") == 0.0
+    # the next slot is 200 ms away: past a 50 ms deadline
+    assert limiter.reserve("10.0.0.1", deadline=time.monotonic() + 0.05) is None
+    assert limiter.reserve("10.0.0.1") == pytest.approx(0.2, abs=0.03)
+
+
+def test_acquire_sleeps_until_the_slot(tmp_path):
+    limiter = _limiter(tmp_path, 50)
+    started = time.monotonic()
+    assert all(limiter.acquire_sync("10.0.0.1") for _ in range(3))
+    assert time.monotonic() - started >= 0.09
+
+    async def late():
+        return await limiter.acquire("10.0.0.1", deadline=time.monotonic())
+    assert asyncio.run(late()) is False
+
+
+def test_state_is_shared_through_the_file_store(tmp_path):
+    first = _limiter(tmp_path, 100)
+    assert first.reserve("10.0.0.1") == 0.0
+    rate_limiter._stores.clear()  # a second process opens its own store
+    second = _limiter(tmp_path, 100)
+    assert second.reserve("10.0.0.1") == pytest.approx(0.1, abs=0.02)
+
+
+def test_unshared_limiter_uses_the_local_store(tmp_path):
+    limiter = SubnetRateLimiter(100, shared=False)
+    assert isinstance(limiter._store, rate_limiter._LocalTatStore)
+
+
+@pytest.mark.skipif(not rate_limiter.FCNTL_AVAILABLE, reason="file store needs fcntl")
+class TestFileStoreHardening:
+
+    def test_directory_and_files_are_private(self, tmp_path):
+        limiter = _limiter(tmp_path)
+        limiter.reserve("10.0.0.1")
+        directory = tmp_path / "limits"
+        assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+        (state_file,) = directory.iterdir()
+        assert stat.S_IMODE(os.stat(state_file).st_mode) == 0o600
+
+    def test_loose_directory_permissions_are_tightened(self, tmp_path):
+        directory = tmp_path / "limits"
+        directory.mkdir(mode=0o777)
+        os.chmod(directory, 0o777)
+        _limiter(tmp_path)
+        assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+
+    def test_symlinked_directory_falls_back_to_local_store(self, tmp_path, capsys):
+        (tmp_path / "real").mkdir()
+        os.symlink(tmp_path / "real", tmp_path / "limits")
+        limiter = _limiter(tmp_path)
+        assert isinstance(limiter._store, rate_limiter._LocalTatStore)
+        assert "غير آمن" in capsys.readouterr().out
+
+    def test_symlinked_state_file_is_rejected(self, tmp_path):
+        limiter = _limiter(tmp_path)
+        target = tmp_path / "victim"
+        target.write_bytes(b"")
+        os.symlink(target, tmp_path / "limits" / f"{limiter.key_for('10.0.0.1')}.tat")
+        with pytest.raises(OSError):
+            limiter.reserve("10.0.0.1")
+        assert target.read_bytes() == b""
+
+    @pytest.mark.parametrize("poison", [1e300, float("inf"), float("nan"), time.time() + 10 * MAX_BACKLOG_SECONDS])
+    def test_poisoned_tat_is_clamped(self, tmp_path, poison):
+        limiter = _limiter(tmp_path)
+        limiter.reserve("10.0.0.1")
+        path = tmp_path / "limits" / f"{limiter.key_for('10.0.0.1')}.tat"
+        path.write_bytes(struct.pack("<d", poison))
+        assert limiter.reserve("10.0.0.1") == 0.0
+
+    def test_default_directory_is_per_user(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+        assert rate_limiter.default_rate_limit_dir() == str(tmp_path / "pibot_rate_limits")
+        monkeypatch.delenv("XDG_RUNTIME_DIR")
+        monkeypatch.setenv("HOME", str(tmp_path))
+        assert rate_limiter.default_rate_limit_dir() == str(tmp_path / ".cache" / "pibot" / "rate_limits")
@@ -0,0 +1,121 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from core import iter_session_file
+from orchestrator import SwarmOrchestrator
+from replay_engine import (ReplayEngine, diff_outputs, output_signature, recorded_capabilities,
+                           recorded_responses)
+from swarm_agents import Analyst, Planner, Recon, Reporter, swarm
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class QuietAnalyst(Analyst):
+    def process_message(self, message):
+        return None
+
+
+class OfflineRecon(Recon):
+    def process_message(self, message):
+        raise AssertionError("replay must not run the network agent")
+
+
+@pytest.fixture
+def session(tmp_path):
+    orchestrator = SwarmOrchestrator(agents=swarm())
+    orchestrator.replay.log_path = str(tmp_path / "recorded") + "/"
+    log_file = orchestrator.start_mission("m", "10.0.0.1")
+    orchestrator.executor.shutdown()
+    return log_file
+
+
+def _engine(session, agents=None):
+    agents = agents or (lambda: [Planner(), OfflineRecon(), Analyst(), Reporter()])
+    return ReplayEngine(iter_session_file(session), orchestrator_factory=lambda: SwarmOrchestrator(agents=agents()))
+
+
+def _types(log_file):
+    return [e["event_type"] for e in iter_session_file(log_file)]
+
+
+@pytest.mark.parametrize("async_mode", [False, True], ids=["sync", "async"])
+def test_replay_reproduces_the_session_offline(session, tmp_path, async_mode):
+    engine = _engine(session)
+    assert (engine.mission_name, engine.target) == ("m", "10.0.0.1")
+
+    result = engine.run(async_mode, log_path=str(tmp_path / "replayed"))
+    assert result["changes"] == {}
+    assert result["served"] == 1
+    assert result["recorded_agents"] == ["Recon"]
+    assert result["unanswered"] == result["unused"] == 0
+    assert result["alerts_triggered"] == 1
+
+    types = _types(result["log_file"])
+    report = next(i for i, e in enumerate(iter_session_file(result["log_file"]))
+                  if e["event_type"] == "message_sent" and e["data"]["from"] == "Reporter")
+    assert report < types.index("mission_completed")
+
+
+def test_replay_flags_changed_analysis(session, tmp_path):
+    engine = _engine(session, lambda: [Planner(), OfflineRecon(), QuietAnalyst(), Reporter()])
+    changes = engine.run(log_path=str(tmp_path))["changes"]
+    assert set(changes) == {"Analyst", "Reporter"}
+    assert [m["type"] for m in changes["Analyst"]["missing"]] == ["alert"]
+    assert changes["Analyst"]["added"] == []
+
+
+def test_agents_missing_from_the_orchestrator_are_replayed_from_the_log(session, tmp_path):
+    engine = _engine(session, lambda: [Analyst(), Reporter()])
+    result = engine.run(log_path=str(tmp_path))
+    assert result["recorded_agents"] == ["Planner", "Recon"]
+    assert result["served"] == 2 and result["unused"] == 0
+    assert result["changes"] == {}
+    assert result["alerts_triggered"] == 1
+
+
+def test_session_paths_resolve_next_to_the_module(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    by_id = ReplayEngine.from_session("db1d5dbd")
+    by_path = ReplayEngine.from_session(os.path.join("swarm_logs", "session_db1d5dbd.json"))
+    assert by_id.events == by_path.events
+    assert by_id.senders == ["Planner"]
+
+
+def test_recorded_responses_are_keyed_by_trigger(session):
+    events = ReplayEngine(iter_session_file(session)).events
+    responses = recorded_responses(events, "Recon")
+    assert len(responses) == 1
+    (queue,) = responses.values()
+    (record,) = queue
+    assert record["type"] == "result" and record["content"]["open_ports"] == [22, 80]
+    assert None not in responses
+    assert recorded_responses(events, "Nobody") == {}
+    assert recorded_capabilities(events, "Recon") == ["scanning"]
+    assert recorded_capabilities(events, "Analyst") == []
+
+
+def test_output_signature_and_diff():
+    def sent(sender, content):
+        return {"event_type": "message_sent", "data": {"from": sender, "type": "result", "content": content}}
+
+    before = output_signature([sent("A", {"x": 1}), sent("A", {"x": 1}), sent("R", {"p": 1})], exclude=["R"])
+    after = output_signature([sent("A", {"x": 1}), sent("A", {"x": 2})])
+    assert set(before) == {"A"} and sum(before["A"].values()) == 2
+    assert diff_outputs(before, before) == {}
+    change = diff_outputs(before, after)["A"]
+    assert [m["count"] for m in change["missing"]] == [1]
+    assert len(change["added"]) == 1
+
+
+def test_session_without_mission_is_rejected():
+    with pytest.raises(ValueError):
+        ReplayEngine([{"event_type": "agent_registered", "data": {"name": "A"}}])
+
+
+def test_cli_usage_without_session():
+    completed = subprocess.run([sys.executable, "replay_engine.py"], cwd=ROOT, capture_output=True, text=True)
+    assert completed.returncode == 2
+    assert "replay_engine.py" in completed.stdout
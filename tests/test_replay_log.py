@@ -0,0 +1,137 @@
+import gzip
+import io
+import json
+import lzma
+import os
+import time
+import zlib
+
+import pytest
+
+from core import SESSION_EXTENSIONS, SwarmReplay, iter_session_file
+
+
+def record(tmp_path, compression, count=10, **options):
+    replay = SwarmReplay(log_path=str(tmp_path), compression=compression, **options)
+    replay.start_session()
+    for i in range(count):
+        replay.log_event("step", {"i": i, "text": "فحص"})
+    return replay
+
+
+def steps(events):
+    return [event["data"]["i"] for event in events if event["event_type"] == "step"]
+
+
+@pytest.mark.parametrize("compression", [None, "gzip", "lzma"])
+def test_round_trip(tmp_path, compression):
+    replay = record(tmp_path, compression, flush_every=3)
+    filename = replay.save_session()
+    assert filename.endswith(SESSION_EXTENSIONS[compression])
+    assert replay.event_count == 10
+
+    assert steps(iter_session_file(filename)) == list(range(10))
+    loaded = list(replay.load_session(replay.session_id))
+    assert steps(loaded) == list(range(10))
+    assert {event["session_id"] for event in loaded} == {replay.session_id}
+    assert loaded[0]["data"]["text"] == "فحص"
+
+
+@pytest.mark.parametrize("compression", [None, "gzip", "lzma"])
+def test_events_readable_before_close(tmp_path, compression):
+    replay = record(tmp_path, compression, count=5, flush_every=1000, flush_interval=1000)
+    assert steps(replay.iter_events()) == list(range(5))
+    replay.log_event("step", {"i": 5})
+    assert steps(replay.events) == list(range(6))
+    replay.close()
+
+
+def test_compressed_frames_are_standard_streams(tmp_path):
+    for compression, opener in (("gzip", gzip.open), ("lzma", lzma.open)):
+        filename = record(tmp_path / compression, compression, flush_every=2).save_session()
+        with opener(filename, "rt", encoding="utf-8") as f:
+            assert steps(json.loads(line) for line in f) == list(range(10))
+
+
+def _partial_frame(compression, line):
+    if compression == "gzip":
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    else:
+        compressor = lzma.LZMACompressor(format=lzma.FORMAT_XZ)
+    data = compressor.compress(line) + compressor.flush()
+    return data[: len(data) // 2]
+
+
+@pytest.mark.parametrize("compression", [None, "gzip", "lzma"])
+def test_truncated_tail_is_ignored(tmp_path, compression):
+    filename = record(tmp_path, compression, flush_every=4).save_session()
+    line = json.dumps({"event_type": "step", "data": {"i": 99}}).encode() + b"\n"
+    with open(filename, "ab") as f:
+        f.write(line[:-5] if compression is None else _partial_frame(compression, line))
+    assert steps(iter_session_file(filename)) == list(range(10))
+
+
+def test_legacy_json_session_and_lookup(tmp_path):
+    replay = SwarmReplay(log_path=str(tmp_path))
+    events = [{"event_type": "step", "session_id": "abcdef12-0000", "data": {"i": i}} for i in range(3)]
+    with open(os.path.join(tmp_path, "session_abcdef12.json"), "w", encoding="utf-8") as f:
+        json.dump(events, f)
+    assert replay.find_session_file("abcdef12-0000").endswith(".json")
+    assert list(replay.load_session("abcdef12-0000")) == events
+    with pytest.raises(FileNotFoundError):
+        replay.find_session_file("00000000")
+
+
+def test_events_outside_a_session_are_dropped(tmp_path):
+    replay = SwarmReplay(log_path=str(tmp_path))
+    replay.log_event("step", {"i": 0})
+    assert replay.event_count == 0
+    assert list(replay.iter_events()) == []
+
+
+def test_unknown_compression_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        SwarmReplay(log_path=str(tmp_path), compression="zstd")
+
+
+def test_idle_session_is_flushed_by_the_timer(tmp_path):
+    replay = record(tmp_path, None, count=3, flush_every=1000, flush_interval=0.05)
+    assert steps(iter_session_file(replay.filename)) == []
+    time.sleep(0.3)
+    assert steps(iter_session_file(replay.filename)) == list(range(3))
+    replay.log_event("step", {"i": 3})
+    time.sleep(0.3)
+    assert steps(iter_session_file(replay.filename)) == list(range(4))
+    replay.close()
+
+
+def test_close_flushes_and_cancels_the_timer(tmp_path):
+    replay = record(tmp_path, "gzip", count=3, flush_every=1000, flush_interval=1000)
+    timer = replay._flush_timer
+    assert timer is not None and timer.is_alive()
+    replay.close()
+    timer.join(1)
+    assert not timer.is_alive()
+    assert steps(iter_session_file(replay.filename)) == list(range(3))
+
+
+def test_load_session_returns_a_list_and_iter_session_streams(tmp_path):
+    replay = record(tmp_path, "lzma")
+    replay.save_session()
+    loaded = replay.load_session(replay.session_id)
+    assert isinstance(loaded, list) and steps(loaded) == list(range(10))
+    streamed = replay.iter_session(replay.session_id)
+    assert next(streamed)["data"]["i"] == 0
+    assert steps(streamed) == list(range(1, 10))
+
+
+def test_streamed_export_matches_the_dict_export(tmp_path):
+    replay = record(tmp_path, "gzip", flush_every=4)
+    exported = replay.export_for_sharing()
+    out = io.StringIO()
+    assert replay.export_for_sharing(out) == 10
+    streamed = json.loads(out.getvalue())
+    assert list(streamed) == list(exported)
+    assert streamed["events"] == exported["events"]
+    assert streamed["session_id"] == replay.session_id and streamed["total_events"] == 10
+    replay.close()
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+import risk_engine
+from risk_engine import FleetRiskEngine, assess_fleet_risk, build_open_matrix
+from tools import score_risk
+
+PORTS = [21, 22, 23, 25, 53, 80, 110, 135, 139, 143, 443, 445, 3306, 3389, 5900, 8080, 18789]
+
+# the vectorised path when NumPy is installed, and the pure-Python fallback always
+MODES = [False] + ([True] if risk_engine.NUMPY_AVAILABLE else [])
+
+
+@pytest.fixture(params=MODES, ids=lambda numpy: "numpy" if numpy else "fallback")
+def numpy_mode(request, monkeypatch):
+    monkeypatch.setattr(risk_engine, "NUMPY_AVAILABLE", request.param)
+    return request.param
+
+
+def _fleet(hosts, seed=7, density=0.15):
+    rng = random.Random(seed)
+    return [{"ip": f"10.0.{i // 256}.{i % 256}",
+             "open_ports": [p for p in PORTS if rng.random() < density]}
+            for i in range(hosts)]
+
+
+def test_host_reports_match_score_risk(numpy_mode):
+    targets = _fleet(500)
+    ips, ports, matrix = build_open_matrix(targets)
+    engine = FleetRiskEngine(ports)
+    result = engine.score(matrix)
+    for row, host in enumerate(targets):
+        assert engine.host_report(result, row, host["ip"]) == score_risk(host["open_ports"], host["ip"])
+
+
+def test_score_caps_at_100_and_levels(numpy_mode):
+    targets = [
+        {"ip": "a", "open_ports": [22, 23, 135, 139, 445]},   # 80 + 25 -> capped
+        {"ip": "b", "open_ports": [21, 3306]},               # MEDIUM 60
+        {"ip": "c", "open_ports": [53, 443]},                # LOW 10
+        {"ip": "d", "open_ports": []},
+    ]
+    hosts = assess_fleet_risk(targets)["hosts"]
+    assert (hosts["a"]["overall_risk"], hosts["a"]["risk_score"]) == ("HIGH", 100)
+    assert (hosts["b"]["overall_risk"], hosts["b"]["risk_score"]) == ("MEDIUM", 60)
+    assert (hosts["c"]["overall_risk"], hosts["c"]["risk_score"]) == ("LOW", 10)
+    assert (hosts["d"]["overall_risk"], hosts["d"]["risk_score"]) == ("LOW", 0)
+    assert hosts["a"]["recommendations"] == score_risk([22, 23, 135, 139, 445], "a")["recommendations"]
+
+
+def test_summary_counts(numpy_mode):
+    targets = _fleet(300, seed=3)
+    summary = assess_fleet_risk(targets)["summary"]
+    reports = [score_risk(h["open_ports"], h["ip"]) for h in targets]
+
+    assert summary["total_active"] == 300
+    assert summary["high_risk_hosts"] == sum(r["overall_risk"] == "HIGH" for r in reports)
+    assert summary["medium_risk_hosts"] == sum(r["overall_risk"] == "MEDIUM" for r in reports)
+    assert summary["low_risk_hosts"] == sum(r["overall_risk"] == "LOW" for r in reports)
+    assert summary["hosts_with_open_ports"] == sum(bool(h["open_ports"]) for h in targets)
+    assert summary["mean_risk_score"] == pytest.approx(sum(r["risk_score"] for r in reports) / 300)
+    assert summary["port_exposure"][22] == sum(22 in h["open_ports"] for h in targets)
+
+
+def test_explicit_column_order_ignores_unknown_ports(numpy_mode):
+    ips, ports, matrix = build_open_matrix([{"ip": "x", "open_ports": [22, 9999]}], ports=[80, 22])
+    assert ips == ["x"] and ports == [80, 22]
+    assert [bool(v) for v in matrix[0]] == [False, True]
+
+
+def test_empty_fleet(numpy_mode):
+    result = assess_fleet_risk([])
+    assert result["hosts"] == {}
+    assert result["summary"]["total_active"] == 0
+    assert result["summary"]["mean_risk_score"] == 0.0
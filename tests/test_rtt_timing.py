@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+import tools
+from tools import HostTimingTable, RTTEstimator
+
+
+@pytest.fixture(autouse=True)
+def timing(monkeypatch):
+    monkeypatch.setitem(tools.TIMING_CONFIG, "adaptive_timeouts", True)
+    monkeypatch.setitem(tools.TIMING_CONFIG, "min_timeout", 0.05)
+    monkeypatch.setitem(tools.TIMING_CONFIG, "max_timeout", 3.0)
+    monkeypatch.setitem(tools.TIMING_CONFIG, "rttvar_multiplier", 4)
+
+
+def test_first_sample_initialises_srtt_and_rttvar():
+    estimator = RTTEstimator()
+    estimator.observe(0.2)
+    assert estimator.srtt == pytest.approx(0.2)
+    assert estimator.rttvar == pytest.approx(0.1)
+    assert estimator.timeout() == pytest.approx(0.2 + 4 * 0.1)
+
+
+def test_later_samples_follow_rfc6298_smoothing():
+    estimator = RTTEstimator()
+    estimator.observe(0.2)
+    estimator.observe(0.4)
+    # RTTVAR uses the previous SRTT, then SRTT moves by 1/8 of the error
+    assert estimator.rttvar == pytest.approx(0.75 * 0.1 + 0.25 * 0.2)
+    assert estimator.srtt == pytest.approx(0.875 * 0.2 + 0.125 * 0.4)
+    assert estimator.samples == 2
+
+
+def test_timeout_is_clamped():
+    fast = RTTEstimator()
+    fast.observe(0.0001)
+    assert fast.timeout() == 0.05
+
+    slow = RTTEstimator()
+    slow.observe(5.0)
+    assert slow.timeout() == 3.0
+
+
+def test_timeout_backs_off_until_max_and_resets_on_a_sample():
+    estimator = RTTEstimator()
+    estimator.observe(0.1)  # RTO = 0.3
+    timeouts = []
+    for _ in range(6):
+        estimator.timed_out()
+        timeouts.append(estimator.timeout())
+    assert timeouts[:3] == pytest.approx([0.6, 1.2, 2.4])
+    assert timeouts[3:] == [3.0, 3.0, 3.0]
+    assert estimator.backoff == 16  # stops doubling once max_timeout is reached
+
+    estimator.observe(0.1)
+    assert estimator.backoff == 1
+    assert estimator.timeout() < 0.6
+
+
+def test_unseen_host_uses_the_callers_timeout_even_next_to_fast_hosts():
+    table = HostTimingTable()
+    for _ in range(5):
+        table.observe("10.0.0.1", 0.001)
+    assert table.timeout_for("10.0.0.2", 1.0) == 1.0
+    assert table.timeout_for("10.0.0.1", 1.0) == 0.05
+
+
+def test_callers_timeout_is_an_upper_bound():
+    table = HostTimingTable()
+    table.observe("10.0.0.1", 1.0)  # RTO = 3.0
+    assert table.timeout_for("10.0.0.1", 0.5) == 0.5
+    assert table.timeout_for("10.0.0.1", 10.0) == 3.0
+
+
+def test_table_back_off_and_reset():
+    table = HostTimingTable()
+    table.timed_out("10.0.0.9")  # no samples yet: nothing to back off
+    assert table.timeout_for("10.0.0.9", 1.0) == 1.0
+
+    table.observe("10.0.0.1", 0.1)
+    table.timed_out("10.0.0.1")
+    assert table.timeout_for("10.0.0.1", 5.0) == pytest.approx(0.6)
+
+    table.reset()
+    assert table.timeout_for("10.0.0.1", 1.0) == 1.0
+
+
+def test_adaptive_timeouts_can_be_disabled(monkeypatch):
+    monkeypatch.setitem(tools.TIMING_CONFIG, "adaptive_timeouts", False)
+    table = HostTimingTable()
+    table.observe("10.0.0.1", 0.001)
+    assert table.timeout_for("10.0.0.1", 1.0) == 1.0
+
+
+def test_probe_timeout_backs_off_the_host(simulator):
+    sim = simulator("127.84.0.1/32", open_ports=[22], filtered_ports=[8080])
+    ip = sim.hosts[0]
+    assert asyncio.run(tools._probe_tcp(ip, 22, 1.0)) == "open"
+    learned = tools.RTT_TABLE.timeout_for(ip, 5.0)
+
+    assert asyncio.run(tools._probe_tcp(ip, 8080, 1.0)) == "filtered"
+    assert tools.RTT_TABLE.hosts[ip].backoff == 2
+    assert tools.RTT_TABLE.timeout_for(ip, 5.0) == pytest.approx(min(learned * 2, 3.0))
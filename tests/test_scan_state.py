@@ -0,0 +1,99 @@
+import json
+import os
+
+from port_state import PortScanResult, PortStateMap
+from scan_state import ScanStateStore
+
+
+def _result(ip, states):
+    port_map = PortStateMap()
+    for port, state in states.items():
+        port_map.set(port, state)
+    return PortScanResult(ip, port_map)
+
+
+def test_new_host_probes_every_port(tmp_path):
+    store = ScanStateStore(str(tmp_path / "state.json"))
+    assert store.ports_to_probe("10.0.0.5", [22, 80, 443]) == [22, 80, 443]
+
+
+def test_cached_ports_are_reused_until_ttl(tmp_path):
+    store = ScanStateStore(str(tmp_path / "state.json"), port_ttl=60)
+    store.record_ports("10.0.0.5", _result("10.0.0.5", {22: "open", 80: "closed"}))
+
+    checked_at = store.hosts["10.0.0.5"]["ports"]["22"]["checked_at"]
+    assert store.ports_to_probe("10.0.0.5", [22, 80, 443], now=checked_at + 1) == [443]
+    assert store.ports_to_probe("10.0.0.5", [22, 80], now=checked_at + 61) == [22, 80]
+
+    cached = store.port_result("10.0.0.5", [22, 80, 443])
+    assert cached["open_ports"] == [22]
+    assert cached["closed_ports"] == [80]
+    assert cached["filtered_ports"] == [443]  # never probed
+
+
+def test_flapping_port_is_reprobed_and_loses_fingerprint(tmp_path):
+    store = ScanStateStore(str(tmp_path / "state.json"), port_ttl=3600)
+    ip = "10.0.0.5"
+    store.record_ports(ip, _result(ip, {22: "open"}), {22: {"service": "SSH"}})
+    assert store.fingerprints(ip) == {22: {"service": "SSH"}}
+
+    store.record_ports(ip, _result(ip, {22: "closed"}))
+    entry = store.hosts[ip]["ports"]["22"]
+    assert entry["flapping"] and entry["changes"] == 1
+    assert store.fingerprints(ip) == {}
+    assert store.ports_to_probe(ip, [22]) == [22]
+
+    store.record_ports(ip, _result(ip, {22: "closed"}))
+    assert not store.hosts[ip]["ports"]["22"]["flapping"]
+    assert store.ports_to_probe(ip, [22]) == []
+
+
+def test_fresh_hosts_respects_host_ttl(tmp_path):
+    store = ScanStateStore(str(tmp_path / "state.json"), host_ttl=10)
+    store.record_host("10.0.0.1", "port_22")
+    seen = store.hosts["10.0.0.1"]["last_seen"]
+    assert store.fresh_hosts(now=seen + 5) == {"10.0.0.1"}
+    assert store.fresh_hosts(now=seen + 11) == set()
+
+    store.record_host("10.0.0.1", "cache")
+    assert store.hosts["10.0.0.1"]["detected_via"] == "port_22"
+
+
+def test_diff_between_snapshots():
+    previous = {"10.0.0.1": {22, 80}, "10.0.0.2": {443}}
+    current = {"10.0.0.1": {22, 8080}, "10.0.0.3": {22}}
+    assert ScanStateStore.diff(previous, current) == {
+        "new_hosts": ["10.0.0.3"],
+        "gone_hosts": ["10.0.0.2"],
+        "opened_ports": {"10.0.0.1": [8080]},
+        "closed_ports": {"10.0.0.1": [80]},
+    }
+
+
+def test_snapshot_after_record_feeds_diff(tmp_path):
+    store = ScanStateStore(str(tmp_path / "state.json"))
+    store.record_ports("10.0.0.1", _result("10.0.0.1", {22: "open", 80: "open"}))
+    before = store.open_ports_snapshot()
+    store.record_ports("10.0.0.1", _result("10.0.0.1", {80: "closed"}))
+    diff = ScanStateStore.diff(before, store.open_ports_snapshot())
+    assert diff["closed_ports"] == {"10.0.0.1": [80]}
+    assert diff["opened_ports"] == {}
+
+
+def test_save_is_atomic_and_reloads(tmp_path):
+    path = tmp_path / "state.json"
+    store = ScanStateStore(str(path))
+    store.record_host("10.0.0.1", "port_22")
+    store.record_ports("10.0.0.1", _result("10.0.0.1", {22: "open"}))
+    store.save_state()
+
+    assert not os.path.exists(f"{path}.tmp")
+    assert json.loads(path.read_text())["hosts"]["10.0.0.1"]["ports"]["22"]["state"] == "open"
+    assert ScanStateStore(str(path)).open_ports_snapshot() == {"10.0.0.1": {22}}
+
+
+def test_corrupt_state_file_starts_empty(tmp_path, capsys):
+    path = tmp_path / "state.json"
+    path.write_text("{not json")
+    assert ScanStateStore(str(path)).hosts == {}
+    assert "Error loading scan state" in capsys.readouterr().out
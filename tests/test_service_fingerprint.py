@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+import service_fingerprint
+from service_fingerprint import DEFAULT_MATCHER, SignatureMatcher, grab_fingerprint
+
+
+@pytest.mark.parametrize("banner, expected", [
+    ("SSH-2.0-OpenSSH_9.6p1 Ubuntu\r\n", ("SSH", "OpenSSH", "9.6p1")),
+    ("220 (vsFTPd 3.0.5)\r\n", ("FTP", "vsFTPd", "3.0.5")),
+    ("220 mail.example ESMTP Postfix\r\n", ("SMTP", "Postfix", None)),
+    ("+OK Dovecot ready.\r\n", ("POP3", "Dovecot", None)),
+    ("* OK [CAPABILITY IMAP4rev1] Dovecot ready.\r\n", ("IMAP", "Dovecot", None)),
+    ("RFB 003.008\n", ("VNC", None, "003.008")),
+    ("HTTP/1.1 200 OK\r\nDate: x\r\nServer: nginx/1.24.0\r\n\r\n", ("HTTP", "nginx", "1.24.0")),
+    ("HTTP/1.0 404 Not Found\r\n\r\n", ("HTTP", None, None)),
+    ("-NOAUTH Authentication required.\r\n", ("Redis", None, None)),
+])
+def test_signatures(banner, expected):
+    match = DEFAULT_MATCHER.match(banner)
+    assert (match["service"], match["product"], match["version"]) == expected
+
+
+def test_mysql_handshake_banner():
+    banner = "J\x00\x00\x00\x0a8.0.36-0ubuntu\x00rest".encode("latin-1").decode("latin-1")
+    assert DEFAULT_MATCHER.match(banner)["service"] == "MySQL"
+    assert DEFAULT_MATCHER.match(banner)["version"] == "8.0.36-0ubuntu"
+
+
+def test_unknown_banner_does_not_match():
+    assert DEFAULT_MATCHER.match("hello there") is None
+
+
+def test_first_signature_wins():
+    matcher = SignatureMatcher([("A", r"^foo"), ("B", r"^foo(?P<version>\d+)")])
+    assert matcher.match("foo1")["service"] == "A"
+
+
+def _serve(handler):
+    async def start():
+        server = await asyncio.start_server(handler, "127.0.0.1", 0)
+        return server, server.sockets[0].getsockname()[1]
+    return start()
+
+
+class CountingPacer:
+    def __init__(self, allow=True):
+        self.calls = []
+        self.allow = allow
+
+    async def wait(self, ip, deadline=None):
+        self.calls.append(ip)
+        return self.allow
+
+
+def test_grab_banner_over_new_connection():
+    async def handler(reader, writer):
+        writer.write(b"SSH-2.0-OpenSSH_9.6\r\n")
+        await writer.drain()
+        writer.close()
+
+    async def main():
+        server, port = await _serve(handler)
+        pacer = CountingPacer()
+        async with server:
+            fingerprint = await grab_fingerprint("127.0.0.1", port, pacer=pacer)
+        return fingerprint, pacer.calls
+
+    fingerprint, calls = asyncio.run(main())
+    assert fingerprint["service"] == "SSH" and fingerprint["method"] == "banner"
+    assert calls == ["127.0.0.1"]  # one paced connect
+
+
+def test_silent_service_gets_http_probe(monkeypatch):
+    monkeypatch.setitem(service_fingerprint.FINGERPRINT_CONFIG, "banner_timeout", 0.05)
+
+    async def handler(reader, writer):
+        request = await reader.readuntil(b"\r\n\r\n")
+        assert request.startswith(b"HEAD / ")
+        writer.write(b"HTTP/1.1 200 OK\r\nServer: Apache/2.4.58\r\n\r\n")
+        await writer.drain()
+        writer.close()
+
+    async def main():
+        server, port = await _serve(handler)
+        async with server:
+            return await grab_fingerprint("127.0.0.1", port)
+
+    fingerprint = asyncio.run(main())
+    assert (fingerprint["service"], fingerprint["product"], fingerprint["method"]) == ("HTTP", "Apache", "probe")
+
+
+def test_reused_connection_skips_the_pacer():
+    async def handler(reader, writer):
+        writer.write(b"220 (vsFTPd 3.0.5)\r\n")
+        await writer.drain()
+        writer.close()
+
+    async def main():
+        server, port = await _serve(handler)
+        pacer = CountingPacer()
+        async with server:
+            connection = await asyncio.open_connection("127.0.0.1", port)
+            fingerprint = await grab_fingerprint("127.0.0.1", port, connection, pacer=pacer)
+        return fingerprint, pacer.calls
+
+    fingerprint, calls = asyncio.run(main())
+    assert fingerprint["service"] == "FTP"
+    assert calls == []
+
+
+def test_pacer_refusal_skips_the_connect():
+    pacer = CountingPacer(allow=False)
+    fingerprint = asyncio.run(grab_fingerprint("127.0.0.1", 9, pacer=pacer))
+    assert fingerprint["service"] is None and fingerprint["method"] is None
+    assert pacer.calls == ["127.0.0.1"]
@@ -0,0 +1,118 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from session_catalog import SessionCatalog, summarize_session, target_range
+
+
+def _event(session_id, day, event_type, data):
+    return {"timestamp": f"2024-01-{day:02d}T10:00:00", "session_id": session_id,
+            "event_type": event_type, "data": data}
+
+
+def _sent(session_id, day, sender, to, kind="result"):
+    return _event(session_id, day, "message_sent",
+                  {"from": sender, "recipient": "broadcast", "to": to, "type": kind, "content_ref": "x"})
+
+
+def write_session(log_path, session_id, day, mission, target, alerts=0, compression=None):
+    events = [_event(session_id, day, "mission_started", {"name": mission, "target": target}),
+              _sent(session_id, day, "Recon", ["Analyst", "Reporter"])]
+    events += [_sent(session_id, day, "Analyst", ["Reporter"], "alert") for _ in range(alerts)]
+    events.append(_event(session_id, day, "mission_completed", {}))
+    name = os.path.join(log_path, f"session_{session_id[:8]}.jsonl")
+    lines = "".join(json.dumps(event) + "\n" for event in events)
+    if compression == "gzip":
+        with gzip.open(name + ".gz", "wt", encoding="utf-8") as f:
+            f.write(lines)
+        return name + ".gz"
+    with open(name, "w", encoding="utf-8") as f:
+        f.write(lines)
+    return name
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    log_path = str(tmp_path)
+    write_session(log_path, "aaaaaaaa-1", 1, "home scan", "192.168.1.0/24", alerts=2)
+    write_session(log_path, "bbbbbbbb-2", 5, "server audit", "10.0.0.5", alerts=0, compression="gzip")
+    write_session(log_path, "cccccccc-3", 9, "home rescan", "192.168.1.10", alerts=1)
+    write_session(log_path, "dddddddd-4", 12, "lab", "lab-host")
+    with SessionCatalog(log_path) as catalog:
+        assert catalog.refresh() == {"added": 4, "updated": 0, "removed": 0, "unchanged": 0}
+        yield catalog
+
+
+def _ids(sessions):
+    return [session["session_id"][:1] for session in sessions]
+
+
+def test_target_range():
+    assert target_range("10.0.0.0/30") == (167772160, 167772163)
+    assert target_range("10.0.0.1") == (167772161, 167772161)
+    assert target_range("10.0.0.1/24") == (167772160, 167772415)
+    assert target_range("::1") == (None, None)
+    assert target_range("lab-host") == (None, None)
+    assert target_range(None) == (None, None)
+
+
+def test_summarize_session(tmp_path):
+    summary = summarize_session(write_session(str(tmp_path), "aaaaaaaa-1", 1, "m", "10.0.0.1", alerts=2))
+    assert summary["session_id"] == "aaaaaaaa-1"
+    assert (summary["mission_name"], summary["target"]) == ("m", "10.0.0.1")
+    assert (summary["event_count"], summary["message_count"], summary["alert_count"]) == (5, 3, 2)
+    assert summary["agents"]["Analyst"] == {"messages_sent": 2, "messages_received": 1, "alerts_sent": 2}
+    assert summary["agents"]["Reporter"]["messages_received"] == 3
+
+
+def test_query_orders_newest_first_and_limits(catalog):
+    assert _ids(catalog.query()) == ["d", "c", "b", "a"]
+    assert _ids(catalog.query(limit=2)) == ["d", "c"]
+
+
+def test_query_by_target_overlap(catalog):
+    assert _ids(catalog.query(target="192.168.1.10")) == ["c", "a"]
+    assert _ids(catalog.query(target="192.168.0.0/16")) == ["c", "a"]
+    assert _ids(catalog.query(target="10.0.0.0/8")) == ["b"]
+    assert _ids(catalog.query(target="172.16.0.1")) == []
+    assert _ids(catalog.query(target="lab-host")) == ["d"]
+
+
+def test_query_filters(catalog):
+    assert _ids(catalog.query(since="2024-01-05")) == ["d", "c", "b"]
+    assert _ids(catalog.query(until="2024-01-05")) == ["a"]
+    assert _ids(catalog.query(since="2024-01-02", until="2024-01-10")) == ["c", "b"]
+    assert _ids(catalog.query(mission="home")) == ["c", "a"]
+    assert _ids(catalog.query(min_alerts=1)) == ["c", "a"]
+    assert _ids(catalog.query(agent="Analyst")) == ["c", "a"]
+    assert _ids(catalog.query(mission="home", min_alerts=2)) == ["a"]
+    row = catalog.query(target="10.0.0.5")[0]
+    assert row["file"].endswith(".jsonl.gz") and "target_start" not in row
+
+
+def test_agent_stats_by_prefix(catalog):
+    stats = catalog.agent_stats("aaaaaaaa")
+    assert [row["agent"] for row in stats] == ["Analyst", "Recon", "Reporter"]
+    assert stats[0]["alerts_sent"] == 2
+    assert catalog.agent_stats("zzzz") == []
+
+
+def test_refresh_is_incremental(catalog, tmp_path):
+    assert catalog.refresh() == {"added": 0, "updated": 0, "removed": 0, "unchanged": 4}
+
+    filename = write_session(str(tmp_path), "cccccccc-3", 9, "home rescan", "192.168.1.10", alerts=3)
+    stat = os.stat(filename)
+    os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    os.remove(os.path.join(tmp_path, "session_dddddddd.jsonl"))
+    assert catalog.refresh() == {"added": 0, "updated": 1, "removed": 1, "unchanged": 2}
+    assert catalog.query(target="192.168.1.10", limit=1)[0]["alert_count"] == 3
+    assert catalog.agent_stats("dddddddd") == []
+    assert len(catalog.agent_stats("cccccccc")) == 3
+
+
+def test_catalog_persists_between_instances(catalog, tmp_path):
+    with SessionCatalog(str(tmp_path)) as reopened:
+        assert reopened.refresh()["unchanged"] == 4
+        assert _ids(reopened.query(min_alerts=2)) == ["a"]
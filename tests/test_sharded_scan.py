@@ -0,0 +1,70 @@
+import ipaddress
+import os
+import threading
+import time
+
+import pytest
+
+import tools
+from tools import split_network_range
+
+
+def _covers(network, shards):
+    addresses = [ip for shard in shards for ip in ipaddress.ip_network(shard)]
+    return addresses == list(ipaddress.ip_network(network, strict=False))
+
+
+@pytest.mark.parametrize("network, shards, expected", [
+    ("10.0.0.0/24", 1, ["10.0.0.0/24"]),
+    ("10.0.0.0/24", 2, ["10.0.0.0/25", "10.0.0.128/25"]),
+    ("10.0.0.0/24", 3, ["10.0.0.0/26", "10.0.0.64/26", "10.0.0.128/26", "10.0.0.192/26"]),
+    ("10.0.0.0/30", 16, ["10.0.0.0/32", "10.0.0.1/32", "10.0.0.2/32", "10.0.0.3/32"]),
+    ("10.0.0.7", 8, ["10.0.0.7/32"]),
+    ("10.0.0.7/24", 0, ["10.0.0.0/24"]),
+])
+def test_split_network_range(network, shards, expected):
+    assert split_network_range(network, shards) == expected
+    assert _covers(network, expected)
+
+
+def test_split_uneven_prefix_covers_range_without_overlap():
+    shards = split_network_range("172.16.4.0/22", 5)
+    assert len(shards) == 8
+    assert {ipaddress.ip_network(shard).prefixlen for shard in shards} == {25}
+    assert _covers("172.16.4.0/22", shards)
+
+
+def _ports(report):
+    return {host["ip"]: sorted(host["open_ports"]) for host in report["targets"]}
+
+
+def test_sharded_scan_merges_the_same_report_as_a_single_process_scan(simulator):
+    sim = simulator("127.81.0.0/29", open_ports=[22, 80])
+    events = list(tools.iter_sharded_network_scan(sim.network, ports=[22, 80, 443], workers=2))
+
+    hosts, completed = events[:-1], events[-1]
+    assert {event["event"] for event in hosts} == {"host"}
+    assert completed["event"] == "completed"
+    assert [event["summary"]["total_active"] for event in hosts] == list(range(1, len(sim.hosts) + 1))
+
+    report = completed["report"]
+    assert [host["ip"] for host in report["targets"]] == sim.hosts
+    assert _ports(report) == {ip: [22, 80] for ip in sim.hosts}
+    assert report["summary"]["total_active"] == len(sim.hosts)
+    assert completed["probes"] >= len(sim.hosts) * 3
+
+    single = list(tools.iter_network_scan(sim.network, ports=[22, 80, 443]))[-1]["report"]
+    assert _ports(single) == _ports(report)
+
+
+def test_closing_the_iterator_early_stops_the_workers(simulator):
+    sim = simulator("127.82.0.0/23", open_ports=[22, 80])
+    scan = tools.iter_sharded_network_scan(sim.network, ports=[22, 80], workers=2)
+    assert next(scan)["event"] == "host"
+
+    closer = threading.Thread(target=scan.close)
+    started = time.monotonic()
+    closer.start()
+    closer.join(30)
+    assert not closer.is_alive(), "closing the sharded scan hung"
+    assert time.monotonic() - started < 30
@@ -18,33 +18,262 @@ Safety Principles:
 - Risk Assessment
 """
 
+import sys
+import os
 import socket
 import subprocess
 import json
-from typing import List, Dict, Optional
+import asyncio
+import inspect
+import ipaddress
+import queue
+import threading
+import time
+import multiprocessing
+import atexit
+from bisect import bisect_right
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Set
 from datetime import datetime
 from pathlib import Path
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from .neighbor_table import read_neighbor_snapshot
+    from .port_frequency import frequency_ordered_ports
+    from .port_state import PortScanResult, PortStateMap
+    from .rate_limiter import SubnetRateLimiter
+    from .scan_state import ScanStateStore
+    from .service_fingerprint import FINGERPRINT_CONFIG, grab_fingerprint
+except ImportError:
+    from neighbor_table import read_neighbor_snapshot
+    from port_frequency import frequency_ordered_ports
+    from port_state import PortScanResult, PortStateMap
+    from rate_limiter import SubnetRateLimiter
+    from scan_state import ScanStateStore
+    from service_fingerprint import FINGERPRINT_CONFIG, grab_fingerprint
+
 # --- Safety Configuration ---
 
 SAFETY_CONFIG = {
     "require_authorization": True,
     "max_concurrent_scans": 10,
-    "rate_limit_ms": 100,  # تأخير بين كل فحص
+    "rate_limit_ms": 100,  # تأخير بين كل فحص (لكل شبكة فرعية، مشترك بين كل العمليات)
+    "rate_limit_burst": 1,  # فحوصات متتالية مسموحة قبل تطبيق الإيقاع
+    "rate_limit_prefix": 24,  # حجم الشبكة الفرعية التي يُطبَّق عليها الحد
+    "rate_limit_shared": True,  # مشاركة الحد بين العمليات (main.py, pi_telegram.py, ...)
+    "rate_limit_dir": None,  # مجلد حالة الحد المشترك (default: $XDG_RUNTIME_DIR أو ~/.cache/pibot)
+    "max_concurrent_hosts": 256,  # أجهزة تُفحص في آن واحد أثناء الاكتشاف
+    "max_concurrent_host_scans": 16,  # أجهزة تُفحص منافذها في آن واحد (وضع Pipeline)
     "authorized_ranges": [
         "192.168.0.0/16",  # Private Class B
         "10.0.0.0/8",      # Private Class A
         "172.16.0.0/12",   # Private Class C
         "127.0.0.0/8",     # Localhost
     ],
+    "excluded_ranges": [],  # نطاقات مستثناة داخل النطاقات المصرح بها (مثل أجهزة حساسة)
     "forbidden_ports": [],  # منافذ ممنوع فحصها (إضافة حسب الحاجة)
     "log_all_scans": True,
 }
 
+# --- Audit Log Configuration ---
+
+AUDIT_LOG_CONFIG = {
+    "log_dir": "scan_logs",
+    "flush_size": 256,       # كتابة المجموعة عند تجمّع هذا العدد من السجلات
+    "flush_interval": 1.0,   # أو بعد مرور هذه المدة (ثوانٍ)
+    "fsync": "batch",        # none | batch (fsync لكل مجموعة) | always (كل سجل يُكتب ويُزامن فوراً)
+    "echo": True,            # طباعة كل سجل في الطرفية
+}
+
+# إجراءات تُكتب على القرص قبل عودة log_scan_action مهما كانت سياسة fsync
+AUDIT_SYNC_ACTIONS = {"BLOCKED_UNAUTHORIZED"}
+
+# --- Adaptive Timing Configuration ---
+
+TIMING_CONFIG = {
+    "adaptive_timeouts": True,  # تعلّم المهلة من زمن الرحلة (RTT) الفعلي
+    "min_timeout": 0.05,        # أقل مهلة مسموحة (ثوانٍ)
+    "max_timeout": 3.0,         # أقصى مهلة للروابط البطيئة (ثوانٍ)
+    "rttvar_multiplier": 4,     # K في RTO = SRTT + K * RTTVAR
+}
+
 # --- Logging ---
 
+class ScanAuditLogger:
+    """
+    كاتب سجل التدقيق في الخلفية مع كتابة جماعية (Group Commit)
+    
+    log() تضيف السجل لطابور في الذاكرة وتعود فوراً، و thread في الخلفية
+    يكتب المجموعات عند امتلاء flush_size أو مرور flush_interval.
+    الملفات تُدوَّر يومياً (scan_log_YYYY-MM-DD.jsonl) والطابور يُفرَّغ
+    بالكامل عند الخروج.
+    """
+    
+    def __init__(self, log_dir: str = "scan_logs", flush_size: int = 256,
+                 flush_interval: float = 1.0, fsync: str = "batch", echo: bool = True):
+        if fsync not in ("none", "batch", "always"):
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        self.log_dir = Path(log_dir)
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.echo = echo
+        
+        self._buffer: List[Dict] = []
+        self._buffer_since = 0.0  # وقت أقدم سجل في الطابور (monotonic)
+        self._cond = threading.Condition()
+        self._queued = 0      # عدد السجلات المضافة
+        self._written = 0     # عدد السجلات المكتوبة
+        self._flush_requested = False
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        self._file = None
+        self._file_date = None
+    
+    def _ensure_writer(self):
+        """تشغيل thread الكتابة (ومن جديد في العمليات المتفرعة عبر fork)"""
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        self._pid = os.getpid()
+        self._buffer = []
+        self._queued = self._written = 0
+        self._file = None
+        self._file_date = None
+        self._thread = threading.Thread(target=self._run, name="scan-audit-log", daemon=True)
+        self._thread.start()
+    
+    def log(self, entry: Dict, sync: bool = False):
+        """
+        إضافة سجل للطابور
+        
+        Args:
+            entry: السجل (يجب أن يحتوي على timestamp بصيغة ISO)
+            sync: انتظار كتابة السجل على القرص قبل العودة
+        """
+        with self._cond:
+            if self._closed:
+                self._write_batch([entry])
+                return
+            self._ensure_writer()
+            if not self._buffer:
+                # أول سجل في المجموعة: يبدأ عد flush_interval منه
+                self._buffer_since = time.monotonic()
+                self._cond.notify_all()
+            self._buffer.append(entry)
+            self._queued += 1
+            target = self._queued
+            if len(self._buffer) >= self.flush_size:
+                self._cond.notify_all()
+        
+        if sync or self.fsync == "always":
+            self._wait_written(target)
+    
+    def flush(self):
+        """انتظار كتابة كل ما في الطابور حتى الآن"""
+        with self._cond:
+            if self._thread is None or self._pid != os.getpid():
+                return
+            target = self._queued
+        self._wait_written(target)
+    
+    def _wait_written(self, target: int):
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._written < target and self._thread.is_alive():
+                self._cond.wait(0.1)
+    
+    def close(self):
+        """تفريغ الطابور وإيقاف thread الكتابة"""
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=5)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                # انتظار واحد حتى أقرب سبب للكتابة: امتلاء المجموعة، طلب flush،
+                # الإغلاق، أو مرور flush_interval على أقدم سجل في الطابور
+                while (len(self._buffer) < self.flush_size and not self._flush_requested
+                        and not self._closed):
+                    if not self._buffer:
+                        self._cond.wait()
+                        continue
+                    remaining = self._buffer_since + self.flush_interval - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._buffer = self._buffer, []
+                self._flush_requested = False
+                closing = self._closed
+            
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except OSError as e:
+                    print(f"⚠️ فشل كتابة سجل التدقيق: {e}")
+            
+            with self._cond:
+                self._written += len(batch)
+                self._cond.notify_all()
+            
+            if closing and not batch:
+                return
+    
+    def _write_batch(self, batch: List[Dict]):
+        """كتابة مجموعة سجلات (مع التدوير اليومي) في استدعاء write واحد لكل ملف"""
+        lines_by_date: Dict[str, List[str]] = {}
+        for entry in batch:
+            date = entry["timestamp"][:10]
+            lines_by_date.setdefault(date, []).append(json.dumps(entry, ensure_ascii=False) + "\n")
+        
+        for date, lines in lines_by_date.items():
+            if self._file_date != date or self._file is None:
+                if self._file is not None:
+                    self._file.close()
+                self.log_dir.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.log_dir / f"scan_log_{date}.jsonl", "a")
+                self._file_date = date
+            self._file.write("".join(lines))
+            self._file.flush()
+            if self.fsync != "none":
+                os.fsync(self._file.fileno())
+        
+        if self.echo:
+            for entry in batch:
+                print(f"📝 [LOG] {entry['action']} on {entry['target']}")
+
+_audit_logger: Optional[ScanAuditLogger] = None
+
+def get_audit_logger() -> ScanAuditLogger:
+    """كاتب سجل التدقيق المشترك (يُنشأ من AUDIT_LOG_CONFIG عند أول استخدام)"""
+    global _audit_logger
+    if _audit_logger is None:
+        _audit_logger = ScanAuditLogger(**AUDIT_LOG_CONFIG)
+    return _audit_logger
+
+def flush_audit_log():
+    """كتابة كل سجلات التدقيق المعلقة على القرص"""
+    if _audit_logger is not None:
+        _audit_logger.flush()
+
+@atexit.register
+def _close_audit_log():
+    if _audit_logger is not None:
+        _audit_logger.close()
+
 def log_scan_action(action: str, target: str, details: Dict = None):
-    """تسجيل كل إجراءات الفحص للشفافية والمراجعة"""
+    """تسجيل كل إجراءات الفحص للشفافية والمراجعة (كتابة جماعية في الخلفية)"""
     if not SAFETY_CONFIG["log_all_scans"]:
         return
     
@@ -55,22 +284,132 @@ def log_scan_action(action: str, target: str, details: Dict = None):
         "details": details or {}
     }
     
-    # حفظ في ملف سجل
-    log_dir = Path("scan_logs")
-    log_dir.mkdir(exist_ok=True)
-    log_file = log_dir / f"scan_log_{datetime.now().strftime('%Y-%m-%d')}.jsonl"
+    get_audit_logger().log(log_entry, sync=action in AUDIT_SYNC_ACTIONS)
+
+# --- Authorization ---
+
+class AuthorizationIndex:
+    """
+    فهرس تفويض مُجمَّع: فترات أعداد صحيحة مرتبة وغير متداخلة
+    
+    يُبنى من authorized_ranges بعد طرح excluded_ranges، ويجيب عن
+    "هل هذا العنوان / هذه الشبكة كاملة مصرح بها؟" ببحث ثنائي O(log n).
+    """
+    
+    def __init__(self, authorized_ranges: List[str], excluded_ranges: Optional[List[str]] = None):
+        intervals = self._merge(self._to_intervals(authorized_ranges))
+        for start, end in self._merge(self._to_intervals(excluded_ranges or [])):
+            intervals = self._subtract(intervals, start, end)
+        self.intervals = intervals
+        self.starts = [start for start, _ in intervals]
     
-    with open(log_file, "a") as f:
-        f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
+    @staticmethod
+    def _to_intervals(ranges: List[str]) -> List[tuple]:
+        intervals = []
+        for cidr in ranges:
+            network = ipaddress.ip_network(cidr, strict=False)
+            intervals.append((int(network.network_address), int(network.broadcast_address)))
+        return intervals
     
-    print(f"📝 [LOG] {action} on {target}")
+    @staticmethod
+    def _merge(intervals: List[tuple]) -> List[tuple]:
+        merged = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+    
+    @staticmethod
+    def _subtract(intervals: List[tuple], cut_start: int, cut_end: int) -> List[tuple]:
+        result = []
+        for start, end in intervals:
+            if end < cut_start or start > cut_end:
+                result.append((start, end))
+                continue
+            if start < cut_start:
+                result.append((start, cut_start - 1))
+            if end > cut_end:
+                result.append((cut_end + 1, end))
+        return result
+    
+    def contains_range(self, start: int, end: int) -> bool:
+        """هل الفترة [start, end] كاملة داخل فترة مصرح بها واحدة؟"""
+        i = bisect_right(self.starts, start) - 1
+        return i >= 0 and self.intervals[i][1] >= end
+    
+    def contains_address(self, address: int) -> bool:
+        """هل العنوان (كعدد صحيح) مصرح به؟"""
+        return self.contains_range(address, address)
+    
+    def contains_network(self, network) -> bool:
+        """هل الشبكة (ipaddress.IPv4Network) كاملة مصرح بها؟"""
+        return self.contains_range(int(network.network_address), int(network.broadcast_address))
+    
+    def filter_addresses(self, addresses):
+        """
+        فحص جماعي لعناوين كثيرة (أعداد صحيحة)
+        
+        العناوين المرتبة تُفحص بمرور خطي واحد على الفترات،
+        وغير المرتبة ببحث ثنائي لكل عنوان.
+        
+        Yields:
+            العناوين المصرح بها فقط
+        """
+        i = 0
+        last = -1
+        for address in addresses:
+            if address < last:
+                # ليست مرتبة: إعادة التموضع ببحث ثنائي بدلاً من المشي من البداية
+                i = max(bisect_right(self.starts, address) - 1, 0)
+            last = address
+            if i < len(self.intervals) and address >= self.intervals[i][0]:
+                while i < len(self.intervals) and self.intervals[i][1] < address:
+                    i += 1
+            else:
+                i = max(0, bisect_right(self.starts, address) - 1)
+            if i < len(self.intervals) and self.intervals[i][0] <= address <= self.intervals[i][1]:
+                yield address
+    
+    def authorized_subranges(self, network_range: str) -> List[str]:
+        """
+        الأجزاء المصرح بها من نطاق كبير (لتخطيط الفحوصات الواسعة)
+        
+        Returns:
+            قائمة CIDR تغطي تقاطع النطاق مع الفترات المصرح بها
+        """
+        network = ipaddress.ip_network(network_range.strip(), strict=False)
+        lo, hi = int(network.network_address), int(network.broadcast_address)
+        i = max(0, bisect_right(self.starts, lo) - 1)
+        subranges = []
+        while i < len(self.intervals) and self.intervals[i][0] <= hi:
+            start, end = max(lo, self.intervals[i][0]), min(hi, self.intervals[i][1])
+            if start <= end:
+                subranges.extend(
+                    str(net) for net in ipaddress.summarize_address_range(
+                        ipaddress.IPv4Address(start), ipaddress.IPv4Address(end))
+                )
+            i += 1
+        return subranges
 
-# --- Authorization ---
+_authorization_cache = {"key": None, "index": None}
+
+def get_authorization_index() -> AuthorizationIndex:
+    """الفهرس المُجمَّع للإعدادات الحالية (يُعاد بناؤه فقط عند تغيّر SAFETY_CONFIG)"""
+    key = (tuple(SAFETY_CONFIG["authorized_ranges"]), tuple(SAFETY_CONFIG.get("excluded_ranges", [])))
+    if _authorization_cache["key"] != key:
+        _authorization_cache["index"] = AuthorizationIndex(list(key[0]), list(key[1]))
+        _authorization_cache["key"] = key
+    return _authorization_cache["index"]
 
 def is_authorized_target(target: str) -> bool:
     """
     التحقق من أن الهدف مصرح بفحصه
     
+    نطاقات CIDR تُقبل فقط إذا كانت محتواة بالكامل في النطاقات المصرح بها
+    (وغير متقاطعة مع excluded_ranges).
+    
     Args:
         target: IP أو CIDR
     
@@ -80,45 +419,101 @@ def is_authorized_target(target: str) -> bool:
     if not SAFETY_CONFIG["require_authorization"]:
         return True
     
-    # تبسيط: التحقق من أن الهدف ضمن النطاقات الخاصة
-    # في تطبيق حقيقي: استخدام ipaddress module للتحقق الدقيق
-    if target.startswith(("192.168.", "10.", "172.16.", "172.17.", "172.18.", 
-                          "172.19.", "172.20.", "172.21.", "172.22.", "172.23.",
-                          "172.24.", "172.25.", "172.26.", "172.27.", "172.28.",
-                          "172.29.", "172.30.", "172.31.", "127.")):
-        return True
+    try:
+        network = ipaddress.ip_network(str(target).strip(), strict=False)
+    except ValueError:
+        return False
+    if network.version != 4:
+        return False
     
-    # Check against authorized_ranges
-    for authorized in SAFETY_CONFIG["authorized_ranges"]:
-        if target.startswith(authorized.split(".")[0]):
-            return True
+    return get_authorization_index().contains_network(network)
+
+def _extract_target(args, kwargs) -> Optional[str]:
+    """استخراج الهدف من معاملات دالة الفحص"""
+    if args:
+        return args[0]
+    for key in ("target", "target_ip", "network_range"):
+        if key in kwargs:
+            return kwargs[key]
+    return None
+
+def _authorize_and_log_start(target: Optional[str]):
+    """التحقق من التفويض وتسجيل بدء الفحص"""
+    if not target:
+        return
     
-    return False
+    # التحقق من التفويض
+    if not is_authorized_target(target):
+        error_msg = f"⛔ UNAUTHORIZED TARGET: {target}"
+        print(f"\n🚨 {error_msg}")
+        log_scan_action("BLOCKED_UNAUTHORIZED", target, {"reason": "Not in authorized ranges"})
+        raise PermissionError(error_msg)
+    
+    # تسجيل الفحص
+    log_scan_action("SCAN_STARTED", target)
 
 def safety_check(func):
-    """Decorator لإضافة فحوصات الأمان تلقائياً لكل دالة فحص"""
-    def wrapper(*args, **kwargs):
-        # استخراج الهدف من المعاملات
-        target = None
-        if args:
-            target = args[0]
-        elif "target" in kwargs:
-            target = kwargs["target"]
-        elif "target_ip" in kwargs:
-            target = kwargs["target_ip"]
-        elif "network_range" in kwargs:
-            target = kwargs["network_range"]
+    """Decorator لإضافة فحوصات الأمان تلقائياً لكل دالة فحص (متزامنة، async، أو مولّدات)"""
+    if inspect.isasyncgenfunction(func):
+        async def async_gen_wrapper(*args, **kwargs):
+            target = _extract_target(args, kwargs)
+            _authorize_and_log_start(target)
+            
+            try:
+                async for item in func(*args, **kwargs):
+                    yield item
+                if target:
+                    log_scan_action("SCAN_COMPLETED", target, {"status": "success"})
+            except Exception as e:
+                if target:
+                    log_scan_action("SCAN_FAILED", target, {"error": str(e)})
+                raise
         
-        if target:
-            # التحقق من التفويض
-            if not is_authorized_target(target):
-                error_msg = f"⛔ UNAUTHORIZED TARGET: {target}"
-                print(f"\n🚨 {error_msg}")
-                log_scan_action("BLOCKED_UNAUTHORIZED", target, {"reason": "Not in authorized ranges"})
-                raise PermissionError(error_msg)
+        async_gen_wrapper.__name__ = func.__name__
+        async_gen_wrapper.__doc__ = func.__doc__
+        return async_gen_wrapper
+    
+    if inspect.isgeneratorfunction(func):
+        def gen_wrapper(*args, **kwargs):
+            target = _extract_target(args, kwargs)
+            _authorize_and_log_start(target)
             
-            # تسجيل الفحص
-            log_scan_action("SCAN_STARTED", target)
+            try:
+                yield from func(*args, **kwargs)
+                if target:
+                    log_scan_action("SCAN_COMPLETED", target, {"status": "success"})
+            except Exception as e:
+                if target:
+                    log_scan_action("SCAN_FAILED", target, {"error": str(e)})
+                raise
+        
+        gen_wrapper.__name__ = func.__name__
+        gen_wrapper.__doc__ = func.__doc__
+        return gen_wrapper
+    
+    if asyncio.iscoroutinefunction(func):
+        async def async_wrapper(*args, **kwargs):
+            target = _extract_target(args, kwargs)
+            _authorize_and_log_start(target)
+            
+            try:
+                result = await func(*args, **kwargs)
+                if target:
+                    log_scan_action("SCAN_COMPLETED", target, {"status": "success"})
+                return result
+            except Exception as e:
+                if target:
+                    log_scan_action("SCAN_FAILED", target, {"error": str(e)})
+                raise
+        
+        async_wrapper.__name__ = func.__name__
+        async_wrapper.__doc__ = func.__doc__
+        return async_wrapper
+    
+    def wrapper(*args, **kwargs):
+        # استخراج الهدف من المعاملات
+        target = _extract_target(args, kwargs)
+        _authorize_and_log_start(target)
         
         # تنفيذ الدالة الأصلية
         try:
@@ -132,130 +527,780 @@ def safety_check(func):
             raise
     
     wrapper.__name__ = func.__name__
+    wrapper.__doc__ = func.__doc__
     return wrapper
 
+# --- محرك الفحص المتزامن (Async Engine) ---
+
+def _run_sync(coro):
+    """
+    تشغيل coroutine من كود متزامن
+    
+    إذا كانت هناك حلقة asyncio تعمل بالفعل في هذا الـ thread
+    (مثل بوت Telegram) يتم التشغيل في thread منفصل بدلاً من asyncio.run
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    
+    outcome = {}
+    
+    def runner():
+        try:
+            outcome["result"] = asyncio.run(coro)
+        except BaseException as e:
+            outcome["error"] = e
+    
+    thread = threading.Thread(target=runner, daemon=True)
+    thread.start()
+    thread.join()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+def _iterate_sync(agen_factory):
+    """
+    تحويل async generator إلى generator متزامن
+    
+    الـ async generator يعمل في thread خاص بحلقته، والعناصر تُمرَّر
+    عبر queue فور إنتاجها. إغلاق الـ generator مبكراً يلغي المنتج.
+    """
+    items = queue.Queue()
+    running = {}
+    started = threading.Event()
+    
+    async def pump():
+        running["loop"] = asyncio.get_running_loop()
+        running["task"] = asyncio.current_task()
+        started.set()
+        agen = agen_factory()
+        try:
+            async for item in agen:
+                items.put(("item", item))
+        finally:
+            await agen.aclose()
+    
+    def runner():
+        try:
+            asyncio.run(pump())
+        except BaseException as e:
+            items.put(("error", e))
+        finally:
+            started.set()
+            items.put(("done", None))
+    
+    thread = threading.Thread(target=runner, daemon=True)
+    thread.start()
+    try:
+        while True:
+            kind, value = items.get()
+            if kind == "item":
+                yield value
+            elif kind == "error":
+                raise value
+            else:
+                break
+    finally:
+        started.wait()
+        if thread.is_alive() and "loop" in running:
+            try:
+                running["loop"].call_soon_threadsafe(running["task"].cancel)
+            except RuntimeError:
+                pass  # الحلقة أُغلقت بالفعل
+        thread.join()
+
+_rate_limiters: Dict[tuple, SubnetRateLimiter] = {}
+
+def get_rate_limiter(bucket: str, interval_ms: float) -> Optional[SubnetRateLimiter]:
+    """
+    محدد المعدل المشترك لمجموعة حدود معينة (يُعاد بناؤه إذا تغيّرت الإعدادات)
+    
+    Returns:
+        None إذا كان interval_ms = 0 (بلا حد)
+    """
+    if interval_ms <= 0:
+        return None
+    key = (bucket, interval_ms, SAFETY_CONFIG["rate_limit_burst"], SAFETY_CONFIG["rate_limit_prefix"],
+           SAFETY_CONFIG["rate_limit_shared"], SAFETY_CONFIG["rate_limit_dir"])
+    if key not in _rate_limiters:
+        _rate_limiters[key] = SubnetRateLimiter(
+            interval_ms,
+            burst=SAFETY_CONFIG["rate_limit_burst"],
+            prefix=SAFETY_CONFIG["rate_limit_prefix"],
+            bucket=bucket,
+            shared=SAFETY_CONFIG["rate_limit_shared"],
+            storage_dir=SAFETY_CONFIG["rate_limit_dir"]
+        )
+    return _rate_limiters[key]
+
+class ProbePacer:
+    """
+    ضبط إيقاع إطلاق الفحوصات وفق SAFETY_CONFIG["rate_limit_ms"]
+    
+    كل فحص يحجز موعد إطلاقه من محدد المعدل المشترك لشبكة الهدف الفرعية،
+    فتبقى الفجوة بين بداية أي فحصين لنفس الشبكة لا تقل عن rate_limit_ms
+    مهما كان عدد الفحوصات المتوازية أو العمليات التي تفحصها.
+    """
+    
+    def __init__(self, interval_ms: Optional[float] = None, bucket: str = "scan"):
+        if interval_ms is None:
+            interval_ms = SAFETY_CONFIG["rate_limit_ms"]
+        self.limiter = get_rate_limiter(bucket, interval_ms)
+    
+    async def wait(self, ip: str, deadline: Optional[float] = None) -> bool:
+        """
+        الانتظار حتى يحين موعد الفحص التالي
+        
+        Args:
+            ip: عنوان الهدف (يحدد الشبكة الفرعية)
+            deadline: وقت time.monotonic() لا يُحجز بعده أي موعد (اختياري)
+        
+        Returns:
+            False إذا كان الموعد التالي بعد deadline (لا يُحجز ولا يُنتظر)
+        """
+        if self.limiter is None:
+            return deadline is None or time.monotonic() < deadline
+        return await self.limiter.acquire(ip, deadline)
+
+# --- التوقيت التكيفي (Adaptive Timeouts) ---
+
+class RTTEstimator:
+    """
+    تقدير زمن الرحلة بأسلوب TCP (RFC 6298)
+    
+    SRTT متوسط مُنعَّم و RTTVAR تباين مُنعَّم، والمهلة = SRTT + K * RTTVAR
+    محصورة بين min_timeout و max_timeout. كل انتهاء مهلة يضاعف المهلة
+    (back-off، الفقرة 5.5) حتى max_timeout، وأول عينة جديدة تلغي المضاعفة.
+    """
+    
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+    
+    def __init__(self):
+        self.srtt: Optional[float] = None
+        self.rttvar: Optional[float] = None
+        self.samples = 0
+        self.backoff = 1
+    
+    def observe(self, rtt: float):
+        """إضافة عينة RTT (اتصال ناجح أو رفض)"""
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * rtt
+        self.samples += 1
+        self.backoff = 1
+    
+    def timed_out(self):
+        """انتهاء مهلة بدون رد: مضاعفة المهلة التالية (حتى max_timeout)"""
+        if self.timeout() < TIMING_CONFIG["max_timeout"]:
+            self.backoff *= 2
+    
+    def timeout(self) -> float:
+        """المهلة المقترحة بناءً على العينات"""
+        rto = max(self.srtt + TIMING_CONFIG["rttvar_multiplier"] * self.rttvar, TIMING_CONFIG["min_timeout"])
+        return min(rto * self.backoff, TIMING_CONFIG["max_timeout"])
+
+class HostTimingTable:
+    """
+    جدول RTT مشترك بين مرحلتي الاكتشاف وفحص المنافذ
+    
+    لكل جهاز مقدّر خاص. الجهاز بلا عينات يُفحص بمهلة المستدعي كاملة
+    (جيرانه السريعون لا يقصّرونها، فلا يضيع جهاز بطيء أثناء الاكتشاف)،
+    ومهلة المستدعي تبقى حداً أعلى بعد توفر العينات.
+    """
+    
+    def __init__(self):
+        self.hosts: Dict[str, RTTEstimator] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, ip: str, rtt: float):
+        """تسجيل عينة RTT لجهاز"""
+        with self._lock:
+            self.hosts.setdefault(ip, RTTEstimator()).observe(rtt)
+    
+    def timed_out(self, ip: str):
+        """تسجيل انتهاء مهلة فحص لجهاز (back-off إن كانت له عينات)"""
+        with self._lock:
+            estimator = self.hosts.get(ip)
+            if estimator is not None:
+                estimator.timed_out()
+    
+    def timeout_for(self, ip: str, default: float) -> float:
+        """
+        مهلة الفحص التالي لجهاز معين
+        
+        Args:
+            ip: عنوان الجهاز
+            default: مهلة المستدعي: تُستخدم قبل توفر عينات للجهاز، وحد أعلى بعدها
+        """
+        if not TIMING_CONFIG["adaptive_timeouts"]:
+            return default
+        with self._lock:
+            estimator = self.hosts.get(ip)
+            if estimator is None:
+                return default
+            return min(estimator.timeout(), default)
+    
+    def reset(self):
+        """مسح كل العينات"""
+        with self._lock:
+            self.hosts.clear()
+
+RTT_TABLE = HostTimingTable()
+
+# عدد محاولات الاتصال في هذه العملية (الفحص الموزع يجمعه من كل shard)
+_probes_sent = 0
+
+def probes_sent() -> int:
+    """عدد محاولات اتصال TCP التي أُرسلت في هذه العملية"""
+    return _probes_sent
+
+async def _probe_tcp(ip: str, port: int, timeout: float,
+                     connections: Optional[Dict] = None, adaptive: bool = True) -> str:
+    """
+    محاولة اتصال TCP واحدة غير حاجبة
+    
+    المهلة الفعلية تؤخذ من RTT_TABLE إن توفرت عينات للجهاز (بحد أقصى
+    timeout)، وإلا تُستخدم timeout كما هي. كل رد (قبول أو رفض) يُسجَّل
+    كعينة RTT، وكل انتهاء مهلة يضاعف المهلة التالية للجهاز.
+    إذا مُرِّر connections يبقى الاتصال المفتوح فيه (port -> (reader, writer))
+    لإعادة استخدامه في كشف بصمة الخدمة. adaptive=False يتجاهل RTT_TABLE
+    (لإعادة المحاولة بالمهلة الكاملة).
+    
+    Returns:
+        "open" أو "closed" (رفض الاتصال) أو "filtered" (انتهاء المهلة/خطأ)
+    """
+    global _probes_sent
+    _probes_sent += 1
+    if adaptive:
+        timeout = RTT_TABLE.timeout_for(ip, timeout)
+    started = time.monotonic()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except ConnectionRefusedError:
+        RTT_TABLE.observe(ip, time.monotonic() - started)
+        return "closed"
+    except asyncio.TimeoutError:
+        RTT_TABLE.timed_out(ip)
+        return "filtered"
+    except OSError:
+        return "filtered"
+    
+    RTT_TABLE.observe(ip, time.monotonic() - started)
+    if connections is not None:
+        connections[port] = (reader, writer)
+        return "open"
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return "open"
+
 # --- 1. اكتشاف الشبكة (Network Discovery) ---
 
+# منافذ تُستخدم لإثبات أن الجهاز حي: أي رد (قبول أو رفض) يكفي
+DISCOVERY_PORTS = [80, 443, 22, 445, 3389]
+
+def iter_network_range(network_range: str, parent_range: Optional[str] = None):
+    """
+    توسيع نطاق IPv4 (أي بادئة CIDR) إلى عناوين قابلة للفحص بشكل كسول
+    
+    Args:
+        network_range: عنوان واحد أو CIDR مثل "10.0.0.0/22"
+        parent_range: عند فحص جزء (shard) من نطاق أكبر: تُستبعد عناوين
+            الشبكة والبث الخاصة بالنطاق الأكبر فقط
+    
+    Yields:
+        العناوين (بدون عنوان الشبكة والبث إلا في /31 و /32)
+    """
+    network = ipaddress.ip_network(network_range.strip(), strict=False)
+    if parent_range is not None:
+        parent = ipaddress.ip_network(parent_range.strip(), strict=False)
+        excluded = set()
+        if parent.num_addresses > 2:
+            excluded = {parent.network_address, parent.broadcast_address}
+        for ip in network:
+            if ip not in excluded:
+                yield str(ip)
+        return
+    if network.num_addresses == 1:
+        yield str(network.network_address)
+        return
+    for ip in network.hosts():
+        yield str(ip)
+
+def _range_membership(network_range: str, parent_range: Optional[str] = None):
+    """دالة تحدد إن كان عنوان ما ضمن عناوين iter_network_range لنفس المعاملات"""
+    network = ipaddress.ip_network(network_range.strip(), strict=False)
+    bounds = ipaddress.ip_network(parent_range.strip(), strict=False) if parent_range else network
+    excluded = set()
+    if bounds.num_addresses > 2:
+        excluded = {bounds.network_address, bounds.broadcast_address}
+    
+    def contains(ip: str) -> bool:
+        address = ipaddress.ip_address(ip)
+        return address in network and address not in excluded
+    return contains
+
+def expand_network_range(network_range: str) -> List[str]:
+    """توسيع نطاق IPv4 إلى قائمة عناوين (انظر iter_network_range)"""
+    return list(iter_network_range(network_range))
+
+async def _probe_host_alive(ip: str, ports: List[int], timeout: float,
+                            pacer: Optional["ProbePacer"] = None) -> Optional[str]:
+    """
+    تسابق عدة اتصالات TCP على منافذ مختلفة لنفس الجهاز
+    
+    أول منفذ يرد (مفتوح أو ECONNREFUSED) يثبت أن الجهاز حي
+    فتُلغى بقية المحاولات. كل اتصال يأخذ موعده من pacer (محدد الشبكة
+    الفرعية) قبل إطلاقه، ولا يُطلق اتصال جديد بعد ثبوت أن الجهاز حي،
+    فلا تُستهلك مواعيد لاتصالات لن تحدث.
+    
+    Returns:
+        قيمة detected_via أو None إذا لم يرد أي منفذ
+    """
+    pacer = pacer or ProbePacer()
+    tasks = {}
+    detected_via = None
+    
+    def collect(done):
+        nonlocal detected_via
+        for task in done:
+            state = task.result()
+            if state == "open":
+                detected_via = f"port_{tasks[task]}"
+                return
+            if state == "closed" and detected_via is None:
+                detected_via = f"port_{tasks[task]}_refused"
+    
+    pending = set()
+    try:
+        for port in ports:
+            # انتظار الموعد التالي بالتوازي مع الاتصالات الجارية: رد مبكر يلغي الاتصال التالي
+            turn = asyncio.ensure_future(pacer.wait(ip))
+            pending.add(turn)
+            while not turn.done() and detected_via is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                collect(done - {turn})
+            if detected_via is not None:
+                break  # turn يبقى في pending فيُلغى أدناه
+            pending.discard(turn)
+            if not turn.result():
+                break
+            task = asyncio.ensure_future(_probe_tcp(ip, port, timeout))
+            tasks[task] = port
+            pending.add(task)
+        while pending and detected_via is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            collect(done)
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    
+    return detected_via
+
+async def _iter_discovered_hosts(network_range: str, timeout: float = 1.0,
+                                 ports: Optional[List[int]] = None, stats: Optional[Dict] = None,
+                                 known_alive: Optional[Set[str]] = None,
+                                 parent_range: Optional[str] = None):
+    """
+    اكتشاف الأجهزة وإرجاع كل جهاز نشط فور اكتشافه
+    
+    مجموعة ثابتة من العمال (max_concurrent_hosts) تسحب العناوين من
+    مولّد كسول، فلا تُنشأ مهمة لكل عنوان حتى في النطاقات الكبيرة.
+    العناوين في known_alive تُعتبر نشطة دون فحص (detected_via = "cache").
+    
+    قبل الفحص يُقرأ جدول الجيران في النواة (بدون أي حزمة): الجيران المؤكدون
+    وعناوين الواجهات المحلية تُعتبر نشطة فوراً، الجيران غير المؤكدين
+    (STALE) يُفحصون أولاً، والعناوين التي فشل حلّها تُفحص أخيراً.
+    """
+    ports = ports or DISCOVERY_PORTS
+    stats = stats if stats is not None else {}
+    stats.setdefault("addresses_probed", 0)
+    stats.setdefault("neighbors_seeded", 0)
+    
+    # كل اتصال اكتشاف يأخذ موعده من نفس bucket الشبكة الفرعية المستخدم في فحص المنافذ
+    pacer = ProbePacer()
+    found = asyncio.Queue()
+    
+    known_alive = known_alive or set()
+    
+    # --- تمهيد من جدول الجيران ---
+    neighbors = await asyncio.to_thread(read_neighbor_snapshot)
+    in_range = _range_membership(network_range, parent_range)
+    
+    def select(ips: Set[str]) -> List[str]:
+        return sorted((ip for ip in ips if ip not in known_alive and in_range(ip)),
+                      key=ipaddress.ip_address)
+    
+    seeded = {}
+    for ip in select(neighbors["local"]):
+        seeded[ip] = "local_interface"
+    for ip in select(neighbors["trusted"]):
+        seeded.setdefault(ip, "neighbor_table")
+    likely = [ip for ip in select(neighbors["likely"]) if ip not in seeded]
+    failed = [ip for ip in select(neighbors["failed"]) if ip not in seeded]
+    handled = set(seeded) | set(likely) | set(failed)
+    
+    for ip, detected_via in seeded.items():
+        print(f"  ✅ {ip} نشط ({detected_via})")
+        found.put_nowait({"ip": ip, "status": "active", "detected_via": detected_via})
+    stats["neighbors_seeded"] = len(seeded)
+    
+    # ترتيب الفحص: جيران غير مؤكدين ← عناوين مجهولة ← عناوين فشل حلّها
+    addresses = chain(
+        likely,
+        (ip for ip in iter_network_range(network_range, parent_range) if ip not in handled),
+        failed
+    )
+    
+    async def worker():
+        for ip in addresses:
+            if ip in known_alive:
+                await found.put({"ip": ip, "status": "active", "detected_via": "cache"})
+                continue
+            detected_via = await _probe_host_alive(ip, ports, timeout, pacer)
+            stats["addresses_probed"] += 1
+            if detected_via is not None:
+                print(f"  ✅ {ip} نشط ({detected_via})")
+                await found.put({"ip": ip, "status": "active", "detected_via": detected_via})
+    
+    workers = [asyncio.ensure_future(worker())
+               for _ in range(max(1, SAFETY_CONFIG["max_concurrent_hosts"]))]
+    all_done = asyncio.ensure_future(asyncio.gather(*workers))
+    all_done.add_done_callback(lambda _: found.put_nowait(None))
+    
+    try:
+        while True:
+            host = await found.get()
+            if host is None:
+                break
+            yield host
+        await all_done  # إظهار أي خطأ في العمال
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(all_done, return_exceptions=True)
+
+async def _discover_hosts_engine(network_range: str, timeout: float = 1.0,
+                                 ports: Optional[List[int]] = None) -> List[Dict]:
+    """المحرك المشترك بين discover_hosts و discover_hosts_async (بدون فحوصات الأمان)"""
+    print(f"\n🔍 جاري فحص الشبكة: {network_range}")
+    
+    stats = {}
+    active_hosts = [host async for host in _iter_discovered_hosts(network_range, timeout, ports, stats)]
+    active_hosts.sort(key=lambda host: ipaddress.ip_address(host["ip"]))
+    
+    print(f"\n📊 النتيجة: {len(active_hosts)} أجهزة نشطة من {stats['addresses_probed']} عنوان"
+          + (f" (+{stats['neighbors_seeded']} من جدول الجيران)" if stats["neighbors_seeded"] else ""))
+    return active_hosts
+
 @safety_check
-def discover_hosts(network_range: str, timeout: float = 1.0) -> List[Dict]:
+async def discover_hosts_async(network_range: str, timeout: float = 1.0,
+                               ports: Optional[List[int]] = None) -> List[Dict]:
+    """
+    اكتشاف الأجهزة النشطة بالتوازي باستخدام asyncio
+    
+    Args:
+        network_range: أي نطاق IPv4 مصرح به (عنوان أو CIDR)
+        timeout: المهلة قبل تعلّم RTT الجهاز، وحد أعلى بعده
+        ports: منافذ الاكتشاف (default: DISCOVERY_PORTS)
+    
+    Returns:
+        نفس شكل نتيجة discover_hosts
+    """
+    return await _discover_hosts_engine(network_range, timeout, ports)
+
+@safety_check
+def discover_hosts(network_range: str, timeout: float = 1.0,
+                   ports: Optional[List[int]] = None) -> List[Dict]:
     """
     اكتشاف الأجهزة النشطة في نطاق الشبكة
     
+    يدعم أي بادئة CIDR، ويفحص حتى max_concurrent_hosts جهازاً في آن واحد.
+    الرد بـ ECONNREFUSED يُعتبر دليلاً على أن الجهاز حي.
+    
+    المدة يحددها الإيقاع لا التوازي: كل شبكة /24 تأخذ فحصاً واحداً كل
+    rate_limit_ms (100ms افتراضياً)، فـ /24 أجهزته حية يستغرق ~25 ثانية،
+    وعنوان لا يرد يأخذ حتى len(ports) فحصاً (~127 ثانية لـ /24 فارغ).
+    النطاقات الأكبر تتداخل جزئياً بين شبكاتها الفرعية (/22 ≈ 2.3 × /24).
+    لمختبر مصرح به يمكن خفض rate_limit_ms.
+    
     Args:
         network_range: مثال "192.168.122.0/24"
-        timeout: مهلة الاستجابة بالثواني
+        timeout: مهلة الاستجابة بالثواني (حد أعلى يتقلص مع RTT المقاس)
+        ports: منافذ الاكتشاف (default: DISCOVERY_PORTS)
     
     Returns:
         قائمة بالأجهزة النشطة مع معلوماتها
     """
-    print(f"\n🔍 جاري فحص الشبكة: {network_range}")
+    return _run_sync(_discover_hosts_engine(network_range, timeout, ports))
+
+# --- 2. فحص المنافذ (Port Scanning) ---
+
+DEFAULT_SCAN_PORTS = [
+    21, 22, 23, 25, 53, 80, 110, 111, 135, 139, 143,
+    443, 445, 993, 995, 1723, 3306, 3389, 5900, 8080,
+    18789, 18792  # OpenClaw
+]
+
+async def _scan_ports_engine(target_ip: str, ports: Optional[List[int]] = None,
+                             timeout: float = 0.5, connections: Optional[Dict] = None) -> PortScanResult:
+    """
+    المحرك المشترك بين scan_ports و scan_ports_async (بدون فحوصات الأمان)
     
-    # تحليل نطاق الشبكة
-    if "/" in network_range:
-        base_ip, prefix = network_range.split("/")
-        prefix = int(prefix)
-        
-        if prefix == 24:
-            # /24 يعني 256 عنوان (0-255)
-            base_parts = base_ip.split(".")[:3]
-            addresses = [f"{'.'.join(base_parts)}.{i}" for i in range(1, 255)]
-        else:
-            # نطاقات أخرى (مبسطة)
-            addresses = [base_ip]
-    else:
-        addresses = [network_range]
+    connections (اختياري): قاموس تُحفظ فيه اتصالات المنافذ المفتوحة بدلاً
+    من إغلاقها، ليعيد استخدامها _fingerprint_engine.
+    """
+    if ports is None:
+        # المنافذ الشائعة للفحص
+        ports = list(DEFAULT_SCAN_PORTS)
     
-    active_hosts = []
+    print(f"\n🔍 جاري فحص المنافذ على {target_ip}")
     
-    for ip in addresses:
-        # محاولة ping باستخدام socket
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(timeout)
-            
-            # محاولة الاتصال بمنفذ شائع (80 أو 22)
-            result = sock.connect_ex((ip, 80))
-            if result == 0:
-                host_info = {"ip": ip, "status": "active", "detected_via": "port_80"}
-                active_hosts.append(host_info)
-                print(f"  ✅ {ip} نشط (منفذ 80)")
-            else:
-                # تجربة منفذ 22
-                result = sock.connect_ex((ip, 22))
-                if result == 0:
-                    host_info = {"ip": ip, "status": "active", "detected_via": "port_22"}
-                    active_hosts.append(host_info)
-                    print(f"  ✅ {ip} نشط (منفذ 22)")
-            
-            sock.close()
-        except Exception as e:
-            pass
+    # عمال بعدد max_concurrent_scans يسحبون المنافذ بالترتيب، مضبوطون بـ rate_limit_ms
+    # (لا مهمة لكل منفذ، فحتى النطاق الكامل 1-65535 يبقى بذاكرة ثابتة)
+    pacer = ProbePacer()
+    port_iter = iter(ports)
+    # حالة كل منفذ تُسجل مباشرة في البتات (لا قوائم وسيطة)
+    states = PortStateMap()
     
-    print(f"\n📊 النتيجة: {len(active_hosts)} أجهزة نشطة")
-    return active_hosts
+    async def worker():
+        for port in port_iter:
+            await pacer.wait(target_ip)
+            state = await _probe_tcp(target_ip, port, timeout, connections)
+            states.set(port, state)
+            if state == "open":
+                print(f"  ✅ منفذ {port} مفتوح")
+    
+    workers = max(1, min(SAFETY_CONFIG["max_concurrent_scans"], len(ports)))
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    
+    result = PortScanResult(target_ip, states, total_scanned=len(ports))
+    
+    print(f"\n📊 النتيجة:")
+    print(f"   ├─ مفتوحة: {result.count('open')}")
+    print(f"   ├─ مغلقة: {result.count('closed')}")
+    print(f"   └─ محجوبة: {result.count('filtered')}")
+    
+    return result
 
-# --- 2. فحص المنافذ (Port Scanning) ---
+@safety_check
+async def scan_ports_async(target_ip: str, ports: Optional[List[int]] = None, timeout: float = 0.5) -> Dict:
+    """
+    فحص المنافذ بشكل متوازٍ باستخدام asyncio
+    
+    Args:
+        target_ip: عنوان IP الهدف
+        ports: قائمة المنافذ للفحص (default: شائعة)
+        timeout: المهلة قبل تعلّم RTT الجهاز، وحد أعلى بعده
+    
+    Returns:
+        نفس شكل نتيجة scan_ports
+    """
+    return (await _scan_ports_engine(target_ip, ports, timeout)).to_dict()
 
 @safety_check
 def scan_ports(target_ip: str, ports: Optional[List[int]] = None, timeout: float = 0.5) -> Dict:
     """
     فحص المنافذ المفتوحة على هدف معين
     
+    غلاف متزامن فوق محرك asyncio: المنافذ تُفحص بالتوازي
+    (حتى max_concurrent_scans) مع احترام rate_limit_ms.
+    
     Args:
         target_ip: عنوان IP الهدف
         ports: قائمة المنافذ للفحص (default: شائعة)
-        timeout: مهلة كل اتصال
+        timeout: مهلة كل اتصال (حد أعلى يتقلص مع RTT المقاس)
     
     Returns:
-        قاموس يحتوي على المنافذ المفتوحة والمغلقة
+        {"target", "scan_time", "open_ports", "closed_ports", "filtered_ports", "total_scanned"}
+        (قاموس عادي قابل لـ json.dump؛ البتات PortStateMap تبقى داخل المحرك)
+    """
+    return _run_sync(_scan_ports_engine(target_ip, ports, timeout)).to_dict()
+
+# --- 2.1 فحص النطاق الكامل (Full Port Range) ---
+
+FULL_SCAN_CONFIG = {
+    "progress_every": 2048,        # حدث "progress" كل N منفذ مفحوص
+    "retry_filtered": True,        # إعادة فحص المحجوبة مرة واحدة بالمهلة الكاملة
+    "retry_filtered_ratio": 0.1,   # فقط إذا كانت المحجوبة أقلية (جهاز غير محجوب بالكامل)
+}
+
+async def _iter_port_scan_engine(target_ip: str, ports: Optional[List[int]] = None,
+                                 timeout: float = 0.5, time_budget: Optional[float] = None):
+    """
+    فحص منافذ بترتيب الأولوية مع بث النتائج أثناء الفحص (بدون فحوصات الأمان)
+    
+    عمال بعدد max_concurrent_scans يسحبون المنافذ بالترتيب من القائمة،
+    فالمنافذ الأكثر شيوعاً تُفحص أولاً. عند انتهاء time_budget يتوقف سحب
+    منافذ جديدة وتكتمل الفحوصات الجارية فقط.
+    
+    Yields:
+        {"event": "open", "port", "risk"} لكل منفذ مفتوح فور اكتشافه
+        {"event": "alert", "port", "risk": "HIGH", "service"} لمنفذ عالي الخطورة
+        {"event": "progress", "scanned", "total", "open_ports", "elapsed"}
+        {"event": "completed", "result": PortScanResult (مع مفتاح coverage)}
     """
     if ports is None:
-        # المنافذ الشائعة للفحص
-        ports = [
-            21, 22, 23, 25, 53, 80, 110, 111, 135, 139, 143,
-            443, 445, 993, 995, 1723, 3306, 3389, 5900, 8080,
-            18789, 18792  # OpenClaw
-        ]
+        ports = frequency_ordered_ports(SAFETY_CONFIG["forbidden_ports"])
     
-    print(f"\n🔍 جاري فحص المنافذ على {target_ip}")
+    started = time.monotonic()
+    deadline = started + time_budget if time_budget else None
+    high_risk = set(HIGH_RISK_PORTS)
+    medium_risk = set(MEDIUM_RISK_PORTS)
+    
+    states = PortStateMap()
+    pacer = ProbePacer()
+    events = asyncio.Queue()
+    progress = {"scanned": 0, "budget_exhausted": False}
     
-    open_ports = []
-    closed_ports = []
-    filtered_ports = []
+    async def worker(port_iter, adaptive: bool):
+        for port in port_iter:
+            if not await pacer.wait(target_ip, deadline):
+                progress["budget_exhausted"] = True
+                return
+            state = await _probe_tcp(target_ip, port, timeout, adaptive=adaptive)
+            first_probe = port not in states
+            states.set(port, state)
+            if first_probe:
+                progress["scanned"] += 1
+                if progress["scanned"] % FULL_SCAN_CONFIG["progress_every"] == 0:
+                    await events.put({
+                        "event": "progress",
+                        "scanned": progress["scanned"],
+                        "total": len(ports),
+                        "open_ports": states.count("open"),
+                        "elapsed": time.monotonic() - started
+                    })
+            if state != "open":
+                continue
+            risk = "HIGH" if port in high_risk else "MEDIUM" if port in medium_risk else "LOW"
+            print(f"  ✅ منفذ {port} مفتوح")
+            await events.put({"event": "open", "port": port, "risk": risk})
+            if risk == "HIGH":
+                service = COMMON_SERVICES.get(port, "Unknown")
+                print(f"  🚨 منفذ عالي الخطورة: {port} ({service})")
+                await events.put({"event": "alert", "port": port, "risk": risk, "service": service})
     
-    for port in ports:
+    async def run_pass(port_list: List[int], adaptive: bool):
+        port_iter = iter(port_list)
+        workers = max(1, min(SAFETY_CONFIG["max_concurrent_scans"], len(port_list)))
+        await asyncio.gather(*(worker(port_iter, adaptive) for _ in range(workers)))
+    
+    async def run():
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(timeout)
-            result = sock.connect_ex((target_ip, port))
-            
-            if result == 0:
-                open_ports.append(port)
-                print(f"  ✅ منفذ {port} مفتوح")
-            elif result == 11:  # Connection refused
-                closed_ports.append(port)
-            else:
-                filtered_ports.append(port)  # Firewall filtered
-            
-            sock.close()
-        except Exception as e:
-            filtered_ports.append(port)
+            await run_pass(ports, adaptive=True)
+            # ضغط الحلقة قد يجعل المهلة المتكيفة تنتهي قبل الرد: إعادة واحدة بالمهلة الكاملة
+            filtered = states.ports("filtered").to_list()
+            if (FULL_SCAN_CONFIG["retry_filtered"] and filtered
+                    and not progress["budget_exhausted"]
+                    and len(filtered) <= FULL_SCAN_CONFIG["retry_filtered_ratio"] * len(states)):
+                await run_pass(filtered, adaptive=False)
+        finally:
+            await events.put(None)
     
-    result = {
-        "target": target_ip,
-        "scan_time": datetime.now().isoformat(),
-        "open_ports": open_ports,
-        "closed_ports": closed_ports,
-        "filtered_ports": filtered_ports,
-        "total_scanned": len(ports)
+    runner = asyncio.ensure_future(run())
+    try:
+        while True:
+            event = await events.get()
+            if event is None:
+                break
+            yield event
+        await runner  # إظهار أي خطأ في العمال
+    finally:
+        runner.cancel()
+        await asyncio.gather(runner, return_exceptions=True)
+    
+    duration = time.monotonic() - started
+    coverage = {
+        "scanned": len(states),
+        "total": len(ports),
+        "percent": round(100.0 * len(states) / len(ports), 2) if ports else 100.0,
+        "budget_exhausted": progress["budget_exhausted"],
+        "time_budget": time_budget,
+        "duration_seconds": duration
     }
+    yield {"event": "completed", "result": PortScanResult(target_ip, states, coverage=coverage)}
+
+def _public_event(event: Dict) -> Dict:
+    """حدث completed للواجهة العامة: PortScanResult → قاموس عادي"""
+    if event["event"] == "completed":
+        return {**event, "result": event["result"].to_dict()}
+    return event
+
+@safety_check
+async def iter_full_port_scan_async(target_ip: str, time_budget: Optional[float] = None,
+                                    ports: Optional[List[int]] = None, timeout: float = 0.5):
+    """
+    فحص كل المنافذ 1-65535 بترتيب الشيوع مع بث النتائج (async iterator)
+    
+    Args:
+        target_ip: عنوان IP الهدف
+        time_budget: أقصى مدة بالثواني (None = بلا حد)؛ عند انتهائها يتوقف الفحص بنظافة
+        ports: قائمة مرتبة بديلة (default: frequency_ordered_ports بدون forbidden_ports)
+        timeout: المهلة قبل تعلّم RTT الجهاز، وحد أعلى بعده
+    
+    Yields:
+        أحداث open / alert / progress ثم completed (result["coverage"] = نسبة التغطية)
+    """
+    async for event in _iter_port_scan_engine(target_ip, ports, timeout, time_budget):
+        yield _public_event(event)
+
+@safety_check
+def iter_full_port_scan(target_ip: str, time_budget: Optional[float] = None,
+                        ports: Optional[List[int]] = None, timeout: float = 0.5):
+    """
+    فحص كل المنافذ 1-65535 بترتيب الشيوع (generator متزامن)
     
+    مثال:
+        for event in iter_full_port_scan("192.168.1.10", time_budget=120):
+            if event["event"] == "alert":
+                notify(event)
+    """
+    for event in _iterate_sync(lambda: _iter_port_scan_engine(target_ip, ports, timeout, time_budget)):
+        yield _public_event(event)
+
+@safety_check
+def full_port_scan(target_ip: str, time_budget: Optional[float] = None,
+                   timeout: float = 0.5) -> Dict:
+    """
+    فحص كل المنافذ 1-65535 على هدف واحد
+    
+    Args:
+        target_ip: عنوان IP الهدف
+        time_budget: أقصى مدة بالثواني (None = بلا حد)
+        timeout: المهلة قبل تعلّم RTT الجهاز، وحد أعلى بعده
+    
+    Returns:
+        قاموس بنفس مفاتيح scan_ports + "coverage"
+    """
+    print(f"\n🔍 جاري فحص كل المنافذ على {target_ip}" +
+          (f" (ميزانية {time_budget} ثانية)" if time_budget else ""))
+    
+    result = None
+    for event in _iterate_sync(lambda: _iter_port_scan_engine(target_ip, None, timeout, time_budget)):
+        if event["event"] == "progress":
+            print(f"  ⏳ {event['scanned']}/{event['total']} منفذ ({event['open_ports']} مفتوح)")
+        elif event["event"] == "completed":
+            result = event["result"]
+    
+    coverage = result["coverage"]
     print(f"\n📊 النتيجة:")
-    print(f"   ├─ مفتوحة: {len(open_ports)}")
-    print(f"   ├─ مغلقة: {len(closed_ports)}")
-    print(f"   └─ محجوبة: {len(filtered_ports)}")
+    print(f"   ├─ مفتوحة: {result.count('open')}")
+    print(f"   ├─ مغلقة: {result.count('closed')}")
+    print(f"   ├─ محجوبة: {result.count('filtered')}")
+    print(f"   └─ التغطية: {coverage['scanned']}/{coverage['total']} ({coverage['percent']}%)" +
+          (" ⏱️ انتهت الميزانية" if coverage["budget_exhausted"] else ""))
     
-    return result
+    return result.to_dict()
 
 # --- 3. كشف الخدمات (Service Detection) ---
 
@@ -284,13 +1329,66 @@ COMMON_SERVICES = {
     18792: "OpenClaw Internal"
 }
 
-def detect_services(target_ip: str, open_ports: List[int]) -> List[Dict]:
+async def _fingerprint_engine(target_ip: str, open_ports: List[int],
+                              connections: Optional[Dict] = None) -> Dict[int, Dict]:
+    """
+    كشف بصمة عدة منافذ مفتوحة بالتوازي (بدون فحوصات الأمان)
+    
+    الاتصالات الموجودة في connections (من _scan_ports_engine) يُعاد
+    استخدامها، والباقي يُفتح من جديد عبر ProbePacer. كل الاتصالات تُغلق
+    في النهاية.
+    
+    Returns:
+        {port: fingerprint}
+    """
+    connections = connections if connections is not None else {}
+    semaphore = asyncio.Semaphore(max(1, SAFETY_CONFIG["max_concurrent_scans"]))
+    connect_timeout = RTT_TABLE.timeout_for(target_ip, 1.0)
+    pacer = ProbePacer()  # الاتصالات الجديدة فقط تأخذ موعداً من bucket الشبكة الفرعية
+    
+    async def grab(port: int) -> Dict:
+        async with semaphore:
+            return await grab_fingerprint(target_ip, port, connections.pop(port, None),
+                                          connect_timeout, pacer=pacer)
+    
+    try:
+        results = await asyncio.gather(*(grab(port) for port in open_ports))
+    finally:
+        # إغلاق أي اتصال لم يُستخدم
+        for _, writer in connections.values():
+            writer.close()
+        connections.clear()
+    
+    return {fp["port"]: fp for fp in results}
+
+@safety_check
+async def fingerprint_services_async(target_ip: str, open_ports: List[int]) -> Dict[int, Dict]:
+    """
+    كشف بصمة الخدمات (banner + طلب HTTP خفيف) على المنافذ المفتوحة بالتوازي
+    
+    Args:
+        target_ip: عنوان الهدف
+        open_ports: قائمة المنافذ المفتوحة
+    
+    Returns:
+        {port: {"service", "product", "version", "banner", "method"}}
+    """
+    return await _fingerprint_engine(target_ip, open_ports)
+
+@safety_check
+def fingerprint_services(target_ip: str, open_ports: List[int]) -> Dict[int, Dict]:
+    """نسخة متزامنة من fingerprint_services_async"""
+    return _run_sync(_fingerprint_engine(target_ip, open_ports))
+
+def detect_services(target_ip: str, open_ports: List[int],
+                    fingerprints: Optional[Dict[int, Dict]] = None) -> List[Dict]:
     """
     كشف الخدمات العاملة على المنافذ المفتوحة
     
     Args:
         target_ip: عنوان الهدف
         open_ports: قائمة المنافذ المفتوحة
+        fingerprints: نتائج fingerprint_services (اختياري) - تتقدم على رقم المنفذ
     
     Returns:
         قائمة بالخدمات المكتشفة
@@ -298,17 +1396,33 @@ def detect_services(target_ip: str, open_ports: List[int]) -> List[Dict]:
     print(f"\n🔍 جاري كشف الخدمات على {target_ip}")
     
     services = []
+    fingerprints = fingerprints or {}
     
     for port in open_ports:
-        service_name = COMMON_SERVICES.get(port, "Unknown")
-        service_info = {
-            "port": port,
-            "service": service_name,
-            "protocol": "TCP",
-            "confidence": "high" if service_name != "Unknown" else "low"
-        }
+        fingerprint = fingerprints.get(port) or {}
+        if fingerprint.get("service"):
+            service_name = fingerprint["service"]
+            service_info = {
+                "port": port,
+                "service": service_name,
+                "protocol": "TCP",
+                "confidence": "high",
+                "product": fingerprint.get("product"),
+                "version": fingerprint.get("version"),
+                "banner": fingerprint.get("banner", ""),
+                "detection": fingerprint.get("method")
+            }
+        else:
+            service_name = COMMON_SERVICES.get(port, "Unknown")
+            service_info = {
+                "port": port,
+                "service": service_name,
+                "protocol": "TCP",
+                "confidence": "high" if service_name != "Unknown" else "low"
+            }
         services.append(service_info)
-        print(f"  ├─ منفذ {port}: {service_name}")
+        version = " ".join(filter(None, [service_info.get("product"), service_info.get("version")]))
+        print(f"  ├─ منفذ {port}: {service_name}" + (f" ({version})" if version else ""))
     
     return services
 
@@ -317,22 +1431,25 @@ def detect_services(target_ip: str, open_ports: List[int]) -> List[Dict]:
 HIGH_RISK_PORTS = [22, 23, 135, 139, 445, 3389, 5900]
 MEDIUM_RISK_PORTS = [21, 25, 110, 143, 3306, 8080]
 
-def assess_risk(open_ports: List[int], target_ip: str) -> Dict:
+# توصيات مرتبطة بالمنافذ عالية الخطورة: (المنافذ، التوصية)
+RISK_RECOMMENDATIONS = [
+    ((139, 445), "إيقاف Samba إذا لم يكن مستخدماً"),
+    ((22,), "تفعيل المصادقة الثنائية لـ SSH"),
+    ((3389,), "تعطيل RDP أو تقييده بعنوان IP معين"),
+]
+
+def score_risk(open_ports: List[int], target_ip: str) -> Dict:
     """
-    تقييم مستوى المخاطر بناءً على المنافذ المفتوحة
-    
-    Args:
-        open_ports: المنافذ المفتوحة
-        target_ip: الهدف
+    حساب تقرير المخاطر لجهاز واحد بدون طباعة
     
-    Returns:
-        تقرير المخاطر
+    (نفس منطق assess_risk؛ انظر risk_engine.FleetRiskEngine للتقييم الجماعي)
     """
-    print(f"\n⚠️ تقييم المخاطر لـ {target_ip}")
+    high_set = set(HIGH_RISK_PORTS)
+    medium_set = set(MEDIUM_RISK_PORTS)
     
-    high_risk = [p for p in open_ports if p in HIGH_RISK_PORTS]
-    medium_risk = [p for p in open_ports if p in MEDIUM_RISK_PORTS]
-    low_risk = [p for p in open_ports if p not in HIGH_RISK_PORTS + MEDIUM_RISK_PORTS]
+    high_risk = [p for p in open_ports if p in high_set]
+    medium_risk = [p for p in open_ports if p in medium_set]
+    low_risk = [p for p in open_ports if p not in high_set and p not in medium_set]
     
     # حساب مستوى الخطر العام
     if len(high_risk) > 0:
@@ -358,15 +1475,29 @@ def assess_risk(open_ports: List[int], target_ip: str) -> Dict:
     }
     
     # إضافة توصيات
-    if 139 in high_risk or 445 in high_risk:
-        report["recommendations"].append("إيقاف Samba إذا لم يكن مستخدماً")
-    if 22 in high_risk:
-        report["recommendations"].append("تفعيل المصادقة الثنائية لـ SSH")
-    if 3389 in high_risk:
-        report["recommendations"].append("تعطيل RDP أو تقييده بعنوان IP معين")
-    
-    print(f"   ├─ مستوى الخطر: {overall_risk} (درجة: {risk_score}/100)")
-    print(f"   ├─ منافذ عالية الخطورة: {len(high_risk)}")
+    for ports, recommendation in RISK_RECOMMENDATIONS:
+        if any(p in high_risk for p in ports):
+            report["recommendations"].append(recommendation)
+    
+    return report
+
+def assess_risk(open_ports: List[int], target_ip: str) -> Dict:
+    """
+    تقييم مستوى المخاطر بناءً على المنافذ المفتوحة
+    
+    Args:
+        open_ports: المنافذ المفتوحة
+        target_ip: الهدف
+    
+    Returns:
+        تقرير المخاطر
+    """
+    print(f"\n⚠️ تقييم المخاطر لـ {target_ip}")
+    
+    report = score_risk(open_ports, target_ip)
+    
+    print(f"   ├─ مستوى الخطر: {report['overall_risk']} (درجة: {report['risk_score']}/100)")
+    print(f"   ├─ منافذ عالية الخطورة: {len(report['high_risk_ports'])}")
     print(f"   └─ توصيات: {len(report['recommendations'])}")
     
     for rec in report["recommendations"]:
@@ -376,98 +1507,451 @@ def assess_risk(open_ports: List[int], target_ip: str) -> Dict:
 
 # --- 5. دالة الفحص الشامل (Full Scan) ---
 
-@safety_check
-def full_network_scan(network_range: str, common_ports_only: bool = True) -> Dict:
-    """
-    فحص شبكة كامل: اكتشاف + فحص منافذ + كشف خدمات + تقييم مخاطر
+def _build_host_result(host: Dict, port_result: Optional[PortScanResult],
+                       fingerprints: Optional[Dict[int, Dict]] = None) -> Dict:
+    """بناء نتيجة جهاز واحد: منافذ + كشف خدمات + تقييم مخاطر"""
+    ip = host["ip"]
+    open_ports = port_result["open_ports"] if port_result is not None else []
     
-    Args:
-        network_range: نطاق الشبكة
-        common_ports_only: استخدام قائمة منافذ شائعة فقط
+    if open_ports:
+        # كشف الخدمات
+        services = detect_services(ip, open_ports, fingerprints)
+        
+        # تقييم المخاطر
+        risk = assess_risk(open_ports, ip)
+        
+        return {
+            "ip": ip,
+            "status": host["status"],
+            "detected_via": host.get("detected_via", "unknown"),
+            "open_ports": open_ports,
+            "closed_ports": port_result.count("closed"),
+            "services": services,
+            "risk_assessment": risk
+        }
     
-    Returns:
-        تقرير شامل
-    """
-    print("\n" + "="*60)
-    print("🛡️  Pi bot Security Scanner - Full Network Scan")
-    print("="*60)
+    return {
+        "ip": ip,
+        "status": "active",
+        "detected_via": host.get("detected_via", "unknown"),
+        "open_ports": [],
+        "services": [],
+        "risk_assessment": {"overall_risk": "LOW", "risk_score": 0}
+    }
+
+class ScanSummary:
+    """ملخص فحص الشبكة يُحدَّث تدريجياً مع وصول نتيجة كل جهاز"""
     
-    start_time = datetime.now()
+    def __init__(self, network_range: str):
+        self.network_range = network_range
+        self.start_time = datetime.now()
+        self.targets: List[Dict] = []
+        self.hosts_with_open_ports = 0
+        self.risk_counts = {"HIGH": 0, "MEDIUM": 0, "LOW": 0}
     
-    # المرحلة 1: اكتشاف الأجهزة
-    active_hosts = discover_hosts(network_range)
+    def add(self, host_result: Dict):
+        """إضافة نتيجة جهاز وتحديث العدادات"""
+        self.targets.append(host_result)
+        if host_result["open_ports"]:
+            self.hosts_with_open_ports += 1
+        level = host_result.get("risk_assessment", {}).get("overall_risk")
+        if level in self.risk_counts:
+            self.risk_counts[level] += 1
     
-    if not active_hosts:
+    def snapshot(self) -> Dict:
+        """الملخص الحالي (بنفس مفاتيح summary في التقرير النهائي)"""
+        return {
+            "total_active": len(self.targets),
+            "high_risk_hosts": self.risk_counts["HIGH"],
+            "medium_risk_hosts": self.risk_counts["MEDIUM"],
+            "low_risk_hosts": self.risk_counts["LOW"]
+        }
+    
+    def to_report(self) -> Dict:
+        """التقرير الشامل بنفس شكل full_network_scan"""
+        if not self.targets:
+            return {
+                "status": "completed",
+                "scan_time": self.start_time.isoformat(),
+                "duration_seconds": (datetime.now() - self.start_time).total_seconds(),
+                "targets": [],
+                "summary": "لم يتم العثور على أجهزة نشطة"
+            }
+        
+        end_time = datetime.now()
         return {
             "status": "completed",
-            "scan_time": start_time.isoformat(),
-            "duration_seconds": (datetime.now() - start_time).total_seconds(),
-            "targets": [],
-            "summary": "لم يتم العثور على أجهزة نشطة"
+            "scan_time": self.start_time.isoformat(),
+            "end_time": end_time.isoformat(),
+            "duration_seconds": (end_time - self.start_time).total_seconds(),
+            "network_range": self.network_range,
+            "total_hosts_scanned": len(self.targets),
+            "hosts_with_open_ports": self.hosts_with_open_ports,
+            "targets": sorted(self.targets, key=lambda h: ipaddress.ip_address(h["ip"])),
+            "summary": self.snapshot()
         }
+
+SCAN_MODES = ("full", "delta")
+
+async def _iter_network_scan_engine(network_range: str, ports: Optional[List[int]] = None,
+                                    mode: str = "full", state: Optional[ScanStateStore] = None,
+                                    parent_range: Optional[str] = None):
+    """
+    Pipeline: كل جهاز يُكتشف يدخل مباشرة في فحص المنافذ وكشف الخدمات وتقييم المخاطر
+    
+    في وضع "delta" تُؤخذ الأجهزة والمنافذ الحديثة من state، ويُعاد فحص
+    المنتهي الصلاحية والجديد والمتقلب فقط. عند توفر state يحتوي التقرير
+    النهائي على مفتاح "delta" بالفرق عن الفحص السابق.
+    
+    Yields:
+        {"event": "host", "host": ..., "summary": ...} لكل جهاز فور اكتماله
+        ثم {"event": "completed", "report": ...} في النهاية
+    """
+    if mode not in SCAN_MODES:
+        raise ValueError(f"Unknown scan mode: {mode} (expected one of {SCAN_MODES})")
+    
+    scan_port_list = list(ports) if ports is not None else list(DEFAULT_SCAN_PORTS)
+    delta = mode == "delta"
     
-    # المرحلة 2-4: فحص كل جهاز
-    scan_results = []
+    # لقطة الحالة السابقة للأجهزة داخل النطاق
+    previous = {}
+    known_alive = set()
+    if state is not None:
+        network = ipaddress.ip_network(network_range.strip(), strict=False)
+        in_range = {ip for ip in state.hosts if ipaddress.ip_address(ip) in network}
+        previous = state.open_ports_snapshot(in_range)
+        if delta:
+            known_alive = state.fresh_hosts() & in_range
     
-    for host in active_hosts:
+    summary = ScanSummary(network_range)
+    counters = {"ports_probed": 0, "ports_from_cache": 0}
+    host_slots = asyncio.Semaphore(max(1, SAFETY_CONFIG["max_concurrent_host_scans"]))
+    finished = asyncio.Queue()
+    
+    async def scan_host(host: Dict):
         ip = host["ip"]
+        to_probe = scan_port_list
+        if state is not None:
+            state.record_host(ip, host["detected_via"])
+            if delta:
+                to_probe = state.ports_to_probe(ip, scan_port_list)
         
-        # فحص المنافذ
-        port_result = scan_ports(ip)
+        port_result = None
+        fingerprints = {}
+        if to_probe:
+            async with host_slots:
+                log_scan_action("SCAN_STARTED", ip)
+                connections = {} if FINGERPRINT_CONFIG["enabled"] else None
+                try:
+                    port_result = await _scan_ports_engine(ip, to_probe, connections=connections)
+                    if connections is not None:
+                        fingerprints = await _fingerprint_engine(ip, port_result["open_ports"], connections)
+                except Exception as e:
+                    log_scan_action("SCAN_FAILED", ip, {"error": str(e)})
+                    raise
+                log_scan_action("SCAN_COMPLETED", ip, {"status": "success"})
         
-        if port_result["open_ports"]:
-            # كشف الخدمات
-            services = detect_services(ip, port_result["open_ports"])
-            
-            # تقييم المخاطر
-            risk = assess_risk(port_result["open_ports"], ip)
-            
-            scan_results.append({
-                "ip": ip,
-                "status": host["status"],
-                "detected_via": host.get("detected_via", "unknown"),
-                "open_ports": port_result["open_ports"],
-                "closed_ports": len(port_result["closed_ports"]),
-                "services": services,
-                "risk_assessment": risk
-            })
-        else:
-            scan_results.append({
-                "ip": ip,
-                "status": "active",
-                "detected_via": host.get("detected_via", "unknown"),
-                "open_ports": [],
-                "services": [],
-                "risk_assessment": {"overall_risk": "LOW", "risk_score": 0}
-            })
-    
-    # التقرير الشامل
-    full_report = {
-        "status": "completed",
-        "scan_time": start_time.isoformat(),
-        "end_time": datetime.now().isoformat(),
-        "duration_seconds": (datetime.now() - start_time).total_seconds(),
-        "network_range": network_range,
-        "total_hosts_scanned": len(active_hosts),
-        "hosts_with_open_ports": len([h for h in scan_results if h["open_ports"]]),
-        "targets": scan_results,
-        "summary": {
-            "total_active": len(active_hosts),
-            "high_risk_hosts": len([h for h in scan_results if h.get("risk_assessment", {}).get("overall_risk") == "HIGH"]),
-            "medium_risk_hosts": len([h for h in scan_results if h.get("risk_assessment", {}).get("overall_risk") == "MEDIUM"]),
-            "low_risk_hosts": len([h for h in scan_results if h.get("risk_assessment", {}).get("overall_risk") == "LOW"])
+        counters["ports_probed"] += len(to_probe)
+        counters["ports_from_cache"] += len(scan_port_list) - len(to_probe)
+        if state is not None:
+            if port_result is not None:
+                state.record_ports(ip, port_result, fingerprints)
+            if delta:
+                port_result = state.port_result(ip, scan_port_list)
+                fingerprints = state.fingerprints(ip)
+        
+        await finished.put(_build_host_result(host, port_result, fingerprints))
+    
+    async def feed():
+        host_tasks = []
+        try:
+            async for host in _iter_discovered_hosts(network_range, known_alive=known_alive,
+                                                     parent_range=parent_range):
+                host_tasks.append(asyncio.ensure_future(scan_host(host)))
+            await asyncio.gather(*host_tasks)
+        finally:
+            for task in host_tasks:
+                task.cancel()
+            await finished.put(None)
+    
+    feeder = asyncio.ensure_future(feed())
+    try:
+        while True:
+            host_result = await finished.get()
+            if host_result is None:
+                break
+            summary.add(host_result)
+            yield {"event": "host", "host": host_result, "summary": summary.snapshot()}
+        await feeder  # إظهار أي خطأ في مراحل الـ Pipeline
+    finally:
+        feeder.cancel()
+        await asyncio.gather(feeder, return_exceptions=True)
+    
+    report = summary.to_report()
+    
+    if state is not None:
+        found = {host["ip"] for host in summary.targets}
+        for ip in previous.keys() - found:
+            state.forget_host(ip)
+        report["delta"] = {
+            "mode": mode,
+            **ScanStateStore.diff(previous, state.open_ports_snapshot(found)),
+            **counters
         }
-    }
+        state.save_state()
+    
+    yield {"event": "completed", "report": report}
+
+def _resolve_state(mode: str, state_store: Optional[ScanStateStore]) -> Optional[ScanStateStore]:
+    """وضع delta يحتاج مخزن حالة: يُنشأ الافتراضي إن لم يُمرَّر"""
+    if mode == "delta" and state_store is None:
+        return ScanStateStore()
+    return state_store
+
+@safety_check
+async def iter_network_scan_async(network_range: str, ports: Optional[List[int]] = None,
+                                  mode: str = "full", state_store: Optional[ScanStateStore] = None):
+    """
+    فحص شبكة كامل بوضع البث (async iterator)
+    
+    Args:
+        network_range: نطاق الشبكة
+        ports: منافذ الفحص لكل جهاز (default: شائعة)
+        mode: "full" أو "delta"
+        state_store: مخزن حالة الفحص (اختياري في full، افتراضي في delta)
+    
+    Yields:
+        أحداث "host" فور اكتمال كل جهاز ثم حدث "completed" بالتقرير الشامل
+    """
+    state = _resolve_state(mode, state_store)
+    async for event in _iter_network_scan_engine(network_range, ports, mode, state):
+        yield event
+
+@safety_check
+def iter_network_scan(network_range: str, ports: Optional[List[int]] = None,
+                      mode: str = "full", state_store: Optional[ScanStateStore] = None):
+    """
+    فحص شبكة كامل بوضع البث (generator متزامن)
+    
+    مثال:
+        for event in iter_network_scan("192.168.1.0/24"):
+            if event["event"] == "host" and event["host"]["risk_assessment"]["overall_risk"] == "HIGH":
+                alert(event["host"])
+    """
+    state = _resolve_state(mode, state_store)
+    yield from _iterate_sync(lambda: _iter_network_scan_engine(network_range, ports, mode, state))
+
+@safety_check
+def full_network_scan(network_range: str, common_ports_only: bool = True,
+                      mode: str = "full", state_store: Optional[ScanStateStore] = None) -> Dict:
+    """
+    فحص شبكة كامل: اكتشاف + فحص منافذ + كشف خدمات + تقييم مخاطر
+    
+    يعتمد على نفس Pipeline الخاص بـ iter_network_scan ويعيد التقرير النهائي فقط.
+    
+    Args:
+        network_range: نطاق الشبكة
+        common_ports_only: استخدام قائمة منافذ شائعة فقط (False = كل المنافذ 1-65535 بترتيب الشيوع)
+        mode: "full" (فحص كل شيء) أو "delta" (إعادة فحص ما تغيّر أو انتهت صلاحيته فقط)
+        state_store: مخزن حالة الفحص (يُنشأ scan_state.json افتراضياً في وضع delta)
+    
+    Returns:
+        تقرير شامل (مع مفتاح "delta" عند استخدام مخزن حالة)
+    """
+    print("\n" + "="*60)
+    print("🛡️  Pi bot Security Scanner - Full Network Scan")
+    print("="*60)
+    
+    state = _resolve_state(mode, state_store)
+    ports = None if common_ports_only else frequency_ordered_ports(SAFETY_CONFIG["forbidden_ports"])
+    full_report = None
+    for event in _iterate_sync(lambda: _iter_network_scan_engine(network_range, ports, mode, state)):
+        if event["event"] == "completed":
+            full_report = event["report"]
+    
+    if not full_report["targets"]:
+        return full_report
     
     print("\n" + "="*60)
     print("✅ اكتمل الفحص!")
     print(f"📊 المدة: {full_report['duration_seconds']:.2f} ثانية")
     print(f"📊 الأجهزة النشطة: {full_report['summary']['total_active']}")
     print(f"📊 أجهزة بمنافذ مفتوحة: {full_report['hosts_with_open_ports']}")
+    if "delta" in full_report:
+        delta = full_report["delta"]
+        print(f"📊 منافذ أعيد فحصها: {delta['ports_probed']} (من الذاكرة: {delta['ports_from_cache']})")
     print("="*60)
     
     return full_report
 
+# --- 6. الفحص الموزع على عدة عمليات (Sharded Scan) ---
+
+def split_network_range(network_range: str, shards: int) -> List[str]:
+    """
+    تقسيم نطاق IPv4 إلى شبكات فرعية متساوية (shards)
+    
+    Args:
+        network_range: النطاق الكامل
+        shards: العدد المطلوب تقريباً (يُقرَّب لأقرب قوة للعدد 2)
+    
+    Returns:
+        قائمة CIDR تغطي النطاق بالكامل دون تداخل
+    """
+    network = ipaddress.ip_network(network_range.strip(), strict=False)
+    extra_bits = max(0, (max(1, shards) - 1).bit_length())
+    new_prefix = min(network.prefixlen + extra_bits, network.max_prefixlen)
+    return [str(subnet) for subnet in network.subnets(new_prefix=new_prefix)]
+
+_shard_results = None
+_shard_stop = None
+
+def _config_snapshot() -> Dict[str, Dict]:
+    """نسخة من إعدادات الفحص الحالية (عمليات spawn تبدأ بالقيم الافتراضية)"""
+    return {
+        "SAFETY_CONFIG": dict(SAFETY_CONFIG),
+        "TIMING_CONFIG": dict(TIMING_CONFIG),
+        "AUDIT_LOG_CONFIG": dict(AUDIT_LOG_CONFIG),
+        "FINGERPRINT_CONFIG": dict(FINGERPRINT_CONFIG),
+    }
+
+def _init_shard_worker(results, stop, quiet: bool, config: Optional[Dict[str, Dict]] = None):
+    """تهيئة عملية الفحص الفرعية: قناة النتائج، إشارة الإيقاف، إعدادات العملية الأم، وكتم الطباعة"""
+    global _shard_results, _shard_stop
+    _shard_results = results
+    _shard_stop = stop
+    for name, values in (config or {}).items():
+        globals()[name].update(values)
+    if quiet:
+        sys.stdout = open(os.devnull, "w")
+
+def _scan_shard(shard_range: str, parent_range: str, ports: Optional[List[int]]) -> int:
+    """
+    فحص shard واحد داخل عملية فرعية وبث كل جهاز للعملية الأم فور اكتماله
+    
+    حدث "done" الأخير يحمل عدد محاولات الاتصال الفعلية في الـ shard.
+    
+    Returns:
+        عدد الأجهزة النشطة في الـ shard
+    """
+    async def run() -> int:
+        count = 0
+        async for event in _iter_network_scan_engine(shard_range, ports, parent_range=parent_range):
+            if _shard_stop.is_set():
+                break  # أُغلق المُكرِّر في العملية الأم
+            if event["event"] == "host":
+                _shard_results.put(("host", shard_range, event["host"]))
+                count += 1
+        return count
+    
+    probes_before = probes_sent()
+    try:
+        return asyncio.run(run())
+    finally:
+        # عمليات الـ pool لا تشغّل atexit، لذا يُفرَّغ سجل التدقيق هنا
+        flush_audit_log()
+        _shard_results.put(("done", shard_range, probes_sent() - probes_before))
+
+def _drain_shard_results(results, pending: Set[str], futures):
+    """قراءة القناة وإهمال النتائج حتى تنتهي كل الـ shards الجارية"""
+    while pending:
+        try:
+            kind, shard, _ = results.get(timeout=0.5)
+        except queue.Empty:
+            if all(future.done() for future in futures):
+                return  # عملية انهارت قبل "done": لا شيء آخر سيصل
+            continue
+        if kind == "done":
+            pending.discard(shard)
+
+@safety_check
+def iter_sharded_network_scan(network_range: str, ports: Optional[List[int]] = None,
+                              workers: Optional[int] = None, quiet: bool = True):
+    """
+    فحص نطاق كبير موزع على عدة عمليات (ProcessPoolExecutor)
+    
+    كل shard يشغّل Pipeline الفحص كاملاً في عملية مستقلة، والنتائج
+    تُبث للعملية الأم وتُدمج في تقرير واحد بنفس شكل full_network_scan.
+    (وضع full فقط؛ الفحص التفاضلي يعمل داخل عملية واحدة)
+    
+    Args:
+        network_range: النطاق المصرح به
+        ports: منافذ الفحص لكل جهاز (default: شائعة)
+        workers: عدد العمليات (default: عدد الأنوية)
+        quiet: كتم طباعة العمليات الفرعية
+    
+    Yields:
+        أحداث "host" ثم حدث "completed" (نفس شكل iter_network_scan، مع
+        "probes": مجموع محاولات الاتصال في كل الـ shards)
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = split_network_range(network_range, workers * 4)
+    summary = ScanSummary(network_range)
+    probes = 0
+    
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    stop = context.Event()
+    
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_shard_worker,
+                             initargs=(results, stop, quiet, _config_snapshot())) as pool:
+        futures = {shard: pool.submit(_scan_shard, shard, network_range, ports) for shard in shards}
+        pending = set(shards)  # shards لم يصل منها "done" بعد
+        try:
+            while pending:
+                try:
+                    kind, shard, payload = results.get(timeout=0.5)
+                except queue.Empty:
+                    # إظهار خطأ أي عملية فرعية انهارت قبل إرسال "done"
+                    for future in futures.values():
+                        if future.done() and future.exception():
+                            raise future.exception()
+                    continue
+                if kind == "done":
+                    pending.discard(shard)
+                    probes += payload
+                    continue
+                summary.add(payload)
+                yield {"event": "host", "host": payload, "summary": summary.snapshot()}
+            for future in futures.values():
+                future.result()  # إظهار أي خطأ في الـ shards
+        finally:
+            # إغلاق مبكر أو خطأ: إلغاء ما لم يبدأ، إيقاف الجاري، وتفريغ القناة حتى
+            # يرسل كل shard جارٍ "done"؛ وإلا تبقى العمليات معلقة على قناة ممتلئة
+            # ويتوقف shutdown(wait=True) عند الخروج من الـ with
+            stop.set()
+            pending -= {shard for shard, future in futures.items() if future.cancel()}
+            _drain_shard_results(results, pending, futures.values())
+    
+    yield {"event": "completed", "report": summary.to_report(), "probes": probes}
+
+def sharded_network_scan(network_range: str, ports: Optional[List[int]] = None,
+                         workers: Optional[int] = None) -> Dict:
+    """
+    نسخة full_network_scan الموزعة على عدة عمليات
+    
+    Returns:
+        تقرير شامل بنفس شكل full_network_scan
+    """
+    print("\n" + "="*60)
+    print(f"🛡️  Pi bot Security Scanner - Sharded Network Scan ({workers or os.cpu_count()} workers)")
+    print("="*60)
+    
+    full_report = None
+    for event in iter_sharded_network_scan(network_range, ports, workers):
+        if event["event"] == "completed":
+            full_report = event["report"]
+    
+    if full_report["targets"]:
+        print("\n" + "="*60)
+        print("✅ اكتمل الفحص!")
+        print(f"📊 المدة: {full_report['duration_seconds']:.2f} ثانية")
+        print(f"📊 الأجهزة النشطة: {full_report['summary']['total_active']}")
+        print(f"📊 أجهزة بمنافذ مفتوحة: {full_report['hosts_with_open_ports']}")
+        print("="*60)
+    
+    return full_report
+
 # --- نقطة التشغيل المباشر ---
 
 if __name__ == "__main__":